@@ -1,3 +1,20 @@
-from .app import app
+from __future__ import annotations
 
-__all__ = ["app"]
+from flask import Flask
+
+from .factory import create_app
+
+_app: Flask | None = None
+
+
+def __getattr__(name: str):
+    # `app:app` for gunicorn and `flask --app`, built on first access rather than at import
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["app", "create_app"]
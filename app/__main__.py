@@ -0,0 +1,7 @@
+import os
+
+from .factory import create_app
+
+if __name__ == "__main__":
+    port = int(os.getenv("PORT", "7070"))
+    create_app().run(host="0.0.0.0", port=port)
@@ -0,0 +1,573 @@
+# api.py
+"""
+Versioned JSON API under /api/v1.
+
+Every model is exposed as a collection with the same verbs:
+
+    GET    /api/v1/<resource>?limit=&after=&fields=&<filter>=   keyset-paginated list
+    POST   /api/v1/<resource>                                  create
+    GET    /api/v1/<resource>/<id>?fields=                     fetch one
+    PATCH  /api/v1/<resource>/<id>                             update some fields
+    DELETE /api/v1/<resource>/<id>                             delete
+
+Lists are ordered by id and continue from ``after`` (the ``next`` value of the
+previous page), so later pages cost the same as the first. GET responses carry
+an ETag and answer a matching If-None-Match with 304; PATCH and DELETE honour
+If-Match so a script cannot overwrite a row it has not seen.
+
+Requests authenticate with the browser session or HTTP Basic credentials.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import date, datetime
+from decimal import Decimal
+from typing import NamedTuple
+
+from flask import Blueprint, Response, g, jsonify, request, stream_with_context, url_for
+from flask_login import current_user
+from sqlalchemy import select
+
+from . import changes, households, recurrence, reports, search, transfers, upcoming
+from .auth import authenticate, login_retry_after, record_login
+from .extensions import db, login_manager
+from .forms import parse_amount
+from .models import Account, Bill, Income, Month, RecurringBill
+
+bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _text(value):
+    if not isinstance(value, str):
+        raise ValueError("expected a string")
+    return value.strip()
+
+
+def _integer(value):
+    if isinstance(value, bool):
+        raise ValueError("expected an integer")
+    return int(value)
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ("1", "true", "yes", "0", "false", "no"):
+        return value.lower() in ("1", "true", "yes")
+    raise ValueError("expected true or false")
+
+
+def _date(value):
+    return None if value in (None, "") else date.fromisoformat(value)
+
+
+def _choice(*options):
+    def parse(value):
+        if value not in options:
+            raise ValueError(f"expected one of {', '.join(options)}")
+        return value
+
+    return parse
+
+
+def _amount(value):
+    if isinstance(value, bool):
+        raise ValueError("expected an amount")
+    return parse_amount(value)
+
+
+class Resource(NamedTuple):
+    model: type
+    fields: tuple[str, ...]
+    # Writable field -> parser for the JSON value
+    writable: dict[str, Callable]
+    required: tuple[str, ...]
+    # Query string filter -> parser
+    filters: dict[str, Callable]
+    # Foreign key that must point at an existing row, and the model it points to
+    parent: tuple[str, type] | None = None
+    # Called with the row before it is saved; raises ValueError when the values do not fit together
+    check: Callable | None = None
+    # Called with a created or updated row before it is saved, to keep rows that follow it in step
+    sync: Callable | None = None
+    # Called with the row before it is deleted
+    remove: Callable | None = None
+
+
+RESOURCES = {
+    "months": Resource(
+        Month,
+        fields=("id", "name", "archived", "created_at", "total_bills", "total_incomes", "remainder"),
+        # Archiving moves rows into a snapshot, so it goes through the archive and restore routes
+        writable={"name": _text},
+        required=("name",),
+        filters={"archived": _boolean},
+    ),
+    "accounts": Resource(
+        Account,
+        fields=(
+            "id",
+            "month_id",
+            "name",
+            "pos_x",
+            "pos_y",
+            "width",
+            "height",
+            "created_at",
+            "total_bills",
+            "total_incomes",
+            "remainder",
+        ),
+        writable={
+            "month_id": _integer,
+            "name": _text,
+            "pos_x": _integer,
+            "pos_y": _integer,
+            "width": _integer,
+            "height": _integer,
+        },
+        required=("month_id", "name"),
+        filters={"month_id": _integer},
+        parent=("month_id", Month),
+        remove=transfers.remove_account_transfers,
+    ),
+    "bills": Resource(
+        Bill,
+        fields=(
+            "id",
+            "account_id",
+            "linked_income_id",
+            "recurring_bill_id",
+            "name",
+            "amount",
+            "due_date",
+            "category",
+            "is_paid",
+            "owner",
+            "created_at",
+        ),
+        writable={
+            "account_id": _integer,
+            "name": _text,
+            "amount": _amount,
+            "due_date": _date,
+            "category": _text,
+            "is_paid": _boolean,
+            "owner": _text,
+        },
+        required=("account_id", "name", "amount"),
+        filters={"account_id": _integer, "is_paid": _boolean, "recurring_bill_id": _integer},
+        parent=("account_id", Account),
+        # A transfer's income follows its bill, as in the month page's forms
+        sync=transfers.refresh_transfer,
+        remove=transfers.remove_transfer,
+    ),
+    "incomes": Resource(
+        Income,
+        fields=("id", "account_id", "name", "amount", "contributor", "created_at"),
+        writable={"account_id": _integer, "name": _text, "amount": _amount, "contributor": _text},
+        required=("account_id", "name", "amount"),
+        filters={"account_id": _integer},
+        parent=("account_id", Account),
+    ),
+    "recurring_bills": Resource(
+        RecurringBill,
+        fields=(
+            "id",
+            "name",
+            "amount",
+            "category",
+            "owner",
+            "account_name",
+            "frequency",
+            "interval",
+            "start_date",
+            "end_date",
+            "weekday",
+            "week_of_month",
+            "created_at",
+        ),
+        writable={
+            "name": _text,
+            "amount": _amount,
+            "category": _text,
+            "owner": _text,
+            "account_name": _text,
+            "frequency": _choice(*recurrence.FREQUENCIES),
+            "interval": _integer,
+            "start_date": _date,
+            "end_date": _date,
+            "weekday": _integer,
+            "week_of_month": _integer,
+        },
+        required=("name", "amount", "account_name", "start_date"),
+        filters={"frequency": _text},
+        check=recurrence.validate,
+    ),
+}
+
+
+@login_manager.request_loader
+def _load_user_from_basic_auth(req):
+    """Let scripts call the API with HTTP Basic credentials instead of a session cookie."""
+    auth = req.authorization
+    if req.blueprint != bp.name or auth is None or auth.type != "basic":
+        return None
+    retry_after = login_retry_after(auth.username)
+    if retry_after:
+        g.login_retry_after = retry_after
+        return None
+    user = authenticate(auth.username, auth.password or "")
+    record_login(auth.username, success=user is not None)
+    return user
+
+
+@bp.before_request
+def _require_login():
+    if not current_user.is_authenticated:
+        retry_after = g.get("login_retry_after")
+        if retry_after:
+            response = jsonify({"error": "Too many failed sign in attempts"})
+            response.status_code = 429
+            response.headers["Retry-After"] = str(retry_after)
+            return response
+        response = jsonify({"error": "Authentication required"})
+        response.status_code = 401
+        response.headers["WWW-Authenticate"] = 'Basic realm="finances"'
+        return response
+    return None
+
+
+@bp.errorhandler(ApiError)
+def _api_error(exc: ApiError):
+    return jsonify({"error": exc.message}), exc.status
+
+
+@bp.errorhandler(404)
+def _not_found(exc):
+    return jsonify({"error": "Not found"}), 404
+
+
+def _resource(name: str) -> Resource:
+    if name not in RESOURCES:
+        raise ApiError(404, f"Unknown resource {name!r}")
+    return RESOURCES[name]
+
+
+def _jsonable(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _selected_fields(resource: Resource) -> tuple[str, ...]:
+    raw = request.args.get("fields")
+    if not raw:
+        return resource.fields
+    wanted = tuple(f.strip() for f in raw.split(",") if f.strip())
+    unknown = [f for f in wanted if f not in resource.fields]
+    if unknown:
+        raise ApiError(400, f"Unknown fields: {', '.join(unknown)}")
+    return wanted
+
+
+def _dump(obj, fields: tuple[str, ...]) -> dict:
+    return {name: _jsonable(getattr(obj, name)) for name in fields}
+
+
+def _tagged(payload):
+    response = jsonify(payload)
+    response.add_etag()
+    return response
+
+
+def _conditional(payload):
+    """Tag a GET response with an ETag of its body and answer If-None-Match with 304."""
+    return _tagged(payload).make_conditional(request)
+
+
+def _check_if_match(resource: Resource, obj) -> None:
+    if not request.if_match:
+        return
+    etag, _ = _tagged({"data": _dump(obj, resource.fields)}).get_etag()
+    if not request.if_match.contains(etag):
+        raise ApiError(412, "The resource has changed since it was fetched")
+
+
+def _arg(name: str, parser: Callable, default=None):
+    raw = request.args.get(name)
+    if raw is None:
+        return default
+    try:
+        return parser(raw)
+    except ValueError:
+        raise ApiError(400, f"Invalid value for {name!r}") from None
+
+
+def _payload(resource: Resource, creating: bool) -> dict:
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise ApiError(400, "Expected a JSON object")
+    unknown = [key for key in data if key not in resource.writable]
+    if unknown:
+        raise ApiError(400, f"Fields cannot be written: {', '.join(unknown)}")
+    if creating:
+        missing = [key for key in resource.required if data.get(key) in (None, "")]
+        if missing:
+            raise ApiError(400, f"Missing required fields: {', '.join(missing)}")
+
+    values = {}
+    columns = resource.model.__table__.c
+    for key, raw in data.items():
+        try:
+            value = resource.writable[key](raw) if raw is not None else None
+        except (TypeError, ValueError):
+            raise ApiError(400, f"Invalid value for {key!r}") from None
+        if value is None and not columns[key].nullable:
+            raise ApiError(400, f"{key!r} cannot be null")
+        length = getattr(columns[key].type, "length", None)
+        if isinstance(value, str) and length and len(value) > length:
+            raise ApiError(400, f"{key!r} is longer than {length} characters")
+        values[key] = value
+
+    if resource.parent and resource.parent[0] in values:
+        fk, parent_model = resource.parent
+        parent = select(parent_model.id, Month.archived).where(parent_model.id == values[fk])
+        found = db.session.execute(households.scope(parent, parent_model)).first()
+        if found is None:
+            raise ApiError(400, f"No {parent_model.__name__.lower()} with id {values[fk]}")
+        # An archived month's rows live in its snapshot, and restoring would merge these in unseen
+        if found.archived:
+            raise ApiError(409, "That month is archived. Restore it to make changes.")
+    return values
+
+
+def _check(resource: Resource, obj) -> None:
+    if resource.check is None:
+        return
+    try:
+        resource.check(obj)
+    except ValueError as exc:
+        db.session.rollback()
+        raise ApiError(400, str(exc)) from None
+
+
+@bp.get("/reports/<dimension>")
+def report(dimension):
+    """Per-month totals for one dimension plus year-over-year comparisons; ``months=1,2`` narrows both."""
+    if dimension not in reports.DIMENSIONS:
+        raise ApiError(404, f"Unknown report {dimension!r}")
+    month_ids = _arg("months", lambda raw: [int(part) for part in raw.split(",") if part.strip()])
+    owner = households.owned_months()
+    trend = reports.trend(dimension, month_ids, owner)
+    comparisons = reports.year_over_year(dimension, month_ids, owner)
+    return _conditional(
+        {
+            "dimension": dimension,
+            "months": [
+                {"id": m.id, "name": m.name, "period": f"{m.period[0]:04d}-{m.period[1]:02d}"} for m in trend.months
+            ],
+            "series": {key: [_jsonable(v) for v in values] for key, values in trend.series.items()},
+            "totals": [_jsonable(v) for v in trend.totals],
+            "year_over_year": [
+                {
+                    "month_id": c.month.id,
+                    "previous_month_id": c.previous.id,
+                    "total": _jsonable(c.total[0]),
+                    "previous_total": _jsonable(c.total[1]),
+                    "change": _jsonable(c.change),
+                    "by_key": {
+                        k: {"total": _jsonable(a), "previous_total": _jsonable(b)} for k, (a, b) in c.by_key.items()
+                    },
+                }
+                for c in comparisons
+            ],
+        }
+    )
+
+
+def _due_window() -> tuple[date, date, date | None]:
+    """Today, the window's last day and its first (None to include every overdue bill)."""
+    today, until = upcoming.window(_arg("days", int, upcoming.DEFAULT_DAYS))
+    until = _arg("until", date.fromisoformat, until)
+    since = _arg("since", date.fromisoformat, None if _arg("overdue", _boolean, True) else today)
+    return today, until, since
+
+
+@bp.get("/due")
+def due_items():
+    """Unpaid bills due by ``until`` (default ``days`` from today), overdue ones first unless ``overdue=false``."""
+    today, until, since = _due_window()
+    bills = upcoming.due_bills(until, since, limit=upcoming.MAX_ROWS, owner=households.owned_months())
+    return _conditional(
+        {
+            "today": today.isoformat(),
+            "until": until.isoformat(),
+            "data": [
+                {**{k: _jsonable(v) for k, v in b._asdict().items()}, "overdue": b.due_date < today} for b in bills
+            ],
+            "truncated": len(bills) >= upcoming.MAX_ROWS,
+        }
+    )
+
+
+@bp.get("/due.ics")
+def due_calendar():
+    """The same bills as an iCalendar feed for calendar apps, streamed as rows are read."""
+    _, until, since = _due_window()
+    body = stream_with_context(
+        upcoming.calendar(until, since, host=request.host.split(":")[0], owner=households.owned_months())
+    )
+    return Response(body, mimetype="text/calendar", headers={"Content-Disposition": 'inline; filename="bills-due.ics"'})
+
+
+@bp.get("/search")
+def search_items():
+    """Bills and incomes matching ``q`` in every month, best matches first, paged with ``offset``."""
+    query = _arg("q", str, "")
+    limit = min(max(_arg("limit", int, search.DEFAULT_LIMIT), 1), search.MAX_LIMIT)
+    offset = max(_arg("offset", int, 0), 0)
+    try:
+        page = search.search(query, limit=limit, offset=offset, owner=households.owned_months())
+    except ValueError as exc:
+        raise ApiError(400, str(exc)) from None
+    payload = {
+        "data": [{k: _jsonable(v) for k, v in hit._asdict().items()} for hit in page.hits],
+        "next": page.next_offset,
+    }
+    if page.next_offset is not None:
+        args = {**request.args.to_dict(), "offset": page.next_offset}
+        payload["links"] = {"next": url_for("api.search_items", **args)}
+    return _conditional(payload)
+
+
+@bp.get("/changes")
+def change_feed():
+    """
+    Months, accounts, bills and incomes changed after version ``since``, oldest change
+    first, each with its current fields; deleted items come back as tombstones.
+    """
+    since = max(_arg("since", int, 0), 0)
+    limit = min(max(_arg("limit", int, DEFAULT_LIMIT), 1), MAX_LIMIT)
+    entries = changes.since(since, limit + 1)
+    page, more = entries[:limit], len(entries) > limit
+
+    # One query per resource for the rows that still exist
+    live = {}
+    for name in {e.resource for e in page if not e.deleted}:
+        model = RESOURCES[name].model
+        ids = [e.item_id for e in page if e.resource == name and not e.deleted]
+        for obj in db.session.scalars(households.scope(select(model).where(model.id.in_(ids)), model)):
+            live[(name, obj.id)] = obj
+
+    data = []
+    for e in page:
+        obj = live.get((e.resource, e.item_id))
+        data.append(
+            {
+                "version": e.version,
+                "resource": e.resource,
+                "id": e.item_id,
+                "month_id": e.month_id,
+                # Also a tombstone when the row went after this change was read
+                "deleted": obj is None,
+                "data": _dump(obj, RESOURCES[e.resource].fields) if obj is not None else None,
+            }
+        )
+    # Pass back as ``since``; it stays put when nothing has changed
+    version = page[-1].version if page else since
+    payload = {"data": data, "version": version, "more": more}
+    if more:
+        args = {**request.args.to_dict(), "since": version}
+        payload["links"] = {"next": url_for("api.change_feed", **args)}
+    return _conditional(payload)
+
+
+@bp.get("/<resource_name>")
+def list_items(resource_name):
+    resource = _resource(resource_name)
+    fields = _selected_fields(resource)
+    limit = min(max(_arg("limit", int, DEFAULT_LIMIT), 1), MAX_LIMIT)
+    after = _arg("after", int)
+
+    model = resource.model
+    query = households.scope(db.select(model), model).order_by(model.id).limit(limit + 1)
+    if after is not None:
+        query = query.where(model.id > after)
+    for name, parser in resource.filters.items():
+        value = _arg(name, parser)
+        if value is not None:
+            query = query.where(getattr(model, name) == value)
+
+    rows = db.session.scalars(query).all()
+    page, more = rows[:limit], len(rows) > limit
+    next_after = page[-1].id if more else None
+    payload = {"data": [_dump(obj, fields) for obj in page], "next": next_after}
+    if more:
+        args = {**request.args.to_dict(), "after": next_after}
+        payload["links"] = {"next": url_for("api.list_items", resource_name=resource_name, **args)}
+    return _conditional(payload)
+
+
+@bp.get("/<resource_name>/<int:item_id>")
+def get_item(resource_name, item_id):
+    resource = _resource(resource_name)
+    fields = _selected_fields(resource)
+    obj = households.get_or_404(resource.model, item_id)
+    return _conditional({"data": _dump(obj, fields)})
+
+
+@bp.post("/<resource_name>")
+def create_item(resource_name):
+    resource = _resource(resource_name)
+    obj = resource.model(**_payload(resource, creating=True))
+    if "household_id" in resource.model.__table__.c:
+        obj.household_id = households.current_household_id()
+    _check(resource, obj)
+    db.session.add(obj)
+    if resource.sync is not None:
+        resource.sync(obj)
+    db.session.commit()
+    response = _tagged({"data": _dump(obj, resource.fields)})
+    response.status_code = 201
+    response.headers["Location"] = url_for("api.get_item", resource_name=resource_name, item_id=obj.id)
+    return response
+
+
+@bp.patch("/<resource_name>/<int:item_id>")
+def update_item(resource_name, item_id):
+    resource = _resource(resource_name)
+    obj = households.get_or_404(resource.model, item_id)
+    _check_if_match(resource, obj)
+    for key, value in _payload(resource, creating=False).items():
+        setattr(obj, key, value)
+    _check(resource, obj)
+    if resource.sync is not None:
+        resource.sync(obj)
+    db.session.commit()
+    return _tagged({"data": _dump(obj, resource.fields)})
+
+
+@bp.delete("/<resource_name>/<int:item_id>")
+def delete_item(resource_name, item_id):
+    resource = _resource(resource_name)
+    obj = households.get_or_404(resource.model, item_id)
+    _check_if_match(resource, obj)
+    if resource.remove is not None:
+        resource.remove(obj)
+    db.session.delete(obj)
+    db.session.commit()
+    return "", 204
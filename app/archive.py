@@ -0,0 +1,145 @@
+# archive.py
+"""
+Cold storage for archived months.
+
+Archiving moves a month's accounts, bills and incomes out of the live tables into
+one ``month_snapshot`` row: zlib-compressed JSON with one field list per table and
+the rows as plain arrays. The ``month`` row stays behind with its cached totals,
+so listings and totals still work without reading the snapshot, while the live
+tables (and every query over them) only hold months still in use.
+
+An archived month is shown read-only from its snapshot. Restoring bulk inserts
+the rows again through the same path as duplication, so transfer links survive;
+the restored rows get new ids. Exports and reports cover live rows only, so
+restore a month to include it in them.
+"""
+
+from __future__ import annotations
+
+import json
+import zlib
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+from typing import NamedTuple
+
+from sqlalchemy import delete, select
+
+from .changes import record_months
+from .duplication import SourceRows, account_totals, insert_rows, load_source
+from .extensions import db
+from .models import Account, Bill, Income, Month, MonthSnapshot
+from .render_cache import bump_versions
+
+FORMAT = 1
+
+
+class ArchivedAccount(NamedTuple):
+    name: str
+    total_bills: Decimal
+    total_incomes: Decimal
+    bills: list
+    incomes: list
+
+    @property
+    def remainder(self) -> Decimal:
+        return self.total_incomes - self.total_bills
+
+
+def _value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _table(rows) -> dict:
+    fields = list(rows[0]._fields) if rows else []
+    return {"fields": fields, "rows": [[_value(v) for v in row] for row in rows]}
+
+
+def encode(source: SourceRows) -> bytes:
+    payload = {name: _table(getattr(source, name)) for name in ("accounts", "bills", "incomes")}
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return zlib.compress(data, 9)
+
+
+def _rows(name: str, table: dict) -> list:
+    if not table["fields"]:
+        return []
+    row_type = namedtuple(name, table["fields"])
+    rows = []
+    for values in table["rows"]:
+        row = row_type(*values)
+        if "amount" in table["fields"]:
+            row = row._replace(amount=Decimal(row.amount))
+        if "due_date" in table["fields"] and row.due_date:
+            row = row._replace(due_date=date.fromisoformat(row.due_date))
+        rows.append(row)
+    return rows
+
+
+def decode(payload: bytes) -> SourceRows:
+    tables = json.loads(zlib.decompress(payload))
+    accounts = _rows("Account", tables["accounts"])
+    bills = _rows("Bill", tables["bills"])
+    incomes = _rows("Income", tables["incomes"])
+    return SourceRows(accounts, bills, incomes, account_totals(bills, incomes))
+
+
+def archive_month(month: Month) -> MonthSnapshot:
+    """Move ``month``'s rows into a snapshot. Nothing is committed here."""
+    if month.archived and month.snapshot is not None:
+        raise ValueError(f"{month.name} is already archived.")
+    source = load_source(month.id)
+    snapshot = MonthSnapshot(
+        month_id=month.id,
+        format=FORMAT,
+        payload=encode(source),
+        row_count=len(source.accounts) + len(source.bills) + len(source.incomes),
+    )
+    db.session.add(snapshot)
+    month.archived = True
+
+    # Bulk deletes skip the balance hooks on purpose: the month keeps its totals. They skip
+    # the change journal too, so record the tombstones while the rows are still there
+    record_months([month.id], deleted=True)
+    account_ids = select(Account.id).where(Account.month_id == month.id).scalar_subquery()
+    db.session.execute(delete(Bill).where(Bill.account_id.in_(account_ids)))
+    db.session.execute(delete(Income).where(Income.account_id.in_(account_ids)))
+    db.session.execute(delete(Account).where(Account.month_id == month.id))
+    bump_versions([month.id])
+    # The deletes bypassed the session, so drop any accounts it still holds for this month
+    db.session.expire(month, ["accounts"])
+    return snapshot
+
+
+def restore_month(month: Month) -> None:
+    """Put an archived month's rows back in the live tables. Nothing is committed here."""
+    snapshot = month.snapshot
+    if snapshot is None:
+        raise ValueError(f"{month.name} has no archived snapshot.")
+    insert_rows(decode(snapshot.payload), month.id, keep_schedules=True)
+    month.snapshot = None
+    month.archived = False
+    bump_versions([month.id])
+    db.session.expire(month, ["accounts"])
+
+
+def archived_accounts(month: Month) -> list[ArchivedAccount]:
+    """The snapshot's accounts with their bills and incomes, for the read-only page."""
+    source = decode(month.snapshot.payload)
+    accounts = []
+    for acc in source.accounts:
+        bills_total, incomes_total = source.totals[acc.id]
+        accounts.append(
+            ArchivedAccount(
+                acc.name,
+                bills_total,
+                incomes_total,
+                [b for b in source.bills if b.account_id == acc.id],
+                [inc for inc in source.incomes if inc.account_id == acc.id],
+            )
+        )
+    return accounts
@@ -0,0 +1,251 @@
+# auth.py
+"""
+Authentication: the session user loader, password hashing and login throttling.
+
+* ``load_user`` keeps the signed-in user's columns in a short-lived in-process
+  cache and attaches them to the request's session without a query. Updating or
+  deleting a user evicts it in the worker that made the change; other workers see
+  the change once USER_CACHE_TTL expires.
+* Passwords are hashed with PASSWORD_HASH_METHOD. A successful login whose stored
+  hash uses other parameters is rehashed on the spot, so raising the cost takes
+  effect as people sign in.
+* Verified HTTP Basic credentials are remembered (as an HMAC, never the password)
+  for the same TTL, so API scripts do not pay for a password hash on every call.
+* Failed logins are counted per client address and per username in a sliding
+  window; once LOGIN_MAX_ATTEMPTS is reached further attempts are refused without
+  hashing anything until the window moves on. Counts are kept per worker.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict, deque
+
+from flask import Flask, current_app, has_app_context, request
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from werkzeug.security import generate_password_hash
+
+from .extensions import db, login_manager
+from .models import User
+
+DEFAULT_HASH_METHOD = "scrypt"
+
+
+class TTLCache:
+    """A small LRU mapping whose entries expire ``ttl`` seconds after they were set."""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def evict(self, key=None, value=None) -> None:
+        """Drop ``key``, and every entry holding ``value`` when one is given."""
+        with self._lock:
+            self._data.pop(key, None)
+            if value is not None:
+                for k in [k for k, (_, v) in self._data.items() if v == value]:
+                    del self._data[k]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class RateLimiter:
+    """Sliding window counter of failures per key."""
+
+    # Forget idle keys once this many are tracked
+    PRUNE_AT = 10_000
+
+    def __init__(self, max_attempts: int, window: float):
+        self.max_attempts = max_attempts
+        self.window = window
+        self._hits: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, key: str, now: float) -> deque | None:
+        hits = self._hits.get(key)
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        return hits
+
+    def retry_after(self, *keys: str) -> int:
+        """Seconds until every key is below the limit again; 0 when none is blocked."""
+        now = time.monotonic()
+        wait = 0.0
+        with self._lock:
+            for key in keys:
+                hits = self._recent(key, now)
+                if hits and len(hits) >= self.max_attempts:
+                    wait = max(wait, hits[0] + self.window - now)
+        return int(wait) + 1 if wait else 0
+
+    def hit(self, *keys: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                self._hits.setdefault(key, deque()).append(now)
+            if len(self._hits) > self.PRUNE_AT:
+                for key in [k for k in self._hits if not self._recent(k, now)]:
+                    del self._hits[key]
+
+    def reset(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._hits.pop(key, None)
+
+
+def init_app(app: Flask) -> None:
+    ttl = app.config.get("USER_CACHE_TTL", 60)
+    attempts = app.config.get("LOGIN_MAX_ATTEMPTS", 10)
+    app.extensions["user_cache"] = TTLCache(ttl) if ttl else None
+    app.extensions["credential_cache"] = TTLCache(ttl) if ttl else None
+    app.extensions["login_limiter"] = (
+        RateLimiter(attempts, app.config.get("LOGIN_WINDOW_SECONDS", 300)) if attempts else None
+    )
+
+
+# Password hashing
+
+
+def hash_method() -> str:
+    if has_app_context():
+        return current_app.config.get("PASSWORD_HASH_METHOD") or DEFAULT_HASH_METHOD
+    return DEFAULT_HASH_METHOD
+
+
+def hash_password(password: str) -> str:
+    return generate_password_hash(password, method=hash_method())
+
+
+@functools.lru_cache(maxsize=8)
+def _method_prefix(method: str) -> str:
+    # Werkzeug fills in default parameters ("scrypt" -> "scrypt:32768:8:1"), so ask it for the full form
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
+def needs_rehash(password_hash: str) -> bool:
+    return password_hash.split("$", 1)[0] != _method_prefix(hash_method())
+
+
+def verify_password(user: User, password: str) -> bool:
+    """Check ``password`` and upgrade the stored hash when the configured method has changed."""
+    if not user.check_password(password):
+        return False
+    if needs_rehash(user.password_hash):
+        user.set_password(password)
+        # Committed here so the upgrade also sticks on requests that never commit
+        db.session.commit()
+    return True
+
+
+# Loading users
+
+
+def _columns(user: User) -> dict:
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    try:
+        key = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    cache = current_app.extensions.get("user_cache")
+    values = cache.get(key) if cache is not None else None
+    if values is not None:
+        cached = User(**values)
+        make_transient_to_detached(cached)
+        # load=False attaches the cached state as-is instead of selecting the row again
+        return db.session.merge(cached, load=False)
+    user = db.session.get(User, key)
+    if user is not None and cache is not None:
+        cache.set(key, _columns(user))
+    return user
+
+
+def _credential_key(username: str, password: str) -> str:
+    secret = current_app.config["SECRET_KEY"].encode()
+    return hmac.new(secret, f"{username}\0{password}".encode(), hashlib.sha256).hexdigest()
+
+
+def authenticate(username: str, password: str) -> User | None:
+    """Return the user for a username and password, reusing recent successful checks."""
+    cache = current_app.extensions.get("credential_cache")
+    key = _credential_key(username, password) if cache is not None else None
+    user_id = cache.get(key) if cache is not None else None
+    if user_id is not None:
+        user = load_user(user_id)
+        if user is not None:
+            return user
+    user = User.query.filter_by(username=username).first()
+    if user is None or not verify_password(user, password):
+        return None
+    if cache is not None:
+        cache.set(key, user.id)
+    return user
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _evict_user(mapper, connection, target):
+    if not has_app_context():
+        return
+    user_cache = current_app.extensions.get("user_cache")
+    if user_cache is not None:
+        user_cache.evict(target.id)
+    credential_cache = current_app.extensions.get("credential_cache")
+    if credential_cache is not None:
+        credential_cache.evict(value=target.id)
+
+
+# Throttling
+
+
+def _limit_keys(username: str) -> tuple[str, str]:
+    return f"addr:{request.remote_addr}", f"user:{(username or '').strip().lower()}"
+
+
+def login_retry_after(username: str) -> int:
+    """Seconds the caller must wait before trying ``username`` again; 0 when allowed."""
+    limiter = current_app.extensions.get("login_limiter")
+    return limiter.retry_after(*_limit_keys(username)) if limiter is not None else 0
+
+
+def record_login(username: str, success: bool) -> None:
+    limiter = current_app.extensions.get("login_limiter")
+    if limiter is None:
+        return
+    keys = _limit_keys(username)
+    if success:
+        # Only the username's count: one good login should not unlock guesses from the same address
+        limiter.reset(keys[1])
+    else:
+        limiter.hit(*keys)
@@ -0,0 +1,231 @@
+# balances.py
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
+from decimal import Decimal
+from typing import NamedTuple
+
+from sqlalchemy import bindparam, event, inspect, select, update
+from sqlalchemy.orm.base import NO_VALUE
+
+from .extensions import db
+from .models import Account, Bill, Income, Month, MonthSnapshot
+from .totals import ZERO, AccountTotals, account_totals
+
+
+class Discrepancy(NamedTuple):
+    kind: str
+    id: int
+    cached: AccountTotals
+    actual: AccountTotals
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else ZERO
+
+
+def previous_value(obj, attr: str):
+    """Return the value ``attr`` had when ``obj`` was last loaded or flushed."""
+    history = inspect(obj).attrs[attr].load_history()
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None
+
+
+def loaded_parent(session, obj, relation: str, fk: str, model):
+    """Resolve a many-to-one parent without triggering an autoflush."""
+    loaded = inspect(obj).attrs[relation].loaded_value
+    key = getattr(obj, fk)
+    if loaded is not NO_VALUE and loaded is not None:
+        state = inspect(loaded)
+        # Rows inserted by the flush being handled have their ids but no identity yet
+        identity = state.identity or tuple(state.mapper.primary_key_from_instance(loaded))
+        # A foreign key set directly wins over a parent loaded before it changed
+        if key is None or identity == (key,):
+            return loaded
+    return session.get(model, key) if key is not None else None
+
+
+def _add(obj, bills: Decimal, incomes: Decimal) -> None:
+    """
+    Add to the cached totals of an account or month. Rows already in the database
+    get a SQL increment, so a concurrent writer's change to the same totals is kept
+    rather than overwritten by a value read earlier; the flush expires them after.
+    """
+    model = type(obj)
+    if inspect(obj).persistent:
+        obj.total_bills = model.total_bills + bills
+        obj.total_incomes = model.total_incomes + incomes
+    else:
+        obj.total_bills = _money(obj.total_bills) + bills
+        obj.total_incomes = _money(obj.total_incomes) + incomes
+
+
+@event.listens_for(db.session, "before_flush")
+def _maintain_balances(session, flush_context, instances):
+    """
+    Fold every pending bill and income change into the cached account and month totals.
+
+    Runs before each flush so the adjusted totals are written in the same transaction
+    as the rows that caused them. Deletes of whole accounts or months cascade to their
+    bills and incomes, which are handled row by row like any other delete. An account
+    moved to another month takes its totals with it.
+    """
+    deltas: dict[Account, list[Decimal]] = defaultdict(lambda: [ZERO, ZERO])
+    month_deltas: dict[Month, list[Decimal]] = defaultdict(lambda: [ZERO, ZERO])
+
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, (Bill, Income)):
+                slot = 0 if isinstance(obj, Bill) else 1
+                account = loaded_parent(session, obj, "account", "account_id", Account)
+                if account is not None:
+                    deltas[account][slot] += _money(obj.amount)
+
+        for obj in session.deleted:
+            if isinstance(obj, (Bill, Income)):
+                slot = 0 if isinstance(obj, Bill) else 1
+                account_id = previous_value(obj, "account_id")
+                account = session.get(Account, account_id) if account_id is not None else None
+                if account is not None:
+                    deltas[account][slot] -= _money(previous_value(obj, "amount"))
+
+        for obj in session.dirty:
+            if isinstance(obj, Account) and obj not in session.deleted:
+                _move_account(session, obj, month_deltas)
+            if not isinstance(obj, (Bill, Income)) or not session.is_modified(obj):
+                continue
+            state = inspect(obj)
+            if not (state.attrs.amount.history.has_changes() or state.attrs.account_id.history.has_changes()):
+                continue
+            slot = 0 if isinstance(obj, Bill) else 1
+            old_account_id = previous_value(obj, "account_id")
+            old_account = session.get(Account, old_account_id) if old_account_id is not None else None
+            if old_account is not None:
+                deltas[old_account][slot] -= _money(previous_value(obj, "amount"))
+            new_account = loaded_parent(session, obj, "account", "account_id", Account)
+            if new_account is not None:
+                deltas[new_account][slot] += _money(obj.amount)
+
+        for account, (bills, incomes) in deltas.items():
+            if not bills and not incomes:
+                continue
+            if account not in session.deleted:
+                _add(account, bills, incomes)
+            month = loaded_parent(session, account, "month", "month_id", Month)
+            if month is not None:
+                month_deltas[month][0] += bills
+                month_deltas[month][1] += incomes
+
+        for month, (bills, incomes) in month_deltas.items():
+            if (bills or incomes) and month not in session.deleted:
+                _add(month, bills, incomes)
+
+
+def _move_account(session, account: Account, month_deltas) -> None:
+    """Move a persisted account's totals from its old month to its new one."""
+    history = inspect(account).attrs.month_id.history
+    if not history.has_changes():
+        return
+    old_month_id = previous_value(account, "month_id")
+    if old_month_id == account.month_id:
+        return
+    # Read at flush time, without this flush's own bill and income changes, which go to the new month
+    bills, incomes = session.execute(
+        select(Account.total_bills, Account.total_incomes).where(Account.id == account.id)
+    ).one()
+    old_month = session.get(Month, old_month_id) if old_month_id is not None else None
+    new_month = session.get(Month, account.month_id) if account.month_id is not None else None
+    for month, sign in ((old_month, -1), (new_month, 1)):
+        if month is not None:
+            month_deltas[month][0] += sign * _money(bills)
+            month_deltas[month][1] += sign * _money(incomes)
+
+
+def add_bulk(by_account: Mapping[int, Sequence[Decimal]], by_month: Mapping[int, Sequence[Decimal]]) -> None:
+    """
+    Add (bills, incomes) amounts to the cached totals of accounts and months whose
+    rows were bulk inserted, which the flush hooks above never see, then invalidate
+    those months' pages and journal the changed rows. Nothing is committed here.
+    """
+    from .changes import record
+    from .render_cache import bump_versions
+
+    for model, added in ((Account, by_account), (Month, by_month)):
+        if not added:
+            continue
+        table = model.__table__
+        db.session.execute(
+            update(table)
+            .where(table.c.id == bindparam("key"))
+            .values(
+                total_bills=table.c.total_bills + bindparam("bills"),
+                total_incomes=table.c.total_incomes + bindparam("incomes"),
+            ),
+            [{"key": key, "bills": bills, "incomes": incomes} for key, (bills, incomes) in added.items()],
+        )
+        # One executemany for every row, so rows the session holds are expired by hand
+        for key in added:
+            obj = db.session.identity_map.get(db.session.identity_key(model, key))
+            if obj is not None:
+                db.session.expire(obj, ["total_bills", "total_incomes"])
+    bump_versions(by_month)
+    record(Account, by_account)
+    record(Month, by_month)
+
+
+def find_discrepancies() -> list[Discrepancy]:
+    """
+    Compare the cached totals on every account and month with their rows. Archived
+    months keep their totals while their rows sit in a snapshot, so they are skipped.
+    """
+    actual = account_totals()
+    month_actual: dict[int, list[Decimal]] = defaultdict(lambda: [ZERO, ZERO])
+    found = []
+
+    rows = db.session.execute(db.select(Account.id, Account.month_id, Account.total_bills, Account.total_incomes))
+    for account_id, month_id, cached_bills, cached_incomes in rows:
+        real = actual.get(account_id, AccountTotals(ZERO, ZERO))
+        month_actual[month_id][0] += real.total_bills
+        month_actual[month_id][1] += real.total_incomes
+        cached = AccountTotals(_money(cached_bills), _money(cached_incomes))
+        if cached != real:
+            found.append(Discrepancy("account", account_id, cached, real))
+
+    archived = db.select(MonthSnapshot.month_id).where(MonthSnapshot.month_id == Month.id).exists()
+    rows = db.session.execute(db.select(Month.id, Month.total_bills, Month.total_incomes).where(~archived))
+    for month_id, cached_bills, cached_incomes in rows:
+        real = AccountTotals(*month_actual.get(month_id, (ZERO, ZERO)))
+        cached = AccountTotals(_money(cached_bills), _money(cached_incomes))
+        if cached != real:
+            found.append(Discrepancy("month", month_id, cached, real))
+    return found
+
+
+def rebuild() -> list[Discrepancy]:
+    """Overwrite every cached total that disagrees with its rows and return what changed."""
+    found = find_discrepancies()
+    for model, kind in ((Account, "account"), (Month, "month")):
+        params = [
+            {"id": d.id, "total_bills": d.actual.total_bills, "total_incomes": d.actual.total_incomes}
+            for d in found
+            if d.kind == kind
+        ]
+        if params:
+            db.session.execute(update(model), params)
+
+    # Bulk updates skip the flush hooks, so invalidate the affected month pages and journal the rows here
+    from .changes import record
+    from .render_cache import bump_versions
+
+    month_ids = {d.id for d in found if d.kind == "month"}
+    account_ids = [d.id for d in found if d.kind == "account"]
+    if account_ids:
+        month_ids.update(db.session.scalars(db.select(Account.month_id).where(Account.id.in_(account_ids))))
+    bump_versions(month_ids)
+    record(Account, account_ids)
+    record(Month, [d.id for d in found if d.kind == "month"])
+    return found
@@ -0,0 +1,177 @@
+# changes.py
+"""
+The change journal behind the /api/v1/changes delta feed.
+
+``change_log`` holds one row per month, account, bill and income: its latest
+change, numbered by ``version``, a key that only ever grows. Every flush that
+adds, edits or deletes one of them replaces its row with a new version in the same
+transaction, and a delete leaves a tombstone. Bulk statements that bypass the
+session call ``record`` or ``record_months`` themselves, as they call
+``render_cache.bump_versions``. A client that keeps the last version it saw asks
+for what came after it and gets each changed item once, however often it changed,
+so a sync costs O(changes) rather than O(data), and the journal never grows
+beyond one row per item.
+
+The migration that created the journal recorded every existing row, so ``since=0``
+returns a full copy.
+
+The feed relies on versions following commit order within a household: a
+client that has seen version N must never have a lower version of its household
+committed after it. SQLite lets one writer in at a time, so this holds there
+already. PostgreSQL allows concurrent writers, so before a transaction writes a
+household's journal rows it takes that household's advisory lock and holds it
+until it commits. Writers to the same household's journal commit one after
+another, in version order, while other households carry on alongside them.
+Other server databases are not supported.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from sqlalchemy import Connection, delete, event, func, insert, inspect, literal, select, text
+
+from . import households
+from .balances import loaded_parent
+from .extensions import db
+from .models import Account, Bill, Change, Income, Month
+
+# Journaled models and the API resource each is served as
+JOURNALED = {Month: "months", Account: "accounts", Bill: "bills", Income: "incomes"}
+
+_COLUMNS = ("resource", "item_id", "month_id", "household_id", "deleted", "changed_at")
+
+# Arbitrary key for the PostgreSQL advisory locks that keep versions in commit order;
+# each household's lock pairs it with the household id (0 for months without one)
+ADVISORY_LOCK_KEY = 7_070_002
+
+
+def _locking(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+def _lock(conn: Connection, household_ids: Iterable[int | None]) -> None:
+    """Hold these households' journals until this transaction ends, so their versions commit in order."""
+    if not _locking(conn):
+        return
+    # Always taken in the same order, so two writers to the same households cannot deadlock
+    for household_id in sorted({household_id or 0 for household_id in household_ids}):
+        conn.execute(
+            text("SELECT pg_advisory_xact_lock(:key, :household)"),
+            {"key": ADVISORY_LOCK_KEY, "household": household_id},
+        )
+
+
+def _connection() -> Connection:
+    return db.session.connection(bind_arguments={"mapper": inspect(Change)})
+
+
+def _owners(model):
+    """Select ``item_id``, ``month_id`` and ``household_id`` of ``model`` rows."""
+    if model is Month:
+        return select(Month.id.label("item_id"), Month.id.label("month_id"), Month.household_id)
+    stmt = select(model.id.label("item_id"), Account.month_id, Month.household_id).select_from(model)
+    if model is not Account:
+        stmt = stmt.join(Account, model.account_id == Account.id)
+    return stmt.join(Month, Account.month_id == Month.id)
+
+
+def _replace(conn: Connection, resource: str, rows) -> None:
+    """Swap the journal rows of the items selected by ``rows`` for new versions."""
+    rows = rows.subquery()
+    if _locking(conn):
+        _lock(conn, conn.scalars(select(rows.c.household_id).distinct()))
+    table = Change.__table__
+    conn.execute(delete(table).where(table.c.resource == resource, table.c.item_id.in_(select(rows.c.item_id))))
+    values = select(
+        literal(resource),
+        rows.c.item_id,
+        rows.c.month_id,
+        rows.c.household_id,
+        rows.c.deleted,
+        func.current_timestamp(),
+    )
+    conn.execute(insert(table).from_select(_COLUMNS, values))
+
+
+def record(model, ids: Iterable[int], deleted: bool = False) -> None:
+    """
+    Journal ``model`` rows changed by a bulk statement. Deletes are recorded with
+    ``deleted=True`` before the statement runs, while the rows can still be read.
+    """
+    ids = sorted(set(ids))
+    if ids:
+        rows = _owners(model).add_columns(literal(deleted).label("deleted")).where(model.id.in_(ids))
+        _replace(_connection(), JOURNALED[model], rows)
+
+
+def record_months(month_ids: Iterable[int], deleted: bool = False) -> None:
+    """
+    Journal the months and every account, bill and income in them after a bulk
+    statement. ``deleted=True`` marks the contents (not the months) as deleted.
+    """
+    ids = sorted(set(month_ids))
+    if not ids:
+        return
+    for model in (Account, Bill, Income):
+        rows = _owners(model).add_columns(literal(deleted).label("deleted")).where(Account.month_id.in_(ids))
+        _replace(_connection(), JOURNALED[model], rows)
+    record(Month, ids)
+
+
+def backfill(conn: Connection) -> None:
+    """Record every existing item once, so a client starting from version 0 gets a full copy."""
+    for model, resource in JOURNALED.items():
+        _replace(conn, resource, _owners(model).add_columns(literal(False).label("deleted")))
+
+
+def _month_of(session, obj) -> Month | None:
+    if isinstance(obj, Month):
+        return obj
+    account = obj if isinstance(obj, Account) else loaded_parent(session, obj, "account", "account_id", Account)
+    return loaded_parent(session, account, "month", "month_id", Month) if account is not None else None
+
+
+def _incremented(obj) -> bool:
+    # Totals given a SQL increment by balances.py are expired by the flush, leaving no history
+    return bool(inspect(obj).expired_attributes & {"total_bills", "total_incomes"})
+
+
+@event.listens_for(db.session, "after_flush")
+def _journal_flush(session, flush_context):
+    """
+    Replace the journal rows of everything the flush wrote. Runs after the flush so
+    new rows have their ids; the session still lists what was new, dirty or deleted.
+    """
+    entries: dict[tuple[str, int], dict] = {}
+    with session.no_autoflush:
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            resource = JOURNALED.get(type(obj))
+            if resource is None or obj.id is None:
+                continue
+            if obj in session.dirty and not (session.is_modified(obj) or _incremented(obj)):
+                continue
+            month = _month_of(session, obj)
+            entries[(resource, obj.id)] = {
+                "resource": resource,
+                "item_id": obj.id,
+                "month_id": month.id if month is not None else None,
+                "household_id": month.household_id if month is not None else None,
+                "deleted": obj in session.deleted,
+            }
+    if not entries:
+        return
+
+    conn = session.connection(bind_arguments={"mapper": inspect(Change)})
+    _lock(conn, (entry["household_id"] for entry in entries.values()))
+    table = Change.__table__
+    for resource in {key[0] for key in entries}:
+        ids = [item_id for name, item_id in entries if name == resource]
+        conn.execute(delete(table).where(table.c.resource == resource, table.c.item_id.in_(ids)))
+    conn.execute(insert(table), list(entries.values()))
+
+
+def since(version: int, limit: int) -> list[Change]:
+    """Up to ``limit`` of the current household's journal rows after ``version``, oldest first."""
+    stmt = households.scope(select(Change).where(Change.version > version), Change)
+    return list(db.session.scalars(stmt.order_by(Change.version).limit(limit)))
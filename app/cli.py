@@ -0,0 +1,178 @@
+# cli.py
+from __future__ import annotations
+
+import click
+from flask import Flask
+from flask.cli import with_appcontext
+
+from . import archive, balances, duplication, exporter, importer, migrations, recurrence
+from .extensions import db
+from .models import Account, Month, User
+
+
+@click.command("duplicate-month")
+@click.argument("month_id", type=int)
+@click.option("--count", default=1, show_default=True, help="Number of months to roll forward.")
+@with_appcontext
+def duplicate_month_command(month_id: int, count: int) -> None:
+    """Copy MONTH_ID forward COUNT times in a single transaction."""
+    month = db.session.get(Month, month_id)
+    if month is None:
+        raise click.ClickException(f"Month {month_id} does not exist.")
+    if count < 1:
+        raise click.BadParameter("must be at least 1", param_hint="--count")
+    created = duplication.duplicate_months_forward(month, count)
+    db.session.commit()
+    for new_month in created:
+        click.echo(f"Created month {new_month.id}: {new_month.name}")
+
+
+@click.command("check-balances")
+@click.option("--rebuild", is_flag=True, help="Rewrite any cached totals that disagree with their rows.")
+@with_appcontext
+def check_balances_command(rebuild: bool) -> None:
+    """Verify the cached account and month totals against their bills and incomes."""
+    found = balances.rebuild() if rebuild else balances.find_discrepancies()
+    for d in found:
+        click.echo(
+            f"{d.kind} {d.id}: cached bills {d.cached.total_bills} incomes {d.cached.total_incomes}, "
+            f"actual bills {d.actual.total_bills} incomes {d.actual.total_incomes}"
+        )
+    if rebuild:
+        db.session.commit()
+        click.echo(f"Rebuilt {len(found)} cached total(s).")
+    elif found:
+        raise click.ClickException(f"{len(found)} cached total(s) are out of date; rerun with --rebuild.")
+    else:
+        click.echo("All cached totals are consistent.")
+
+
+@click.command("upgrade-db")
+@with_appcontext
+def upgrade_db_command() -> None:
+    """Apply any pending schema migrations."""
+    applied = migrations.upgrade()
+    for version in applied:
+        click.echo(f"Applied migration {version}")
+    click.echo(f"Schema is at version {migrations.head()}.")
+
+
+@click.command("import-transactions")
+@click.argument("account_id", type=int)
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "ofx"]), help="Defaults to the file extension.")
+@click.option("--batch-size", default=importer.DEFAULT_BATCH_SIZE, show_default=True, help="Rows per transaction.")
+@with_appcontext
+def import_transactions_command(account_id: int, path: str, fmt: str | None, batch_size: int) -> None:
+    """Import a CSV or OFX bank export at PATH into ACCOUNT_ID's bills and incomes."""
+    account = db.session.get(Account, account_id)
+    if account is None:
+        raise click.ClickException(f"Account {account_id} does not exist.")
+    if batch_size < 1:
+        raise click.BadParameter("must be at least 1", param_hint="--batch-size")
+
+    def progress(report: importer.ImportReport) -> None:
+        click.echo(f"... {report.imported} imported, {report.skipped} skipped", err=True)
+
+    # utf-8-sig drops the byte order mark that spreadsheet exports often start with
+    with open(path, encoding="utf-8-sig", newline="") as stream:
+        try:
+            report = importer.import_file(account, stream, fmt or importer.detect_format(path), batch_size, progress)
+        except importer.ImportInterruptedError as exc:
+            raise click.ClickException(f"{exc} {exc.report} before that point.") from None
+    for error in report.errors:
+        click.echo(f"line {error.line}: {error.message}", err=True)
+    click.echo(f"{report}.")
+
+
+@click.command("export-data")
+@click.option("--month", "month_id", type=int, help="Export a single month instead of every month.")
+@click.option("--format", "fmt", type=click.Choice(sorted(exporter.FORMATS)), default="csv", show_default=True)
+@click.option("--output", type=click.File("w", encoding="utf-8"), default="-", help="Defaults to standard output.")
+@with_appcontext
+def export_data_command(month_id: int | None, fmt: str, output) -> None:
+    """Stream bills and incomes as CSV or JSON Lines."""
+    if month_id is not None and db.session.get(Month, month_id) is None:
+        raise click.ClickException(f"Month {month_id} does not exist.")
+    for chunk in exporter.stream(fmt, month_id):
+        output.write(chunk)
+
+
+@click.command("archive-months")
+@click.argument("month_ids", type=int, nargs=-1, required=True)
+@click.option("--restore", is_flag=True, help="Move archived months back into the live tables instead.")
+@with_appcontext
+def archive_months_command(month_ids: tuple[int, ...], restore: bool) -> None:
+    """Archive MONTH_IDS into compressed snapshots, committing after each month."""
+    for month_id in month_ids:
+        month = db.session.get(Month, month_id)
+        if month is None:
+            raise click.ClickException(f"Month {month_id} does not exist.")
+        try:
+            if restore:
+                archive.restore_month(month)
+            else:
+                snapshot = archive.archive_month(month)
+        except ValueError as exc:
+            raise click.ClickException(str(exc)) from None
+        db.session.commit()
+        if restore:
+            click.echo(f"Restored month {month_id}: {month.name}")
+        else:
+            click.echo(
+                f"Archived month {month_id}: {month.name} ({snapshot.row_count} rows, {len(snapshot.payload)} bytes)"
+            )
+
+
+@click.command("materialize-bills")
+@click.option(
+    "--months", default=1, show_default=True, help="Fill in through the end of the month this many months ahead."
+)
+@click.option("--until", type=click.DateTime(formats=["%Y-%m-%d"]), help="Fill in through this date instead.")
+@click.option("--since", type=click.DateTime(formats=["%Y-%m-%d"]), help="Start from this date instead of today.")
+@with_appcontext
+def materialize_bills_command(months: int, until, since) -> None:
+    """Add the upcoming bills of every recurring bill in one transaction; safe to run repeatedly."""
+    if months < 0:
+        raise click.BadParameter("must not be negative", param_hint="--months")
+    end = until.date() if until else recurrence.horizon(months)
+    try:
+        report = recurrence.materialize(end, since.date() if since else None)
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from None
+    db.session.commit()
+    click.echo(
+        f"Added {report.bills} bills ({report.amount}) through {end.isoformat()}; "
+        f"created {report.months} months and {report.accounts} accounts"
+    )
+    if report.skipped:
+        click.echo(f"Skipped {report.skipped} bills due in archived months")
+
+
+@click.command("join-household")
+@click.argument("username")
+@click.argument("member")
+@with_appcontext
+def join_household_command(username: str, member: str) -> None:
+    """Move USERNAME into the household MEMBER belongs to, so they share months."""
+    users = {u.username: u for u in User.query.filter(User.username.in_([username, member]))}
+    for name in (username, member):
+        if name not in users:
+            raise click.ClickException(f"User {name!r} does not exist.")
+    household_id = users[member].household_id
+    if household_id is None:
+        raise click.ClickException(f"{member} has no household.")
+    users[username].household_id = household_id
+    db.session.commit()
+    click.echo(f"{username} now shares household {household_id} with {member}")
+
+
+def register_commands(app: Flask) -> None:
+    app.cli.add_command(duplicate_month_command)
+    app.cli.add_command(check_balances_command)
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(import_transactions_command)
+    app.cli.add_command(export_data_command)
+    app.cli.add_command(archive_months_command)
+    app.cli.add_command(materialize_bills_command)
+    app.cli.add_command(join_household_command)
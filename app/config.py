@@ -3,13 +3,85 @@ import os
 basedir = os.path.abspath(os.path.dirname(__file__))
 
 
+def _env_int(name, default=None):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def normalise_database_url(url):
+    """Point bare postgres:// URLs, as most hosting platforms issue them, at the psycopg 3 driver."""
+    for prefix in ("postgres://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg://" + url[len(prefix) :]
+    return url
+
+
+def _env_bool(name, default=None):
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY") or "you-will-never-guess"
 
-    # Build a path to 'db/finances.db' inside the app folder
+    # Build a path to 'db/finances.db' inside the app folder; create_app() makes the folder
     DB_FOLDER = os.path.join(basedir, "db")
-    if not os.path.exists(DB_FOLDER):
-        os.makedirs(DB_FOLDER)
 
-    SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(DB_FOLDER, "finances.db")
+    # SQLALCHEMY_DATABASE_URI wins over the more general DATABASE_URL; SQLite is the fallback
+    SQLALCHEMY_DATABASE_URI = normalise_database_url(
+        os.environ.get("SQLALCHEMY_DATABASE_URI")
+        or os.environ.get("DATABASE_URL")
+        or "sqlite:///" + os.path.join(DB_FOLDER, "finances.db")
+    )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Run migrations whenever an app is built; off by default so workers boot without
+    # touching the schema and `flask upgrade-db` runs once before they start
+    DB_AUTO_UPGRADE = _env_bool("DB_AUTO_UPGRADE", False)
+
+    # Connection pool; unset values keep SQLAlchemy's defaults
+    DB_POOL_SIZE = _env_int("DB_POOL_SIZE")
+    DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE")
+    DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING")
+
+    # SQLite tuning profile applied to every new connection. WAL lets readers carry on
+    # while a worker writes, and busy_timeout makes writers wait for the lock instead of failing.
+    SQLITE_TUNING = _env_bool("SQLITE_TUNING", True)
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+    SQLITE_MMAP_SIZE = _env_int("SQLITE_MMAP_SIZE", 128 * 1024 * 1024)
+    # Negative values are KiB, so this is a 16 MiB page cache per connection
+    SQLITE_CACHE_SIZE = _env_int("SQLITE_CACHE_SIZE", -16 * 1024)
+    SQLITE_FOREIGN_KEYS = _env_bool("SQLITE_FOREIGN_KEYS", True)
+
+    # Optional database per household, e.g. "sqlite:////data/households/{household}.db";
+    # users stay in the main database. HOUSEHOLD_ID picks the household for CLI commands.
+    HOUSEHOLD_DATABASES = os.environ.get("HOUSEHOLD_DATABASES")
+    HOUSEHOLD_ID = _env_int("HOUSEHOLD_ID")
+
+    # Rendered month pages: "memory" (per worker), "filesystem" (shared by workers) or "none"
+    RENDER_CACHE = os.environ.get("RENDER_CACHE", "memory")
+    RENDER_CACHE_SIZE = _env_int("RENDER_CACHE_SIZE", 128)
+    RENDER_CACHE_DIR = os.environ.get("RENDER_CACHE_DIR")
+
+    # Werkzeug hash method, e.g. "scrypt" or "pbkdf2:sha256:600000"; older hashes are upgraded at login
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+    # Seconds a worker reuses a loaded user or verified API credentials; 0 disables
+    USER_CACHE_TTL = _env_int("USER_CACHE_TTL", 60)
+    # Failed logins allowed per address and per username within the window; 0 disables
+    LOGIN_MAX_ATTEMPTS = _env_int("LOGIN_MAX_ATTEMPTS", 10)
+    LOGIN_WINDOW_SECONDS = _env_int("LOGIN_WINDOW_SECONDS", 300)
+
+    # Months per page on the months listing
+    MONTHS_PAGE_SIZE = _env_int("MONTHS_PAGE_SIZE", 50)
+
+    # Per-request timings: Server-Timing header, /metrics and the slow request log
+    INSTRUMENTATION = _env_bool("INSTRUMENTATION", True)
+    SERVER_TIMING = _env_bool("SERVER_TIMING", True)
+    SLOW_REQUEST_MS = _env_int("SLOW_REQUEST_MS", 500)
+    # Bearer token for /metrics, which is off outside debug mode until one is set
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
@@ -0,0 +1,91 @@
+# database.py
+from __future__ import annotations
+
+import os
+import re
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from .extensions import db
+
+# Config keys mapped to the create_engine() pool arguments they control
+POOL_OPTIONS = {
+    "DB_POOL_SIZE": "pool_size",
+    "DB_MAX_OVERFLOW": "max_overflow",
+    "DB_POOL_TIMEOUT": "pool_timeout",
+    "DB_POOL_RECYCLE": "pool_recycle",
+    "DB_POOL_PRE_PING": "pool_pre_ping",
+}
+
+
+def is_sqlite_memory(uri: str) -> bool:
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def ensure_sqlite_directory(uri: str) -> None:
+    """Create the folder holding a file-based SQLite database, if it is missing."""
+    url = make_url(uri)
+    if url.get_backend_name() == "sqlite" and not is_sqlite_memory(uri):
+        os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+
+
+def apply_engine_options(app: Flask) -> None:
+    """
+    Copy the DB_POOL_* settings into SQLALCHEMY_ENGINE_OPTIONS.
+
+    Only settings that were given are passed on, and none are applied to an
+    in-memory SQLite database because it always uses a single static connection.
+    """
+    if is_sqlite_memory(app.config["SQLALCHEMY_DATABASE_URI"]):
+        return
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    for key, option in POOL_OPTIONS.items():
+        value = app.config.get(key)
+        if value is not None:
+            options.setdefault(option, value)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def sqlite_pragmas(config) -> list[tuple[str, object]]:
+    """Return the PRAGMA statements to run on each new SQLite connection, in order."""
+    pragmas = [
+        ("busy_timeout", config.get("SQLITE_BUSY_TIMEOUT_MS")),
+        ("journal_mode", config.get("SQLITE_JOURNAL_MODE")),
+        ("synchronous", config.get("SQLITE_SYNCHRONOUS")),
+        ("mmap_size", config.get("SQLITE_MMAP_SIZE")),
+        ("cache_size", config.get("SQLITE_CACHE_SIZE")),
+    ]
+    if config.get("SQLITE_FOREIGN_KEYS") is not None:
+        pragmas.append(("foreign_keys", "ON" if config["SQLITE_FOREIGN_KEYS"] else "OFF"))
+    pragmas = [(name, value) for name, value in pragmas if value not in (None, "")]
+    for name, value in pragmas:
+        # Values are interpolated into the statement, so only plain words and integers are allowed
+        if not re.fullmatch(r"-?\w+", str(value)):
+            raise ValueError(f"Invalid value for SQLite pragma {name}: {value!r}")
+    return pragmas
+
+
+def install_sqlite_pragmas(engine: Engine, pragmas: list[tuple[str, object]]) -> None:
+    """Run ``pragmas`` on every connection ``engine`` opens."""
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def configure_engine(app: Flask) -> None:
+    """Apply the SQLite tuning profile to the app's engine; other backends are left alone."""
+    if not app.config.get("SQLITE_TUNING", True):
+        return
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name == "sqlite":
+            install_sqlite_pragmas(engine, sqlite_pragmas(app.config))
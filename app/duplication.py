@@ -0,0 +1,212 @@
+# duplication.py
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import NamedTuple
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import insert, select
+
+from .balances import add_bulk
+from .changes import record_months
+from .extensions import db
+from .models import Account, Bill, Income, Month, RecurringBill
+from .totals import ZERO
+
+MONTH_NAME_FORMATS = ("%B %Y", "%b %Y")
+
+
+class SourceRows(NamedTuple):
+    accounts: list
+    bills: list
+    incomes: list
+    # Source account id -> [total bills, total incomes], summed from the rows above
+    totals: dict
+
+
+def parse_month_name(name: str) -> tuple[datetime, str] | None:
+    """
+    Read a month name such as "January 2025" or "Jan 2025" as the first of that
+    month, with the format it was written in; None when it is not a calendar month.
+    """
+    for fmt in MONTH_NAME_FORMATS:
+        try:
+            return datetime.strptime(name.strip(), fmt), fmt
+        except ValueError:
+            continue
+    return None
+
+
+def shifted_month_name(name: str, months: int) -> str | None:
+    """
+    Return ``name`` moved forward by ``months`` if it reads like a calendar month.
+
+    "January 2025" shifted by 2 becomes "March 2025". Names that do not parse
+    (e.g. "Holiday budget") return None so the caller can choose a fallback.
+    """
+    parsed = parse_month_name(name)
+    if parsed is None:
+        return None
+    start, fmt = parsed
+    return (start + relativedelta(months=months)).strftime(fmt)
+
+
+def account_totals(bills, incomes) -> dict[int, list[Decimal]]:
+    totals: dict[int, list[Decimal]] = defaultdict(lambda: [ZERO, ZERO])
+    for b in bills:
+        totals[b.account_id][0] += Decimal(str(b.amount))
+    for inc in incomes:
+        totals[inc.account_id][1] += Decimal(str(inc.amount))
+    return totals
+
+
+def load_source(month_id: int) -> SourceRows:
+    """Read the rows to copy as plain tuples, one query per table."""
+    accounts = db.session.execute(
+        select(Account.id, Account.name, Account.pos_x, Account.pos_y, Account.width, Account.height)
+        .where(Account.month_id == month_id)
+        .order_by(Account.id)
+    ).all()
+    bills = db.session.execute(
+        select(
+            Bill.account_id,
+            Bill.linked_income_id,
+            Bill.recurring_bill_id,
+            Bill.name,
+            Bill.amount,
+            Bill.due_date,
+            Bill.category,
+            Bill.is_paid,
+            Bill.owner,
+        )
+        .join(Account, Account.id == Bill.account_id)
+        .where(Account.month_id == month_id)
+        .order_by(Bill.id)
+    ).all()
+    incomes = db.session.execute(
+        select(Income.id, Income.account_id, Income.name, Income.amount, Income.contributor)
+        .join(Account, Account.id == Income.account_id)
+        .where(Account.month_id == month_id)
+        .order_by(Income.id)
+    ).all()
+    return SourceRows(accounts, bills, incomes, account_totals(bills, incomes))
+
+
+def _insert_mapped(model, source_ids: list[int], rows: list[dict]) -> dict[int, int]:
+    """Bulk insert ``rows`` and map each source primary key to its copy's new key."""
+    if not rows:
+        return {}
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    new_ids = list(db.session.scalars(stmt, rows))
+    return {source_ids[idx]: new_id for idx, new_id in enumerate(new_ids)}
+
+
+def insert_rows(source: SourceRows, month_id: int, months: int = 0, keep_schedules: bool = False) -> None:
+    """
+    Bulk insert the accounts, incomes and bills of ``source`` into ``month_id``.
+
+    Bulk inserts bypass the session events in balances.py, so the accounts' cached
+    totals are added from ``source.totals`` with ``balances.add_bulk``; the month's
+    are the caller's. The inserted rows are recorded in the change journal here. Copies drop each
+    bill's recurring schedule; ``keep_schedules`` keeps the ones that still exist,
+    for putting the same bills back.
+    """
+    account_map = _insert_mapped(
+        Account,
+        [acc.id for acc in source.accounts],
+        [
+            {
+                "month_id": month_id,
+                "name": acc.name,
+                "pos_x": acc.pos_x,
+                "pos_y": acc.pos_y,
+                "width": acc.width,
+                "height": acc.height,
+            }
+            for acc in source.accounts
+        ],
+    )
+
+    income_map = _insert_mapped(
+        Income,
+        [inc.id for inc in source.incomes],
+        [
+            {
+                "account_id": account_map[inc.account_id],
+                "name": inc.name,
+                "amount": inc.amount,
+                "contributor": inc.contributor,
+            }
+            for inc in source.incomes
+        ],
+    )
+
+    schedules = set()
+    if keep_schedules:
+        # Snapshots taken before schedules were kept have no recurring_bill_id
+        wanted = {getattr(b, "recurring_bill_id", None) for b in source.bills} - {None}
+        if wanted:
+            schedules = set(db.session.scalars(select(RecurringBill.id).where(RecurringBill.id.in_(wanted))))
+    bill_rows = [
+        {
+            "account_id": account_map[b.account_id],
+            # Transfers point at the copied income; links leaving the month are dropped
+            "linked_income_id": income_map.get(b.linked_income_id),
+            "recurring_bill_id": rid if (rid := getattr(b, "recurring_bill_id", None)) in schedules else None,
+            "name": b.name,
+            "amount": b.amount,
+            "due_date": b.due_date + relativedelta(months=months) if b.due_date else None,
+            "category": b.category,
+            "is_paid": b.is_paid,
+            "owner": b.owner,
+        }
+        for b in source.bills
+    ]
+    if bill_rows:
+        db.session.execute(insert(Bill), bill_rows)
+    add_bulk({account_map[acc_id]: totals for acc_id, totals in source.totals.items()}, {})
+    # The change journal misses bulk inserts too; every row of the month is new
+    record_months([month_id])
+
+
+def _copy(source: SourceRows, name: str, months: int, household_id: int | None) -> Month:
+    new_month = Month(
+        name=name,
+        household_id=household_id,
+        total_bills=sum((t[0] for t in source.totals.values()), ZERO),
+        total_incomes=sum((t[1] for t in source.totals.values()), ZERO),
+    )
+    db.session.add(new_month)
+    db.session.flush()
+    insert_rows(source, new_month.id, months)
+    return new_month
+
+
+def duplicate_month(month: Month, name: str | None = None, months: int = 1) -> Month:
+    """
+    Copy a month with all of its accounts, bills and incomes.
+
+    Rows are copied with bulk inserts inside the caller's transaction; nothing is
+    committed here. Bill due dates move forward by ``months`` and transfer bills
+    are re-linked to the copied incomes.
+    """
+    source = load_source(month.id)
+    return _copy(source, name or f"{month.name} (Copy)", months, month.household_id)
+
+
+def duplicate_months_forward(month: Month, count: int) -> list[Month]:
+    """
+    Roll a month forward ``count`` times, e.g. to pre-create the rest of a year.
+
+    Every copy is taken from the original month with due dates shifted by its
+    offset, so a bill due on the 31st lands on each month's last day rather than
+    drifting earlier through successive copies.
+    """
+    source = load_source(month.id)
+    created = []
+    for offset in range(1, count + 1):
+        name = shifted_month_name(month.name, offset) or f"{month.name} (+{offset})"
+        created.append(_copy(source, name, offset, month.household_id))
+    return created
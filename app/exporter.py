@@ -0,0 +1,130 @@
+# exporter.py
+"""
+Streaming export of bills and incomes as CSV or JSON Lines.
+
+Rows come from a single UNION ALL query executed with ``yield_per``, which makes
+SQLAlchemy fetch in chunks (a server-side cursor on PostgreSQL) instead of loading
+the whole result. The writers turn each chunk into one string, so a Flask response
+or a file receives a few large writes rather than one per row.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import Iterable, Iterator
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Boolean, Date, String, literal, select, union_all
+
+from .extensions import db
+from .models import Account, Bill, Income, Month
+
+CHUNK_SIZE = 1000
+FIELDS = (
+    "month_id",
+    "month",
+    "account",
+    "type",
+    "id",
+    "name",
+    "amount",
+    "due_date",
+    "category",
+    "person",
+    "is_paid",
+)
+
+
+def _statement(month_id: int | None, owner=None):
+    bills = (
+        select(
+            Month.id.label("month_id"),
+            Month.name.label("month"),
+            Account.name.label("account"),
+            literal("bill").label("type"),
+            Bill.id,
+            Bill.name,
+            Bill.amount,
+            Bill.due_date,
+            Bill.category,
+            Bill.owner.label("person"),
+            Bill.is_paid,
+        )
+        .join(Account, Bill.account_id == Account.id)
+        .join(Month, Account.month_id == Month.id)
+    )
+    incomes = (
+        select(
+            Month.id,
+            Month.name,
+            Account.name,
+            literal("income"),
+            Income.id,
+            Income.name,
+            Income.amount,
+            literal(None, Date),
+            literal(None, String),
+            Income.contributor,
+            literal(None, Boolean),
+        )
+        .join(Account, Income.account_id == Account.id)
+        .join(Month, Account.month_id == Month.id)
+    )
+    if month_id is not None:
+        bills = bills.where(Month.id == month_id)
+        incomes = incomes.where(Month.id == month_id)
+    if owner is not None:
+        bills = bills.where(owner)
+        incomes = incomes.where(owner)
+    combined = union_all(bills, incomes).subquery()
+    return select(combined).order_by(combined.c.month_id, combined.c.account, combined.c.type, combined.c.id)
+
+
+def export_rows(month_id: int | None = None, chunk_size: int = CHUNK_SIZE, owner=None) -> Iterator[list[tuple]]:
+    """Yield the rows of one month (or every month ``owner`` allows) in chunks of ``chunk_size``."""
+    result = db.session.execute(_statement(month_id, owner).execution_options(yield_per=chunk_size))
+    for chunk in result.partitions():
+        yield [tuple(row) for row in chunk]
+
+
+def _value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def as_csv(chunks: Iterable[list[tuple]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for chunk in chunks:
+        writer.writerows([_value(v) for v in row] for row in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def as_jsonl(chunks: Iterable[list[tuple]]) -> Iterator[str]:
+    for chunk in chunks:
+        yield "".join(json.dumps({FIELDS[i]: _value(v) for i, v in enumerate(row)}) + "\n" for row in chunk)
+
+
+# Format name -> (writer, mimetype)
+FORMATS = {
+    "csv": (as_csv, "text/csv"),
+    "jsonl": (as_jsonl, "application/x-ndjson"),
+}
+
+
+def stream(fmt: str, month_id: int | None = None, chunk_size: int = CHUNK_SIZE, owner=None) -> Iterator[str]:
+    if fmt not in FORMATS:
+        raise ValueError(f"unsupported export format {fmt!r}")
+    writer, _ = FORMATS[fmt]
+    return writer(export_rows(month_id, chunk_size, owner))
@@ -1,7 +1,25 @@
 # extensions.py
+from flask import current_app, has_app_context
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as _Session
 
-db = SQLAlchemy()
+
+class Session(_Session):
+    """
+    Flask-SQLAlchemy's session, plus an optional ``bind_resolver`` app extension that
+    can send a query to another engine (see households.py) before the bind keys are used.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            resolver = current_app.extensions.get("bind_resolver")
+            engine = resolver(mapper, clause) if resolver is not None else None
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": Session})
 login_manager = LoginManager()
 login_manager.login_view = "main.login"
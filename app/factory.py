@@ -0,0 +1,79 @@
+"""
+The application factory.
+
+``create_app()`` builds a configured app without opening a database connection:
+schema migrations run once from ``flask upgrade-db`` (or the container's start
+command) rather than in every worker, so booting a worker only wires up
+extensions and blueprints. An in-memory SQLite database starts empty and is
+always migrated, and DB_AUTO_UPGRADE=1 brings back migrating at startup.
+
+Importing the package has no side effects. ``app:app``, as gunicorn and
+``flask --app`` use it, is built by the package's ``__getattr__`` on first
+access; with gunicorn's ``--preload`` that happens once in the master before the
+workers fork.
+"""
+
+from __future__ import annotations
+
+import os
+
+from flask import Flask
+
+from .config import Config
+from .database import apply_engine_options, configure_engine, ensure_sqlite_directory, is_sqlite_memory
+from .extensions import db, login_manager
+
+
+def create_app(config_overrides: dict | None = None) -> Flask:
+    """Build and return a new Flask application."""
+    app = Flask(__name__, template_folder="templates", static_folder="static")
+    app.config.from_object(Config)
+
+    # Test friendly overrides; the test suite sets FINANCES_TESTING=1
+    if os.getenv("FINANCES_TESTING") == "1":
+        app.config.update(
+            TESTING=True,
+            WTF_CSRF_ENABLED=False,
+            SQLALCHEMY_DATABASE_URI="sqlite://",
+            SECRET_KEY="test-secret",
+        )
+
+    if config_overrides:
+        app.config.update(config_overrides)
+
+    # Initialise extensions
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    ensure_sqlite_directory(uri)
+    apply_engine_options(app)
+    db.init_app(app)
+    configure_engine(app)
+    login_manager.init_app(app)
+
+    with app.app_context():
+        # Keep all intra package imports relative so `app:app` works
+        from . import auth, balances, changes, households, instrumentation, migrations, models, render_cache  # noqa: F401
+
+        if is_sqlite_memory(uri):
+            # Disposing would drop the in-memory database, so it keeps its one connection
+            migrations.upgrade()
+        elif app.config.get("DB_AUTO_UPGRADE"):
+            migrations.upgrade()
+            # Connections opened while migrating must not be inherited by preforked workers
+            for engine in db.engines.values():
+                engine.dispose()
+        auth.init_app(app)
+        render_cache.init_app(app)
+        instrumentation.init_app(app)
+        households.init_app(app)
+
+    from .api import bp as api_bp
+    from .routes import bp as main_bp
+
+    app.register_blueprint(main_bp)
+    app.register_blueprint(api_bp)
+
+    from .cli import register_commands
+
+    register_commands(app)
+
+    return app
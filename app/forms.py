@@ -6,6 +6,18 @@ from wtforms import BooleanField, DateField, DecimalField, PasswordField, Select
 from wtforms.validators import DataRequired, EqualTo, Length, Optional, ValidationError
 
 
+def parse_amount(raw) -> Decimal:
+    """
+    Turn user input such as "£2,503.50" into a Decimal by dropping everything
+    but digits and the decimal point. Raises ValueError if nothing usable is left.
+    """
+    cleaned = re.sub(r"[^\d\.]+", "", str(raw))
+    try:
+        return Decimal(cleaned)
+    except InvalidOperation:
+        raise ValueError(f"not a valid amount: {raw!r}") from None
+
+
 class RegistrationForm(FlaskForm):
     username = StringField("Username", validators=[DataRequired(), Length(min=3, max=64)])
     password = PasswordField("Password", validators=[DataRequired(), Length(min=6)])
@@ -54,11 +66,9 @@ class BillForm(FlaskForm):
     submit = SubmitField("Save Bill")
 
     def validate_amount(self, field):
-        raw = str(field.data)
-        cleaned = re.sub(r"[^\d\.]+", "", raw)
         try:
-            field.data = Decimal(cleaned)
-        except (ValueError, InvalidOperation):
+            field.data = parse_amount(field.data)
+        except ValueError:
             raise ValidationError("Please enter a valid numeric amount (e.g. 2503.50).") from None
 
 
@@ -69,9 +79,7 @@ class IncomeForm(FlaskForm):
     submit = SubmitField("Save Income")
 
     def validate_amount(self, field):
-        raw = str(field.data)
-        cleaned = re.sub(r"[^\d\.]+", "", raw)
         try:
-            field.data = Decimal(cleaned)
-        except (ValueError, InvalidOperation):
+            field.data = parse_amount(field.data)
+        except ValueError:
             raise ValidationError("Please enter a valid numeric amount (e.g. 1500.00).") from None
@@ -0,0 +1,135 @@
+# households.py
+"""
+Households: whose months a request can see, and optionally one database per household.
+
+Every month belongs to a household through ``Month.household_id``, indexed
+together with ``created_at``, and accounts, bills and incomes belong to it through
+their month. Routes and the API fetch rows with ``get_or_404`` and list them
+through ``scope`` or ``owned_months``, which add the signed-in user's household to
+the query, so a household never reads (or scans) another's rows. A user without a
+household only sees months without one.
+
+When HOUSEHOLD_DATABASES holds a URL template such as
+``sqlite:////data/households/{household}.db``, ``HouseholdBinds`` becomes the
+session's bind resolver: users and households stay in the main database and every
+other table goes to the current household's own file, which is created and
+migrated on first use. One household's writes then never wait on another's
+SQLite lock. Outside a request (the CLI) the household is taken from
+HOUSEHOLD_ID. Switching the mode on does not move existing months.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+
+from flask import Flask, current_app, has_request_context
+from flask_login import current_user
+from sqlalchemy import Engine, create_engine, insert, inspect, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.util import find_tables
+
+from . import instrumentation, migrations
+from .database import install_sqlite_pragmas, sqlite_pragmas
+from .extensions import db
+from .models import Account, Bill, Change, Household, Income, Month, RecurringBill, User
+
+# Tables kept in the main database when households have their own files
+SHARED_TABLES = frozenset({User.__tablename__, Household.__tablename__})
+
+
+def current_household_id() -> int | None:
+    if has_request_context() and current_user.is_authenticated:
+        return current_user.household_id
+    return current_app.config.get("HOUSEHOLD_ID")
+
+
+def create_household(user: User) -> Household:
+    """Give a new user a household of their own. Nothing is committed here."""
+    household = Household(name=user.username)
+    db.session.add(household)
+    user.household = household
+    return household
+
+
+def _matches(column, household_id: int | None):
+    return column.is_(None) if household_id is None else column == household_id
+
+
+def owned_months():
+    """Criterion on Month limiting a query to the current household."""
+    return _matches(Month.household_id, current_household_id())
+
+
+def scope(stmt, model):
+    """Limit a select of ``model`` rows to the current household, joining up to the month."""
+    if model in (RecurringBill, Change):
+        return stmt.where(_matches(model.household_id, current_household_id()))
+    if model in (Bill, Income):
+        stmt = stmt.join(Account, model.account_id == Account.id)
+    if model is not Month:
+        stmt = stmt.join(Month, Account.month_id == Month.id)
+    return stmt.where(owned_months())
+
+
+def get_or_404(model, ident):
+    """``model`` row ``ident`` if it belongs to the current household, else abort with 404."""
+    return db.first_or_404(scope(select(model).where(model.id == ident), model))
+
+
+class HouseholdBinds:
+    """Bind resolver sending household tables to one engine per household."""
+
+    def __init__(self, app: Flask, template: str):
+        self.app = app
+        self.template = template
+        self.engines: dict[int, Engine] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, mapper, clause) -> Engine | None:
+        if mapper is not None:
+            tables = [inspect(mapper).local_table]
+        elif clause is not None:
+            tables = find_tables(clause, include_crud=True)
+        else:
+            return None
+        if all(t.name in SHARED_TABLES for t in tables) or not tables:
+            return None
+        household_id = current_household_id()
+        if household_id is None:
+            raise RuntimeError("No household selected; set HOUSEHOLD_ID to use the CLI with HOUSEHOLD_DATABASES")
+        return self.engine(household_id)
+
+    def engine(self, household_id: int) -> Engine:
+        engine = self.engines.get(household_id)
+        if engine is None:
+            with self._lock:
+                engine = self.engines.get(household_id)
+                if engine is None:
+                    engine = self.engines[household_id] = self._create(household_id)
+        return engine
+
+    def _create(self, household_id: int) -> Engine:
+        url = make_url(self.template.format(household=household_id))
+        if url.get_backend_name() == "sqlite" and url.database:
+            os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+        config = self.app.config
+        engine = create_engine(url, **(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {}))
+        if engine.dialect.name == "sqlite" and config.get("SQLITE_TUNING", True):
+            install_sqlite_pragmas(engine, sqlite_pragmas(config))
+        if "metrics" in self.app.extensions:
+            instrumentation.watch_engine(engine)
+        migrations.upgrade(engine)
+
+        # Months point at their household, so each file keeps a copy of its row
+        with db.engine.connect() as conn:
+            name = conn.scalar(select(Household.name).where(Household.id == household_id))
+        with engine.begin() as conn:
+            if conn.scalar(select(Household.id).where(Household.id == household_id)) is None:
+                conn.execute(insert(Household).values(id=household_id, name=name or f"Household {household_id}"))
+        return engine
+
+
+def init_app(app: Flask) -> None:
+    template = app.config.get("HOUSEHOLD_DATABASES")
+    app.extensions["bind_resolver"] = HouseholdBinds(app, template) if template else None
@@ -0,0 +1,298 @@
+# importer.py
+"""
+Streaming import of bank exports into an account's bills and incomes.
+
+The pipeline is a chain of generators so a file is never held in memory:
+
+    read_csv / read_ofx  ->  parse_records  ->  batches  ->  bulk insert per batch
+
+Readers yield one raw record per transaction, ``parse_records`` turns each into an
+``ImportRow`` (or a ``RowError`` for rows it cannot use) and every batch is inserted
+with a single executemany and committed on its own, together with the matching
+change to the cached account and month totals. A file that stops decoding part way
+through raises ``ImportInterruptedError`` carrying the report of the batches already
+committed, so the caller can say how much of it was saved.
+
+Outgoing money becomes a bill and incoming money an income. A ``type`` column
+("bill"/"income") decides explicitly; otherwise separate debit/credit columns or the
+sign of the amount do. Amounts are cleaned with the same rule as the forms.
+"""
+
+from __future__ import annotations
+
+import csv
+import re
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import islice
+from typing import IO, NamedTuple
+
+from sqlalchemy import insert
+
+from . import balances, changes
+from .extensions import db
+from .forms import parse_amount
+from .models import Account, Bill, Income
+from .totals import ZERO
+
+DEFAULT_BATCH_SIZE = 1000
+CENT = Decimal("0.01")
+# Only the first few problems are kept so a badly formatted file cannot grow the report without bound
+MAX_REPORTED_ERRORS = 50
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y", "%Y%m%d")
+
+# Accepted header names for each field, compared case-insensitively
+CSV_COLUMNS = {
+    "name": ("name", "description", "payee", "memo", "details"),
+    "amount": ("amount", "value"),
+    "debit": ("debit", "paid out", "money out"),
+    "credit": ("credit", "paid in", "money in"),
+    "date": ("date", "due_date", "due date", "transaction date"),
+    "category": ("category",),
+    "person": ("owner", "contributor", "person"),
+    "kind": ("type", "kind"),
+}
+
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+
+
+class ImportRow(NamedTuple):
+    kind: str  # "bill" or "income"
+    name: str
+    amount: Decimal
+    date: date | None
+    category: str | None
+    # Bill owner or income contributor
+    person: str | None
+
+
+class RowError(NamedTuple):
+    line: int
+    message: str
+
+
+class ImportReport:
+    def __init__(self) -> None:
+        self.bills = 0
+        self.incomes = 0
+        self.skipped = 0
+        self.errors: list[RowError] = []
+
+    @property
+    def imported(self) -> int:
+        return self.bills + self.incomes
+
+    def reject(self, error: RowError) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(error)
+
+    def __str__(self) -> str:
+        return f"{self.bills} bill(s) and {self.incomes} income(s) imported, {self.skipped} row(s) skipped"
+
+
+class ImportInterruptedError(ValueError):
+    """The file could not be read past some point; ``report`` covers the rows committed before it."""
+
+    def __init__(self, report: ImportReport, reason: str) -> None:
+        super().__init__(f"The file could not be read as CSV or OFX text ({reason}).")
+        self.report = report
+        self.reason = reason
+
+
+def detect_format(filename: str | None) -> str:
+    return "ofx" if filename and filename.lower().endswith((".ofx", ".qfx")) else "csv"
+
+
+def read_csv(stream: IO[str]) -> Iterator[tuple[int, dict]]:
+    """Yield (line number, record) for each data row of a CSV file with a header row."""
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    names = [h.strip().lower() for h in header]
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        record = {field: row[i].strip() for field, i in columns.items() if i < len(row)}
+        yield reader.line_num, record
+
+
+def read_ofx(stream: IO[str]) -> Iterator[tuple[int, dict]]:
+    """
+    Yield (line number, record) for each <STMTTRN> in an OFX or QFX file.
+
+    Handles both the SGML flavour (no closing tags, one tag per line) and XML.
+    """
+    record: dict | None = None
+    start = 0
+    for number, line in enumerate(stream, start=1):
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and record is not None:
+                    yield start, record
+                    record = None
+                elif not closing:
+                    record, start = {}, number
+            elif record is not None and not closing and value.strip():
+                value = value.strip()
+                if tag == "TRNAMT":
+                    record["amount"] = value
+                elif tag == "DTPOSTED":
+                    record["date"] = value[:8]
+                elif tag == "NAME" or (tag == "MEMO" and "name" not in record):
+                    record["name"] = value
+
+
+def _parse_date(raw: str | None) -> date | None:
+    if not raw:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date {raw!r}")
+
+
+def _is_negative(raw: str) -> bool:
+    raw = raw.strip()
+    return raw.startswith("-") or (raw.startswith("(") and raw.endswith(")"))
+
+
+def _clip(value: str | None, column) -> str | None:
+    """Bank descriptions can be long; keep what fits the column rather than rejecting the row."""
+    return value[: column.type.length] if value else None
+
+
+def _parse(record: dict) -> ImportRow:
+    name = record.get("name")
+    if not name:
+        raise ValueError("missing name")
+
+    kind = (record.get("kind") or "").lower() or None
+    if kind not in (None, "bill", "income"):
+        raise ValueError(f"unknown type {record['kind']!r}")
+    raw = record.get("amount")
+    if not raw and record.get("debit"):
+        raw, kind = record["debit"], kind or "bill"
+    elif not raw and record.get("credit"):
+        raw, kind = record["credit"], kind or "income"
+    if not raw:
+        raise ValueError("missing amount")
+    if kind is None:
+        kind = "bill" if _is_negative(raw) else "income"
+
+    return ImportRow(
+        kind=kind,
+        name=_clip(name, Bill.name),
+        amount=parse_amount(raw).quantize(CENT, ROUND_HALF_UP),
+        date=_parse_date(record.get("date")),
+        category=_clip(record.get("category"), Bill.category),
+        person=_clip(record.get("person"), Bill.owner),
+    )
+
+
+def parse_records(records: Iterable[tuple[int, dict]]) -> Iterator[ImportRow | RowError]:
+    for line, record in records:
+        try:
+            yield _parse(record)
+        except ValueError as exc:
+            yield RowError(line, str(exc))
+
+
+def batches(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _insert_batch(account_id: int, month_id: int, rows: list[ImportRow]) -> tuple[int, int]:
+    bills, incomes = [], []
+    for row in rows:
+        if row.kind == "bill":
+            bills.append(
+                {
+                    "account_id": account_id,
+                    "name": row.name,
+                    "amount": row.amount,
+                    "due_date": row.date,
+                    "category": row.category or "general",
+                    "owner": row.person or "Shared",
+                    "is_paid": False,
+                }
+            )
+        else:
+            incomes.append(
+                {
+                    "account_id": account_id,
+                    "name": row.name,
+                    "amount": row.amount,
+                    "contributor": row.person or "Unknown",
+                }
+            )
+    # Bulk inserts skip the session's flush hooks too, so journal the new rows by id
+    for model, values in ((Bill, bills), (Income, incomes)):
+        if values:
+            changes.record(model, db.session.scalars(insert(model).returning(model.id), values))
+
+    added = (sum((b["amount"] for b in bills), ZERO), sum((i["amount"] for i in incomes), ZERO))
+    balances.add_bulk({account_id: added}, {month_id: added})
+    return len(bills), len(incomes)
+
+
+def import_rows(
+    account: Account,
+    rows: Iterable[ImportRow | RowError],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    """
+    Insert parsed rows into ``account``, committing once per batch. Raises
+    ImportInterruptedError when the file cannot be read to the end.
+    """
+    report = ImportReport()
+    # Read once: committing after each batch expires the account
+    account_id, month_id = account.id, account.month_id
+    try:
+        for batch in batches(rows, batch_size):
+            good = []
+            for row in batch:
+                if isinstance(row, RowError):
+                    report.reject(row)
+                else:
+                    good.append(row)
+            if good:
+                bills, incomes = _insert_batch(account_id, month_id, good)
+                report.bills += bills
+                report.incomes += incomes
+            db.session.commit()
+            if progress is not None:
+                progress(report)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # Only the batch being read is lost; the ones before it are already committed
+        db.session.rollback()
+        raise ImportInterruptedError(report, str(exc)) from exc
+    return report
+
+
+def import_file(
+    account: Account,
+    stream: IO[str],
+    fmt: str = "csv",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    """Stream a CSV or OFX file from ``stream`` into ``account``'s bills and incomes."""
+    readers = {"csv": read_csv, "ofx": read_ofx}
+    if fmt not in readers:
+        raise ValueError(f"unsupported import format {fmt!r}")
+    return import_rows(account, parse_records(readers[fmt](stream)), batch_size, progress)
@@ -0,0 +1,218 @@
+# instrumentation.py
+"""
+Per-request performance instrumentation.
+
+For every request this records wall time, the number of SQL statements and the
+time spent in them (SQLAlchemy cursor events) and the time spent rendering
+templates (Flask's template signals). The figures are
+
+* returned to the browser in a ``Server-Timing`` header, so they show up in the
+  network panel of the developer tools,
+* accumulated into counters served in Prometheus text format at ``/metrics``
+  (which needs ``METRICS_TOKEN`` outside development),
+* logged with the request's statements when a request is slower than
+  ``SLOW_REQUEST_MS``.
+
+Counters live in each worker process; Prometheus sums them across workers when
+each is scraped, or they can be read per worker. Streamed responses are measured
+up to the point the body starts streaming.
+"""
+
+from __future__ import annotations
+
+import hmac
+import threading
+import time
+from collections import defaultdict
+
+from flask import Flask, Response, abort, current_app, g, has_request_context, request, template_rendered
+from flask.signals import before_render_template
+from sqlalchemy import event
+
+from .extensions import db
+
+# Upper bounds of the request duration histogram, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Statements kept per request for the slow request log
+MAX_LOGGED_STATEMENTS = 50
+
+
+class RequestStats:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.statements: list[tuple[float, str]] = []
+        self._template_started: list[float] = []
+
+
+class Metrics:
+    """Thread-safe counters and a duration histogram, labelled by endpoint."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: dict[tuple[str, str, int], int] = defaultdict(int)
+        self.buckets: dict[str, list[int]] = defaultdict(lambda: [0] * len(BUCKETS))
+        self.duration_sum: dict[str, float] = defaultdict(float)
+        self.duration_count: dict[str, int] = defaultdict(int)
+        self.sql_queries: dict[str, int] = defaultdict(int)
+        self.sql_seconds: dict[str, float] = defaultdict(float)
+        self.template_seconds: dict[str, float] = defaultdict(float)
+        self.slow_requests: dict[str, int] = defaultdict(int)
+
+    def observe(self, endpoint: str, method: str, status: int, stats: RequestStats, elapsed: float, slow: bool) -> None:
+        with self._lock:
+            self.requests[(endpoint, method, status)] += 1
+            for i, bound in enumerate(BUCKETS):
+                if elapsed <= bound:
+                    self.buckets[endpoint][i] += 1
+            self.duration_sum[endpoint] += elapsed
+            self.duration_count[endpoint] += 1
+            self.sql_queries[endpoint] += stats.sql_count
+            self.sql_seconds[endpoint] += stats.sql_time
+            self.template_seconds[endpoint] += stats.template_time
+            if slow:
+                self.slow_requests[endpoint] += 1
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family("finances_requests_total", "counter", "HTTP requests handled.")
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'finances_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}'
+                )
+
+            family("finances_request_duration_seconds", "histogram", "Time to produce a response.")
+            for endpoint in sorted(self.duration_count):
+                for i, count in enumerate(self.buckets[endpoint]):
+                    lines.append(
+                        f'finances_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{BUCKETS[i]}"}} {count}'
+                    )
+                total = self.duration_count[endpoint]
+                lines.append(f'finances_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {total}')
+                lines.append(
+                    f'finances_request_duration_seconds_sum{{endpoint="{endpoint}"}} {self.duration_sum[endpoint]:.6f}'
+                )
+                lines.append(f'finances_request_duration_seconds_count{{endpoint="{endpoint}"}} {total}')
+
+            for name, values, help_text, fmt in (
+                ("finances_sql_queries_total", self.sql_queries, "SQL statements executed.", "{}"),
+                ("finances_sql_duration_seconds_total", self.sql_seconds, "Time spent in SQL.", "{:.6f}"),
+                ("finances_template_duration_seconds_total", self.template_seconds, "Time spent rendering.", "{:.6f}"),
+                ("finances_slow_requests_total", self.slow_requests, "Requests over SLOW_REQUEST_MS.", "{}"),
+            ):
+                family(name, "counter", help_text)
+                for endpoint, value in sorted(values.items()):
+                    lines.append(f'{name}{{endpoint="{endpoint}"}} {fmt.format(value)}')
+        return "\n".join(lines) + "\n"
+
+
+def _stats() -> RequestStats | None:
+    return g.get("_request_stats") if has_request_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _stats() is not None:
+        conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _stats()
+    started = conn.info.get("_query_started")
+    if stats is None or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats.sql_count += 1
+    stats.sql_time += elapsed
+    if len(stats.statements) < MAX_LOGGED_STATEMENTS:
+        stats.statements.append((elapsed, statement))
+
+
+def _template_started(sender, template, context, **extra):
+    stats = _stats()
+    if stats is not None:
+        stats._template_started.append(time.perf_counter())
+
+
+def _template_finished(sender, template, context, **extra):
+    stats = _stats()
+    if stats is not None and stats._template_started:
+        stats.template_time += time.perf_counter() - stats._template_started.pop()
+
+
+def _start_request() -> None:
+    g._request_stats = RequestStats()
+
+
+def _finish_request(response: Response) -> Response:
+    stats = _stats()
+    if stats is None:
+        return response
+    elapsed = time.perf_counter() - stats.started
+    endpoint = request.endpoint or "unmatched"
+    config = current_app.config
+    threshold = config.get("SLOW_REQUEST_MS")
+    slow = bool(threshold) and elapsed * 1000 >= threshold
+
+    current_app.extensions["metrics"].observe(endpoint, request.method, response.status_code, stats, elapsed, slow)
+    if config.get("SERVER_TIMING", True):
+        response.headers["Server-Timing"] = (
+            f"app;dur={elapsed * 1000:.1f}, "
+            f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries", '
+            f"tpl;dur={stats.template_time * 1000:.1f}"
+        )
+    if slow:
+        statements = "\n".join(f"  {t * 1000:8.1f} ms  {' '.join(sql.split())}" for t, sql in stats.statements)
+        current_app.logger.warning(
+            "Slow request %s %s took %.1f ms: %d queries in %.1f ms, templates %.1f ms\n%s",
+            request.method,
+            request.full_path.rstrip("?"),
+            elapsed * 1000,
+            stats.sql_count,
+            stats.sql_time * 1000,
+            stats.template_time * 1000,
+            statements,
+        )
+    return response
+
+
+def metrics_view():
+    token = current_app.config.get("METRICS_TOKEN")
+    if not token:
+        # Endpoint names and timings are not for the open internet, so without a token
+        # the figures are only served by the development server and the test suite
+        if not (current_app.debug or current_app.testing):
+            abort(404)
+    elif not hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()):
+        abort(401)
+    body = current_app.extensions["metrics"].render()
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
+def watch_engine(engine) -> None:
+    """Count and time the queries of ``engine``, e.g. one created after startup."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def init_app(app: Flask) -> None:
+    """Wire the hooks into ``app``; call after the database has been initialised."""
+    if not app.config.get("INSTRUMENTATION", True):
+        return
+    app.extensions["metrics"] = Metrics()
+    with app.app_context():
+        for engine in db.engines.values():
+            watch_engine(engine)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -0,0 +1,125 @@
+# listing.py
+"""
+The months listing: keyset pagination, name search and filters over summary rows.
+
+A page is one query. It selects only the columns the list shows, plus account,
+bill and income counts as correlated subqueries, which the foreign key indexes
+answer without touching other months. Pages follow ``(created_at, id)``
+newest first, so the cursor is the last row's key and a page costs the same
+however far back it is. OFFSET would instead re-read every row before it.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import NamedTuple
+
+from sqlalchemy import and_, func, or_, select
+
+from .extensions import db
+from .models import Account, Bill, Income, Month
+
+DEFAULT_PAGE_SIZE = 50
+CURSOR_FORMAT = "%Y%m%d%H%M%S%f"
+
+
+class MonthSummary(NamedTuple):
+    id: int
+    name: str
+    created_at: datetime
+    archived: bool
+    total_bills: Decimal
+    total_incomes: Decimal
+    accounts: int
+    bills: int
+    incomes: int
+
+    @property
+    def remainder(self) -> Decimal:
+        return self.total_incomes - self.total_bills
+
+
+class MonthPage(NamedTuple):
+    months: list[MonthSummary]
+    # Pass back as ``after`` for the next page; None on the last page
+    next_cursor: str | None
+
+
+def encode_cursor(created_at: datetime, month_id: int) -> str:
+    return f"{created_at.strftime(CURSOR_FORMAT)}-{month_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Split a cursor into its key, raising ValueError when it is malformed."""
+    stamp, _, month_id = cursor.partition("-")
+    return datetime.strptime(stamp, CURSOR_FORMAT), int(month_id)
+
+
+def contains(column, text: str):
+    """Case-insensitive substring match with LIKE wildcards in ``text`` taken literally."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.ilike(f"%{escaped}%", escape="\\")
+
+
+def month_page(
+    search: str | None = None,
+    archived: bool = False,
+    since: date | None = None,
+    until: date | None = None,
+    after: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    owner=None,
+) -> MonthPage:
+    """
+    Return one page of month summaries, newest first.
+
+    ``since`` and ``until`` bound the creation date, both inclusive. ``after``
+    is the cursor from the previous page, and ``owner`` an optional criterion on
+    Month such as ``households.owned_months()``.
+    """
+    accounts = select(func.count(Account.id)).where(Account.month_id == Month.id).scalar_subquery()
+    bills = (
+        select(func.count(Bill.id))
+        .join(Account, Bill.account_id == Account.id)
+        .where(Account.month_id == Month.id)
+        .scalar_subquery()
+    )
+    incomes = (
+        select(func.count(Income.id))
+        .join(Account, Income.account_id == Account.id)
+        .where(Account.month_id == Month.id)
+        .scalar_subquery()
+    )
+    stmt = select(
+        Month.id,
+        Month.name,
+        Month.created_at,
+        Month.archived,
+        Month.total_bills,
+        Month.total_incomes,
+        accounts,
+        bills,
+        incomes,
+    ).order_by(Month.created_at.desc(), Month.id.desc())
+
+    # Months saved before archiving existed may hold NULL rather than False
+    stmt = stmt.where(Month.archived.is_(True) if archived else Month.archived.isnot(True))
+    if owner is not None:
+        stmt = stmt.where(owner)
+    if search:
+        stmt = stmt.where(contains(Month.name, search.strip()))
+    if since is not None:
+        stmt = stmt.where(Month.created_at >= datetime.combine(since, datetime.min.time()))
+    if until is not None:
+        stmt = stmt.where(Month.created_at < datetime.combine(until + timedelta(days=1), datetime.min.time()))
+    if after:
+        created_at, month_id = decode_cursor(after)
+        stmt = stmt.where(or_(Month.created_at < created_at, and_(Month.created_at == created_at, Month.id < month_id)))
+
+    # One extra row tells whether there is a next page
+    rows = [MonthSummary(*row) for row in db.session.execute(stmt.limit(limit + 1))]
+    if len(rows) <= limit:
+        return MonthPage(rows, None)
+    rows = rows[:limit]
+    return MonthPage(rows, encode_cursor(rows[-1].created_at, rows[-1].id))
@@ -0,0 +1,274 @@
+# migrations.py
+"""
+Versioned schema migrations.
+
+Each migration is a function registered with ``@migration(version, description)``
+that receives a connection inside the upgrade transaction. Migrations are written
+to be idempotent against the live schema (they inspect before they alter) because
+the first one creates any missing tables from the current models: a fresh database
+therefore gets the latest schema straight away and later steps find nothing to do,
+while a database created before versioning existed is brought up to date step by step.
+
+The applied version is stored in the single-row ``schema_version`` table.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import NamedTuple
+
+from sqlalchemy import Connection, Engine, func, insert, inspect, select, text, update
+
+from .extensions import db
+
+SCHEMA_TABLE = "schema_version"
+# Arbitrary key for the PostgreSQL advisory lock that serialises concurrent upgrades
+ADVISORY_LOCK_KEY = 7_070_001
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, description: str):
+    def register(fn):
+        MIGRATIONS.append(Migration(version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return fn
+
+    return register
+
+
+def head() -> int:
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def _columns(conn: Connection, table: str) -> set[str]:
+    return {col["name"] for col in inspect(conn).get_columns(table)}
+
+
+def _add_column(conn: Connection, table: str, name: str) -> bool:
+    """Add the model's definition of ``table.name`` if the column is missing."""
+    if name in _columns(conn, table):
+        return False
+    column = db.metadata.tables[table].c[name]
+    ddl = f"ALTER TABLE {conn.dialect.identifier_preparer.quote(table)} ADD COLUMN {name} "
+    ddl += column.type.compile(dialect=conn.dialect)
+    if not column.nullable:
+        ddl += " NOT NULL"
+    if column.default is not None and column.default.is_scalar:
+        ddl += f" DEFAULT {column.default.arg!r}"
+    conn.execute(text(ddl))
+    return True
+
+
+def _create_indexes(conn: Connection, *names: str) -> None:
+    """Create the named model indexes that do not exist yet."""
+    wanted = set(names)
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in wanted:
+                index.create(conn, checkfirst=True)
+
+
+def _create_tables(conn: Connection, *names: str) -> None:
+    """Create the named model tables that do not exist yet."""
+    for name in names:
+        db.metadata.tables[name].create(conn, checkfirst=True)
+
+
+def _drop_indexes(conn: Connection, table: str, *names: str) -> None:
+    """Drop the named indexes on ``table`` that still exist."""
+    existing = {ix["name"] for ix in inspect(conn).get_indexes(table)}
+    for name in names:
+        if name in existing:
+            conn.execute(text(f"DROP INDEX {conn.dialect.identifier_preparer.quote(name)}"))
+
+
+@migration(1, "initial schema")
+def _initial_schema(conn: Connection) -> None:
+    # Imported for the side effect of registering every model on the metadata
+    from . import models  # noqa: F401
+
+    db.metadata.create_all(conn, checkfirst=True)
+
+
+@migration(2, "cached account and month totals")
+def _balance_columns(conn: Connection) -> None:
+    from .models import Account, Bill, Income, Month
+
+    added = False
+    for table in ("account", "month"):
+        for name in ("total_bills", "total_incomes"):
+            added |= _add_column(conn, table, name)
+    if not added:
+        return
+
+    # Seed the new caches from the rows, summing whole pence as totals.py does
+    def pence(model):
+        return (
+            select(func.coalesce(func.sum(func.round(model.amount * 100)), 0))
+            .where(model.account_id == Account.id)
+            .scalar_subquery()
+        )
+
+    conn.execute(update(Account).values(total_bills=pence(Bill) / 100, total_incomes=pence(Income) / 100))
+    for column in ("total_bills", "total_incomes"):
+        month_sum = (
+            select(func.coalesce(func.sum(getattr(Account, column)), 0))
+            .where(Account.month_id == Month.id)
+            .scalar_subquery()
+        )
+        conn.execute(update(Month).values({column: month_sum}))
+
+
+@migration(3, "index foreign keys")
+def _foreign_key_indexes(conn: Connection) -> None:
+    # SQLite and PostgreSQL do not index the referencing side of a foreign key on their own
+    _create_indexes(
+        conn,
+        "ix_account_month_id",
+        "ix_bill_account_id",
+        "ix_bill_linked_income_id",
+        "ix_income_account_id",
+    )
+
+
+@migration(4, "composite and partial bill indexes, month ordering index")
+def _bill_and_month_indexes(conn: Connection) -> None:
+    # The composite index leads with account_id, so the single-column one is redundant,
+    # and the linked income index is replaced by a partial one without the NULL rows
+    _drop_indexes(conn, "bill", "ix_bill_account_id", "ix_bill_linked_income_id")
+    _create_indexes(conn, "ix_bill_account_id_due_date", "ix_bill_linked_income", "ix_month_created_at")
+
+
+@migration(5, "month version counter")
+def _month_version(conn: Connection) -> None:
+    _add_column(conn, "month", "version")
+
+
+@migration(6, "archived month snapshots")
+def _month_snapshots(conn: Connection) -> None:
+    _create_tables(conn, "month_snapshot")
+
+
+@migration(7, "backfill missing month creation times")
+def _month_created_at(conn: Connection) -> None:
+    # The months listing pages on (created_at, id), which needs every row to have a time;
+    # months saved without one sort as the oldest
+    from .models import Month
+
+    oldest = conn.scalar(select(func.min(Month.created_at)))
+    conn.execute(update(Month).where(Month.created_at.is_(None)).values(created_at=oldest or func.current_timestamp()))
+
+
+@migration(8, "recurring bills")
+def _recurring_bills(conn: Connection) -> None:
+    _create_tables(conn, "recurring_bill")
+    _add_column(conn, "bill", "recurring_bill_id")
+    _create_indexes(conn, "ux_bill_recurrence")
+
+
+@migration(9, "index unpaid bills by due date")
+def _unpaid_due_index(conn: Connection) -> None:
+    _create_indexes(conn, "ix_bill_unpaid_due")
+
+
+@migration(10, "households")
+def _households(conn: Connection) -> None:
+    _create_tables(conn, "household")
+    for table in ("user", "month", "recurring_bill"):
+        _add_column(conn, table, "household_id")
+    _create_indexes(conn, "ix_user_household_id", "ix_month_household_created", "ix_recurring_bill_household_id")
+    # Everyone saw every month until now, so existing users and months become one household
+    tables = [db.metadata.tables[name] for name in ("user", "month", "recurring_bill")]
+    if not any(conn.scalar(select(t.c.id).where(t.c.household_id.is_(None)).limit(1)) for t in tables):
+        return
+    household = db.metadata.tables["household"]
+    household_id = conn.execute(
+        household.insert().values(name="Household", created_at=func.current_timestamp())
+    ).inserted_primary_key[0]
+    for table in tables:
+        conn.execute(update(table).where(table.c.household_id.is_(None)).values(household_id=household_id))
+
+
+@migration(11, "full-text search index over bills and incomes")
+def _search_index(conn: Connection) -> None:
+    from .search import create_index
+
+    create_index(conn)
+
+
+@migration(12, "change journal")
+def _change_journal(conn: Connection) -> None:
+    from .changes import backfill
+
+    _create_tables(conn, "change_log")
+    # Clients start from version 0, which should give them every row that already exists
+    backfill(conn)
+
+
+@migration(13, "materialized recurring bill occurrences")
+def _recurring_occurrences(conn: Connection) -> None:
+    from .models import Bill, RecurringOccurrence
+
+    _create_tables(conn, "recurring_occurrence")
+    # Every occurrence still in the live tables was materialized once
+    known = select(RecurringOccurrence.due_date).where(
+        RecurringOccurrence.recurring_bill_id == Bill.recurring_bill_id,
+        RecurringOccurrence.due_date == Bill.due_date,
+    )
+    rows = (
+        select(Bill.recurring_bill_id, Bill.due_date)
+        .where(Bill.recurring_bill_id.is_not(None), Bill.due_date.is_not(None), ~known.exists())
+        .distinct()
+    )
+    conn.execute(insert(RecurringOccurrence).from_select(["recurring_bill_id", "due_date"], rows))
+
+
+def _lock(conn: Connection) -> None:
+    """
+    Serialise upgrades from workers booting at the same time.
+
+    PostgreSQL takes a transaction-scoped advisory lock. On SQLite the insert below
+    is the first write of the transaction, so it takes the database write lock and
+    any other worker waits on busy_timeout until this upgrade commits.
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} (id INTEGER PRIMARY KEY, version INTEGER NOT NULL)"))
+    conn.execute(
+        text(
+            f"INSERT INTO {SCHEMA_TABLE} (id, version) SELECT 1, 0 "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {SCHEMA_TABLE} WHERE id = 1)"
+        )
+    )
+
+
+def current_version(conn: Connection) -> int | None:
+    """Return the applied schema version, or None for a database that has never been migrated."""
+    if not inspect(conn).has_table(SCHEMA_TABLE):
+        return None
+    return conn.execute(text(f"SELECT version FROM {SCHEMA_TABLE} WHERE id = 1")).scalar()
+
+
+def upgrade(engine: Engine | None = None, target: int | None = None) -> list[int]:
+    """Apply every pending migration in one transaction and return the versions applied."""
+    engine = engine if engine is not None else db.engine
+    target = head() if target is None else target
+    applied = []
+    with engine.begin() as conn:
+        _lock(conn)
+        version = current_version(conn) or 0
+        for step in MIGRATIONS:
+            if version < step.version <= target:
+                step.upgrade(conn)
+                applied.append(step.version)
+        if applied:
+            conn.execute(text(f"UPDATE {SCHEMA_TABLE} SET version = :v WHERE id = 1"), {"v": applied[-1]})
+    return applied
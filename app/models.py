@@ -2,70 +2,223 @@
 from datetime import datetime
 
 from flask_login import UserMixin
-from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy.ext.hybrid import hybrid_property
+from werkzeug.security import check_password_hash
 
-from .extensions import db, login_manager
+from .extensions import db
+
+
+class Household(db.Model):
+    """The people who share a set of months; every user belongs to one."""
+
+    __tablename__ = "household"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
+    household_id = db.Column(db.Integer, db.ForeignKey("household.id"), nullable=True, index=True)
+
+    household = db.relationship("Household", backref="users", lazy=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        from .auth import hash_password
+
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
 
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
-
-
 class Month(db.Model):
+    __table_args__ = (
+        # Every page starts from the signed-in household's months, newest first
+        db.Index("ix_month_household_created", "household_id", "created_at"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
+    # Months (and the accounts, bills and incomes under them) belong to one household
+    household_id = db.Column(db.Integer, db.ForeignKey("household.id"), nullable=True)
     name = db.Column(db.String(50), nullable=False)
     archived = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Indexed for the newest-first months listing
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Cached sums of every account in the month, maintained by balances.py
+    total_bills = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    total_incomes = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    # Bumped by every change to the month or anything in it; keys the render cache in render_cache.py
+    version = db.Column(db.Integer, nullable=False, default=1)
 
     accounts = db.relationship("Account", backref="month", lazy=True, cascade="all, delete-orphan")
+    snapshot = db.relationship("MonthSnapshot", uselist=False, lazy=True, cascade="all, delete-orphan")
+
+    @hybrid_property
+    def remainder(self):
+        return self.total_incomes - self.total_bills
+
+
+class MonthSnapshot(db.Model):
+    """An archived month's accounts, bills and incomes as compressed JSON; see archive.py."""
+
+    __tablename__ = "month_snapshot"
+
+    month_id = db.Column(db.Integer, db.ForeignKey("month.id", ondelete="CASCADE"), primary_key=True)
+    format = db.Column(db.Integer, nullable=False, default=1)
+    # Deferred so listing snapshots never pulls the blobs
+    payload = db.deferred(db.Column(db.LargeBinary, nullable=False))
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
 class Account(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    month_id = db.Column(db.Integer, db.ForeignKey("month.id"), nullable=False)
+    month_id = db.Column(db.Integer, db.ForeignKey("month.id"), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     pos_x = db.Column(db.Integer, default=0)
     pos_y = db.Column(db.Integer, default=0)
     width = db.Column(db.Integer, default=300)
     height = db.Column(db.Integer, default=250)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Cached sums of the account's bills and incomes, maintained by balances.py
+    total_bills = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    total_incomes = db.Column(db.Numeric(12, 2), nullable=False, default=0)
 
     bills = db.relationship("Bill", backref="account", lazy=True, cascade="all, delete-orphan")
     incomes = db.relationship("Income", backref="account", lazy=True, cascade="all, delete-orphan")
 
+    @hybrid_property
+    def remainder(self):
+        return self.total_incomes - self.total_bills
+
 
 class Bill(db.Model):
+    __table_args__ = (
+        # Serves both "bills of an account" and per-account due date lookups
+        db.Index("ix_bill_account_id_due_date", "account_id", "due_date"),
+        # Only transfers carry a linked income, so leave the NULLs out of the index
+        db.Index(
+            "ix_bill_linked_income",
+            "linked_income_id",
+            sqlite_where=db.text("linked_income_id IS NOT NULL"),
+            postgresql_where=db.text("linked_income_id IS NOT NULL"),
+        ),
+        # Unpaid bills by due date across every month; bills without a due date never show there
+        db.Index(
+            "ix_bill_unpaid_due",
+            "is_paid",
+            "due_date",
+            sqlite_where=db.text("due_date IS NOT NULL"),
+            postgresql_where=db.text("due_date IS NOT NULL"),
+        ),
+        # One bill per occurrence of a recurring bill, which keeps materializing idempotent
+        db.Index(
+            "ux_bill_recurrence",
+            "recurring_bill_id",
+            "due_date",
+            unique=True,
+            sqlite_where=db.text("recurring_bill_id IS NOT NULL"),
+            postgresql_where=db.text("recurring_bill_id IS NOT NULL"),
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    account_id = db.Column(db.Integer, db.ForeignKey("account.id"), nullable=False)
-    linked_income_id = db.Column(db.Integer, db.ForeignKey("income.id"), nullable=True)
+    # active_history keeps the previous value on change so balances.py can apply deltas
+    account_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey("account.id"), nullable=False), active_history=True
+    )
+    linked_income_id = db.Column(db.Integer, db.ForeignKey("income.id", ondelete="SET NULL"), nullable=True)
+    recurring_bill_id = db.Column(db.Integer, db.ForeignKey("recurring_bill.id", ondelete="SET NULL"), nullable=True)
     name = db.Column(db.String(100), nullable=False)
-    amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    amount = db.column_property(db.Column(db.Numeric(12, 2), nullable=False, default=0), active_history=True)
     due_date = db.Column(db.Date, nullable=True)
     category = db.Column(db.String(50), default="general")
     is_paid = db.Column(db.Boolean, default=False)
     owner = db.Column(db.String(50), default="Shared")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    linked_income = db.relationship("Income", foreign_keys=[linked_income_id], uselist=False)
+    # The backref lets the ORM clear linked_income_id when a transfer's income is deleted,
+    # which SQLite enforces once foreign keys are switched on
+    linked_income = db.relationship(
+        "Income", foreign_keys=[linked_income_id], uselist=False, backref=db.backref("linked_bills", lazy=True)
+    )
 
 
 class Income(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    account_id = db.Column(db.Integer, db.ForeignKey("account.id"), nullable=False)
+    account_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey("account.id"), nullable=False, index=True), active_history=True
+    )
     name = db.Column(db.String(100), nullable=False)
-    amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    amount = db.column_property(db.Column(db.Numeric(12, 2), nullable=False, default=0), active_history=True)
     contributor = db.Column(db.String(50), default="Unknown")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class RecurringBill(db.Model):
+    """A bill that repeats on a schedule; recurrence.py materializes it into dated bills."""
+
+    __tablename__ = "recurring_bill"
+
+    id = db.Column(db.Integer, primary_key=True)
+    household_id = db.Column(db.Integer, db.ForeignKey("household.id"), nullable=True, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    category = db.Column(db.String(50), default="general")
+    owner = db.Column(db.String(50), default="Shared")
+    # Occurrences go to the account of this name in each month, which is created if missing
+    account_name = db.Column(db.String(100), nullable=False)
+    # "monthly", "weekly", "annual" or "nth_weekday", repeating every ``interval`` periods
+    frequency = db.Column(db.String(16), nullable=False, default="monthly")
+    interval = db.Column(db.Integer, nullable=False, default=1)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=True)
+    # For nth_weekday: 0 is Monday; week 1 to 5, or -1 for the last such weekday of the month
+    weekday = db.Column(db.Integer, nullable=True)
+    week_of_month = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    bills = db.relationship("Bill", backref="recurring_bill", lazy=True)
+    occurrences = db.relationship("RecurringOccurrence", lazy=True, cascade="all, delete-orphan")
+
+
+class RecurringOccurrence(db.Model):
+    """
+    A due date recurrence.py has materialized for a schedule. The row outlives its
+    bill, so deleting an occurrence keeps it from being materialized again.
+    """
+
+    __tablename__ = "recurring_occurrence"
+
+    recurring_bill_id = db.Column(db.Integer, db.ForeignKey("recurring_bill.id", ondelete="CASCADE"), primary_key=True)
+    due_date = db.Column(db.Date, primary_key=True)
+
+
+class Change(db.Model):
+    """
+    The latest change to one month, account, bill or income, numbered by ``version``;
+    a deleted item keeps a tombstone row. See changes.py.
+    """
+
+    __tablename__ = "change_log"
+    __table_args__ = (
+        # Each item has one row, replaced on every change
+        db.Index("ux_change_log_item", "resource", "item_id", unique=True),
+        # The feed reads a household's changes after a version
+        db.Index("ix_change_log_household_version", "household_id", "version"),
+        # Versions are never reused, even after the newest row is replaced
+        {"sqlite_autoincrement": True},
+    )
+
+    version = db.Column(db.Integer, primary_key=True)
+    household_id = db.Column(db.Integer, db.ForeignKey("household.id"), nullable=True)
+    # The API resource name: "months", "accounts", "bills" or "incomes"
+    resource = db.Column(db.String(20), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    month_id = db.Column(db.Integer, nullable=True)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,240 @@
+# recurrence.py
+"""
+Recurring bills: schedules and the materializer that turns them into dated bills.
+
+A ``RecurringBill`` describes a schedule (monthly, weekly, annual or the Nth
+weekday of a month, every ``interval`` periods, from ``start_date`` to an
+optional ``end_date``). ``materialize`` walks every schedule over a date range
+and bulk inserts the occurrences that are not there yet into the month each one
+falls in, among its household's months, creating the month ("March 2025") and
+the named account when missing.
+
+Runs are idempotent: occurrences are keyed by (schedule, due date), and every
+key materialized is kept in ``recurring_occurrence``. Known keys are read in one
+query and skipped, and a unique index on bills backs this up if two runs overlap.
+Because the key outlives the bill, an occurrence the user deleted stays deleted.
+Archived months are left alone and their occurrences are not recorded, so they
+are filled in once the month is restored. Bills stay plain bills once
+materialized, so they can be edited, paid or deleted like any other. Archiving
+and restoring a month keeps their schedule link, while duplicating a month
+copies them without it.
+"""
+
+from __future__ import annotations
+
+import calendar
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import NamedTuple
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import insert, select
+
+from . import balances, changes
+from .duplication import MONTH_NAME_FORMATS, parse_month_name
+from .extensions import db
+from .models import Account, Bill, Month, RecurringBill, RecurringOccurrence
+from .totals import ZERO
+
+FREQUENCIES = ("monthly", "weekly", "annual", "nth_weekday")
+MONTH_NAME = MONTH_NAME_FORMATS[0]
+
+# A schedule can never produce more occurrences than this per run
+MAX_OCCURRENCES = 1000
+
+
+class MaterializeReport(NamedTuple):
+    bills: int
+    months: int
+    accounts: int
+    # Occurrences that fell in archived months and were left out
+    skipped: int
+    amount: Decimal
+
+
+def validate(template: RecurringBill) -> None:
+    """Raise ValueError when the schedule cannot produce dates."""
+    # None means the column default, which is only filled in on insert
+    if template.frequency is not None and template.frequency not in FREQUENCIES:
+        raise ValueError(f"frequency must be one of {', '.join(FREQUENCIES)}")
+    if template.interval is not None and template.interval < 1:
+        raise ValueError("interval must be at least 1")
+    if template.start_date is None:
+        raise ValueError("start_date is required")
+    if template.end_date is not None and template.end_date < template.start_date:
+        raise ValueError("end_date is before start_date")
+    if template.frequency == "nth_weekday":
+        if template.weekday is None or not 0 <= template.weekday <= 6:
+            raise ValueError("weekday must be 0 (Monday) to 6 (Sunday)")
+        if template.week_of_month not in (1, 2, 3, 4, 5, -1):
+            raise ValueError("week_of_month must be 1 to 5, or -1 for the last")
+
+
+def nth_weekday(year: int, month: int, weekday: int, week: int) -> date | None:
+    """The ``week``-th ``weekday`` of a month (-1 for the last); None when the month has no such day."""
+    days = [d for d in calendar.Calendar().itermonthdates(year, month) if d.month == month and d.weekday() == weekday]
+    if week == -1:
+        return days[-1]
+    return days[week - 1] if week <= len(days) else None
+
+
+def _step(template: RecurringBill, n: int) -> relativedelta:
+    interval = template.interval * n
+    if template.frequency == "weekly":
+        return relativedelta(weeks=interval)
+    if template.frequency == "annual":
+        return relativedelta(years=interval)
+    return relativedelta(months=interval)
+
+
+def occurrences(template: RecurringBill, start: date, end: date) -> list[date]:
+    """Due dates of ``template`` between ``start`` and ``end``, both inclusive."""
+    last = min(end, template.end_date) if template.end_date else end
+    dates = []
+    # Each step is taken from the start date, so the 31st stays the 31st after a short month
+    for n in range(MAX_OCCURRENCES * 10):
+        anchor = template.start_date + _step(template, n)
+        if template.frequency == "nth_weekday":
+            due = nth_weekday(anchor.year, anchor.month, template.weekday, template.week_of_month)
+            if due is not None and due < template.start_date:
+                continue
+        else:
+            due = anchor
+        if anchor > last and (due is None or due > last):
+            break
+        if due is not None and start <= due <= last:
+            dates.append(due)
+            if len(dates) >= MAX_OCCURRENCES:
+                break
+    return dates
+
+
+def _months_by_period(periods: set[tuple]) -> dict[tuple, Month]:
+    """
+    The months whose names read as one of ``periods``, keyed by (household, year,
+    month); the newest wins when two share one.
+    """
+    if not periods:
+        return {}
+    households = {household for household, _, _ in periods}
+    in_household = Month.household_id.in_(households - {None})
+    if None in households:
+        in_household = db.or_(in_household, Month.household_id.is_(None))
+    # Names are parsed leniently, so SQL only narrows the candidates down to names holding
+    # the period's year and month abbreviation, which every full month name starts with
+    name = db.func.lower(Month.name)
+    in_period = [
+        db.and_(name.contains(str(year)), name.contains(date(year, month, 1).strftime("%b").lower()))
+        for year, month in {(year, month) for _, year, month in periods}
+    ]
+    candidates = Month.query.filter(in_household, db.or_(*in_period)).order_by(Month.created_at, Month.id)
+    months = {}
+    for month in candidates:
+        parsed = parse_month_name(month.name)
+        if parsed is None:
+            continue
+        key = (month.household_id, parsed[0].year, parsed[0].month)
+        if key in periods:
+            months[key] = month
+    return months
+
+
+def materialize(until: date, since: date | None = None) -> MaterializeReport:
+    """
+    Insert every occurrence due from ``since`` (default today) to ``until`` that is
+    not there yet. Nothing is committed here.
+    """
+    since = since or date.today()
+    if until < since:
+        raise ValueError("the end date is before the start date")
+    templates = (
+        RecurringBill.query.filter(
+            RecurringBill.start_date <= until,
+            db.or_(RecurringBill.end_date.is_(None), RecurringBill.end_date >= since),
+        )
+        .order_by(RecurringBill.id)
+        .all()
+    )
+    due = [(t, d) for t in templates for d in occurrences(t, since, until)]
+    if not due:
+        return MaterializeReport(0, 0, 0, 0, ZERO)
+
+    existing = set(
+        db.session.execute(
+            select(RecurringOccurrence.recurring_bill_id, RecurringOccurrence.due_date).where(
+                RecurringOccurrence.recurring_bill_id.in_({t.id for t, _ in due}),
+                RecurringOccurrence.due_date >= since,
+                RecurringOccurrence.due_date <= until,
+            )
+        ).all()
+    )
+    due = [(t, d) for t, d in due if (t.id, d) not in existing]
+    months = _months_by_period({(t.household_id, d.year, d.month) for t, d in due})
+    periods = {month.id: key for key, month in months.items()}
+    accounts = {}
+    if periods:
+        matching = Account.query.filter(
+            Account.month_id.in_(list(periods)), Account.name.in_({t.account_name for t, _ in due})
+        )
+        accounts = {(periods[a.month_id], a.name): a for a in matching}
+
+    new_months = new_accounts = skipped = 0
+    rows = []
+    for template, day in due:
+        # Each household's schedules fill in that household's months
+        period = (template.household_id, day.year, day.month)
+        month = months.get(period)
+        if month is None:
+            month = months[period] = Month(
+                name=day.replace(day=1).strftime(MONTH_NAME), household_id=template.household_id
+            )
+            db.session.add(month)
+            new_months += 1
+        if month.archived:
+            skipped += 1
+            continue
+        account = accounts.get((period, template.account_name))
+        if account is None:
+            account = accounts[(period, template.account_name)] = Account(month=month, name=template.account_name)
+            db.session.add(account)
+            new_accounts += 1
+        rows.append((account, template, day))
+
+    # New months and accounts need ids before the bills can point at them
+    db.session.flush()
+    bills = [
+        {
+            "account_id": account.id,
+            "recurring_bill_id": template.id,
+            "name": template.name,
+            "amount": template.amount,
+            "due_date": day,
+            "category": template.category or "general",
+            "owner": template.owner or "Shared",
+            "is_paid": False,
+        }
+        for account, template, day in rows
+    ]
+    if bills:
+        changes.record(Bill, db.session.scalars(insert(Bill).returning(Bill.id), bills))
+        db.session.execute(
+            insert(RecurringOccurrence),
+            [{"recurring_bill_id": template.id, "due_date": day} for _, template, day in rows],
+        )
+
+    by_account: dict[int, Decimal] = defaultdict(lambda: ZERO)
+    by_month: dict[int, Decimal] = defaultdict(lambda: ZERO)
+    for account, template, _ in rows:
+        by_account[account.id] += Decimal(str(template.amount))
+        by_month[account.month_id] += Decimal(str(template.amount))
+    balances.add_bulk(
+        {key: (amount, ZERO) for key, amount in by_account.items()},
+        {key: (amount, ZERO) for key, amount in by_month.items()},
+    )
+    return MaterializeReport(len(bills), new_months, new_accounts, skipped, sum(by_month.values(), ZERO))
+
+
+def horizon(months: int, today: date | None = None) -> date:
+    """The last day of the month ``months`` after the current one."""
+    return (today or date.today()) + relativedelta(months=months, day=31)
@@ -0,0 +1,247 @@
+# render_cache.py
+"""
+Cache of rendered month pages, invalidated by a per-month version counter.
+
+Every flush that touches a month, one of its accounts, or their bills and incomes
+bumps ``Month.version`` in the same transaction (bulk statements that bypass the
+session call ``bump_versions`` themselves). A cached page is keyed by month id,
+version and creation time, so a change never has to find and delete old entries:
+they simply stop being asked for and age out of the backend.
+
+The rendered page carries per-session CSRF tokens. They are swapped for a
+placeholder before the page is stored and the current request's token is put
+back when it is served. Requests with pending flash messages bypass the cache,
+since those are rendered into the page.
+
+Backends: an in-process LRU (the default) or a directory shared by every worker
+on the host. Set RENDER_CACHE to "memory", "filesystem" or "none".
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+
+from flask import Flask, current_app, make_response, request, session
+from sqlalchemy import event, select, update
+
+from . import households
+from .balances import loaded_parent, previous_value
+from .extensions import db
+from .models import Account, Bill, Income, Month
+
+CSRF_PLACEHOLDER = "\x00csrf\x00"
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class FileSystemCache:
+    """One file per entry, written atomically, so several worker processes can share it."""
+
+    # Trim the directory back to maxsize entries after this many writes
+    PRUNE_EVERY = 64
+
+    def __init__(self, directory: str, maxsize: int = 128):
+        self.directory = directory
+        self.maxsize = maxsize
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".html")
+
+    def get(self, key: str) -> str | None:
+        try:
+            with open(self._path(key), encoding="utf-8") as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(value)
+        os.replace(tmp, self._path(key))
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune()
+
+    def _prune(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".html"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    continue
+        entries.sort(reverse=True)
+        for _, path in entries[self.maxsize :]:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+    def clear(self) -> None:
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".html"):
+                os.remove(entry.path)
+
+
+def init_app(app: Flask) -> None:
+    kind = app.config.get("RENDER_CACHE", "memory")
+    size = app.config.get("RENDER_CACHE_SIZE", 128)
+    if kind == "memory":
+        backend = LRUCache(size)
+    elif kind == "filesystem":
+        directory = app.config.get("RENDER_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "finances-render-cache")
+        backend = FileSystemCache(directory, size)
+    elif kind == "none":
+        backend = None
+    else:
+        raise ValueError(f"RENDER_CACHE must be memory, filesystem or none, not {kind!r}")
+    app.extensions["render_cache"] = backend
+    app.extensions["render_cache_stamp"] = _template_stamp(app)
+
+
+def _template_stamp(app: Flask) -> str:
+    """Fingerprint the templates so a deploy never serves pages rendered by the old ones."""
+    folder = os.path.join(app.root_path, app.template_folder or "templates")
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(folder)):
+        stat = os.stat(os.path.join(folder, name))
+        digest.update(f"{name}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+    return digest.hexdigest()[:12]
+
+
+def _month_ids_for(session, obj) -> set[int]:
+    """Months whose page shows ``obj``, before and after the pending change."""
+    if isinstance(obj, Month):
+        return {obj.id} if obj.id is not None else set()
+    if isinstance(obj, Account):
+        month = loaded_parent(session, obj, "month", "month_id", Month)
+        ids = {month.id if month is not None else None, previous_value(obj, "month_id")}
+        return {i for i in ids if i is not None}
+    accounts = [loaded_parent(session, obj, "account", "account_id", Account)]
+    old_account_id = previous_value(obj, "account_id")
+    if old_account_id is not None:
+        accounts.append(session.get(Account, old_account_id))
+    return {a.month_id for a in accounts if a is not None and a.month_id is not None}
+
+
+@event.listens_for(db.session, "before_flush")
+def _bump_on_flush(session, flush_context, instances):
+    touched: set[int] = set()
+    with session.no_autoflush:
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if not isinstance(obj, (Month, Account, Bill, Income)):
+                continue
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            touched |= _month_ids_for(session, obj)
+        for month_id in touched:
+            month = session.get(Month, month_id)
+            if month is not None and month not in session.deleted:
+                # An SQL expression, so concurrent writers never hand out the same version twice
+                month.version = Month.version + 1
+
+
+def bump_versions(month_ids: Iterable[int]) -> None:
+    """Invalidate months changed by bulk statements that bypass the session's flush hooks."""
+    ids = sorted(set(month_ids))
+    if ids:
+        db.session.execute(update(Month).where(Month.id.in_(ids)).values(version=Month.version + 1))
+
+
+def _csrf_epoch() -> str:
+    """
+    Part of the ETag that rolls over within half the CSRF token lifetime, so a page
+    revalidated with 304 never holds tokens that have already expired.
+    """
+    limit = current_app.config.get("WTF_CSRF_TIME_LIMIT", 3600)
+    if not current_app.config.get("WTF_CSRF_ENABLED", True) or not limit:
+        return ""
+    return str(int(time.time() // max(limit // 2, 1)))
+
+
+def _csrf_token() -> str | None:
+    if not current_app.config.get("WTF_CSRF_ENABLED", True):
+        return None
+    from flask_wtf.csrf import generate_csrf
+
+    return generate_csrf()
+
+
+def _etag(key: str) -> str:
+    # Tie the tag to the session's CSRF secret, since the page embeds tokens derived from it
+    return hashlib.sha1(f"{key}:{session.get('csrf_token', '')}:{_csrf_epoch()}".encode()).hexdigest()
+
+
+def month_page(month_id: int, render: Callable[[], str]):
+    """
+    Serve a month page from the cache when its version is unchanged, rendering it otherwise.
+
+    Costs one indexed lookup of the month's version on a hit, and answers a matching
+    If-None-Match with 304 without touching the cache at all.
+    """
+    row = db.session.execute(
+        select(Month.version, Month.created_at).where(Month.id == month_id, households.owned_months())
+    ).first()
+    if row is None:
+        return make_response(render())
+    version, created_at = row
+    # SQLite reuses the id of a deleted last row, so creation time keeps keys unique; with a
+    # database per household, ids repeat across households too
+    stamp = created_at.timestamp() if created_at else 0
+    household = households.current_household_id()
+    key = f"month:{household}:{month_id}:{stamp}:{version}:{current_app.extensions['render_cache_stamp']}"
+    # Flashed messages are rendered into the page, so such a response is neither cached nor tagged
+    has_flashes = bool(session.get("_flashes"))
+
+    if not has_flashes and request.if_none_match.contains_weak(_etag(key)):
+        response = make_response("", 304)
+    else:
+        backend = current_app.extensions.get("render_cache")
+        cached = backend.get(key) if backend is not None and not has_flashes else None
+        token = _csrf_token()
+        if cached is not None:
+            body = cached.replace(CSRF_PLACEHOLDER, token) if token else cached
+            response = make_response(body)
+            response.headers["X-Render-Cache"] = "hit"
+        else:
+            body = render()
+            if backend is not None and not has_flashes:
+                backend.set(key, body.replace(token, CSRF_PLACEHOLDER) if token else body)
+            response = make_response(body)
+            response.headers["X-Render-Cache"] = "miss"
+    if not has_flashes:
+        # Computed again: rendering may have just created the session's CSRF token
+        response.set_etag(_etag(key), weak=True)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,151 @@
+# reports.py
+"""
+Cross-month reports over bill categories and owners and income contributors.
+
+All aggregation happens in the database: one grouped query per report sums every
+(month, key) pair as whole pence, and the Python side only pivots those few rows
+into per-month series. The cost therefore grows with the number of months and
+keys shown, not with the number of bills behind them.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import NamedTuple
+
+from sqlalchemy import func, select
+
+from .duplication import parse_month_name
+from .extensions import db
+from .models import Account, Bill, Income, Month
+from .totals import ZERO, from_cents, sum_cents
+
+NO_VALUE = "(none)"
+
+# Dimension -> (model summed, grouping column)
+DIMENSIONS = {
+    "category": (Bill, Bill.category),
+    "owner": (Bill, Bill.owner),
+    "contributor": (Income, Income.contributor),
+}
+
+
+class MonthRef(NamedTuple):
+    id: int
+    name: str
+    # (year, month) read from names like "March 2025", else from when the month was created
+    period: tuple[int, int]
+
+
+class Trend(NamedTuple):
+    dimension: str
+    months: list[MonthRef]
+    # Key -> one total per entry in ``months``
+    series: dict[str, list[Decimal]]
+    totals: list[Decimal]
+
+
+class Comparison(NamedTuple):
+    month: MonthRef
+    previous: MonthRef
+    # Key -> (this year, last year)
+    by_key: dict[str, tuple[Decimal, Decimal]]
+    total: tuple[Decimal, Decimal]
+
+    @property
+    def change(self) -> Decimal:
+        return self.total[0] - self.total[1]
+
+
+def month_period(name: str, created_at: datetime | None) -> tuple[int, int]:
+    parsed = parse_month_name(name)
+    if parsed is not None:
+        return parsed[0].year, parsed[0].month
+    created_at = created_at or datetime.utcnow()
+    return created_at.year, created_at.month
+
+
+def _dimension(dimension: str):
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"unknown report dimension {dimension!r}")
+    return DIMENSIONS[dimension]
+
+
+def report_months(month_ids: list[int] | None = None, owner=None) -> list[MonthRef]:
+    """
+    Live months in calendar order (ties broken by creation order), limited by the
+    ``owner`` criterion if given. Archived months have no live rows to report on.
+    """
+    stmt = (
+        select(Month.id, Month.name, Month.created_at)
+        .where(Month.archived.isnot(True))
+        .order_by(Month.created_at, Month.id)
+    )
+    if month_ids is not None:
+        stmt = stmt.where(Month.id.in_(month_ids))
+    if owner is not None:
+        stmt = stmt.where(owner)
+    months = [MonthRef(id, name, month_period(name, created_at)) for id, name, created_at in db.session.execute(stmt)]
+    return sorted(months, key=lambda m: m.period)
+
+
+def grouped_totals(dimension: str, month_ids: list[int] | None = None) -> dict[tuple[int, str], Decimal]:
+    """Return {(month id, key): total} for one dimension in a single grouped query."""
+    model, column = _dimension(dimension)
+    key = func.coalesce(func.nullif(func.trim(column), ""), NO_VALUE)
+    stmt = (
+        select(Account.month_id, key, sum_cents(model.amount))
+        .join(Account, model.account_id == Account.id)
+        .group_by(Account.month_id, key)
+    )
+    if month_ids is not None:
+        stmt = stmt.where(Account.month_id.in_(month_ids))
+    return {(month_id, k): from_cents(cents) for month_id, k, cents in db.session.execute(stmt)}
+
+
+def trend(dimension: str, month_ids: list[int] | None = None, owner=None) -> Trend:
+    months = report_months(month_ids, owner)
+    grouped = grouped_totals(dimension, [m.id for m in months] if owner is not None else month_ids)
+    overall: dict[str, Decimal] = defaultdict(lambda: ZERO)
+    for (_, k), total in grouped.items():
+        overall[k] += total
+    # Largest first, so the biggest categories head the table
+    keys = sorted(overall, key=lambda k: (-overall[k], k))
+    series = {k: [grouped.get((m.id, k), ZERO) for m in months] for k in keys}
+    totals = [sum((series[k][i] for k in keys), ZERO) for i in range(len(months))]
+    return Trend(dimension, months, series, totals)
+
+
+def year_over_year(dimension: str, month_ids: list[int] | None = None, owner=None) -> list[Comparison]:
+    """
+    Compare each month with the same calendar month a year earlier.
+
+    Months are matched on their period; when several months share one (for
+    example a month and its copy) the most recently created is used.
+    """
+    everything = report_months(owner=owner)
+    by_period = {m.period: m for m in everything}
+    wanted = set(month_ids) if month_ids is not None else None
+    pairs = []
+    for month in by_period.values():
+        previous = by_period.get((month.period[0] - 1, month.period[1]))
+        if previous is not None and (wanted is None or month.id in wanted):
+            pairs.append((month, previous))
+    if not pairs:
+        return []
+
+    grouped = grouped_totals(dimension, sorted({m.id for pair in pairs for m in pair}))
+    per_month: dict[int, dict[str, Decimal]] = defaultdict(dict)
+    for (month_id, key), total in grouped.items():
+        per_month[month_id][key] = total
+
+    comparisons = []
+    for month, previous in sorted(pairs, key=lambda pair: pair[0].period):
+        current, before = per_month[month.id], per_month[previous.id]
+        keys = sorted(set(current) | set(before))
+        by_key = {k: (current.get(k, ZERO), before.get(k, ZERO)) for k in keys}
+        total = (sum(current.values(), ZERO), sum(before.values(), ZERO))
+        comparisons.append(Comparison(month, previous, by_key, total))
+    return comparisons
@@ -1,7 +1,38 @@
-from dateutil.relativedelta import relativedelta
-from flask import Blueprint, flash, jsonify, redirect, render_template, request, url_for
+import io
+from datetime import date
+
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 from flask_login import current_user, login_required, login_user, logout_user
-
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
+
+from . import (
+    archive,
+    auth,
+    changes,
+    duplication,
+    exporter,
+    households,
+    importer,
+    listing,
+    render_cache,
+    reports,
+    search,
+    transfers,
+    upcoming,
+)
 from .extensions import db
 from .forms import AccountForm, BillForm, IncomeForm, LoginForm, MonthForm, RegistrationForm
 from .models import Account, Bill, Income, Month, User
@@ -27,6 +58,7 @@ def register():
             return redirect(url_for("main.register"))
         user = User(username=form.username.data)
         user.set_password(form.password.data)
+        households.create_household(user)
         db.session.add(user)
         db.session.commit()
         flash("User registered successfully.")
@@ -40,10 +72,16 @@ def login():
         return redirect(url_for("main.months"))
     form = LoginForm()
     if form.validate_on_submit():
-        user = User.query.filter_by(username=form.username.data).first()
-        if user is None or not user.check_password(form.password.data):
+        username = form.username.data
+        if auth.login_retry_after(username):
+            flash("Too many failed sign in attempts. Please try again later.")
+            return render_template("login.html", form=form), 429
+        user = User.query.filter_by(username=username).first()
+        if user is None or not auth.verify_password(user, form.password.data):
+            auth.record_login(username, success=False)
             flash("Invalid username or password.")
             return redirect(url_for("main.login"))
+        auth.record_login(username, success=True)
         login_user(user)
         return redirect(url_for("main.months"))
     return render_template("login.html", form=form)
@@ -61,19 +99,67 @@ def logout():
 def months():
     form = MonthForm()
     if form.validate_on_submit():
-        m = Month(name=form.name.data)
+        m = Month(name=form.name.data, household_id=households.current_household_id())
         db.session.add(m)
         db.session.commit()
         flash("Month created.")
         return redirect(url_for("main.months"))
-    months_list = Month.query.order_by(Month.created_at.desc()).all()
-    return render_template("months.html", form=form, months=months_list, month_edit_form=MonthForm())
+    filters = {
+        "q": request.args.get("q", "").strip(),
+        "since": _date_arg("since"),
+        "until": _date_arg("until"),
+        "archived": request.args.get("archived") == "1",
+    }
+    criteria = {
+        "search": filters["q"],
+        "archived": filters["archived"],
+        "since": filters["since"],
+        "until": filters["until"],
+        "limit": current_app.config.get("MONTHS_PAGE_SIZE", listing.DEFAULT_PAGE_SIZE),
+        "owner": households.owned_months(),
+    }
+    try:
+        page = listing.month_page(after=request.args.get("after"), **criteria)
+    except ValueError:
+        # A mangled cursor starts again from the newest month
+        page = listing.month_page(**criteria)
+    # Only the filters that are set, so page links stay short
+    query = {k: ("1" if v is True else v) for k, v in filters.items() if v}
+    return render_template(
+        "months.html",
+        form=form,
+        months=page.months,
+        next_cursor=page.next_cursor,
+        filters=filters,
+        query=query,
+        paged=bool(request.args.get("after")),
+        month_edit_form=MonthForm(),
+        show_archived=filters["archived"],
+    )
+
+
+def _date_arg(name):
+    try:
+        return date.fromisoformat(request.args.get(name, ""))
+    except ValueError:
+        return None
 
 
 @bp.route("/months/<int:month_id>", methods=["GET", "POST"])
 @login_required
 def month_details(month_id):
-    month = Month.query.get_or_404(month_id)
+    if request.method == "GET":
+        return render_cache.month_page(month_id, lambda: _month_details(month_id))
+    return _month_details(month_id)
+
+
+def _month_details(month_id):
+    month = households.get_or_404(Month, month_id)
+    if month.archived and month.snapshot is not None:
+        if request.method == "POST":
+            flash("This month is archived. Restore it to make changes.")
+            return redirect(url_for("main.month_details", month_id=month.id))
+        return render_template("archived_month.html", month=month, accounts=archive.archived_accounts(month))
     account_form = AccountForm(prefix="account")
     bill_form = BillForm(prefix="bill")
     income_form = IncomeForm(prefix="income")
@@ -84,31 +170,19 @@ def month_details(month_id):
     bill_edit_form = BillForm()  # Will be used in each bill modal
     income_edit_form = IncomeForm()  # Will be used in each income modal
 
-    # Gather all accounts for this month
-    accounts = Account.query.filter_by(month_id=month.id).all()
-
-    # Compute totals for each account
-    for acc in accounts:
-        total_bills = 0
-        total_incomes = 0
-        for b in acc.bills:
-            try:
-                total_bills += float(b.amount or 0)
-            except Exception:
-                total_bills += 0
-        for i in acc.incomes:
-            try:
-                total_incomes += float(i.amount or 0)
-            except Exception:
-                total_incomes += 0
-        acc.total_bills = total_bills
-        acc.total_incomes = total_incomes
-        acc.remainder = total_incomes - total_bills
+    # Gather all accounts for this month with their bills and incomes loaded up front,
+    # so rendering the cards does not lazy load each collection separately
+    accounts = (
+        Account.query.filter_by(month_id=month.id)
+        .options(
+            selectinload(Account.bills).selectinload(Bill.linked_income),
+            selectinload(Account.incomes),
+        )
+        .all()
+    )
 
     # Populate BillForm destination_account choices
-    dest_choices = [(0, "-- No Transfer --")]
-    for acc in accounts:
-        dest_choices.append((acc.id, acc.name))
+    dest_choices = _destination_choices((acc.id, acc.name) for acc in accounts)
     bill_form.destination_account.choices = dest_choices
     bill_edit_form.destination_account.choices = dest_choices
 
@@ -116,8 +190,7 @@ def month_details(month_id):
         new_acc = Account(month_id=month.id, name=account_form.name.data)
         db.session.add(new_acc)
         db.session.commit()
-        flash("Account added.")
-        return redirect(url_for("main.month_details", month_id=month.id))
+        return _after_change("Account added.", month.id)
 
     if bill_form.validate_on_submit() and "bill-submit" in request.form:
         account_id = request.form.get("account_id")
@@ -133,25 +206,11 @@ def month_details(month_id):
                 is_paid=bill_form.is_paid.data,
             )
             db.session.add(new_bill)
+            destination_id = bill_form.destination_account.data if bill_form.transfer.data else None
+            transfers.sync_transfer(new_bill, destination_id, {a.id: a for a in accounts})
             db.session.commit()
-            # Transfer logic...
-            if bill_form.transfer.data and bill_form.is_paid.data:
-                dest_id = bill_form.destination_account.data
-                if dest_id != 0 and dest_id != acc.id:
-                    dest_acc = Account.query.get(dest_id)
-                    if dest_acc and dest_acc.month_id == month.id:
-                        new_income = Income(
-                            account_id=dest_acc.id,
-                            name=f"Transfer from {acc.name}",
-                            amount=bill_form.amount.data,
-                            contributor=bill_form.owner.data,
-                        )
-                        db.session.add(new_income)
-                        db.session.commit()
-                        new_bill.linked_income_id = new_income.id
-                        db.session.commit()
-            flash("Bill added.")
-        return redirect(url_for("main.month_details", month_id=month.id))
+            return _after_change("Bill added.", month.id, [acc.id, destination_id])
+        return _rejected(month.id)
 
     if income_form.validate_on_submit() and "income-submit" in request.form:
         account_id = request.form.get("account_id")
@@ -165,9 +224,11 @@ def month_details(month_id):
             )
             db.session.add(new_income)
             db.session.commit()
-            flash("Income added.")
-        return redirect(url_for("main.month_details", month_id=month.id))
+            return _after_change("Income added.", month.id, [acc.id])
+        return _rejected(month.id)
 
+    if request.method == "POST" and _wants_fragment():
+        return _rejected(month.id)
     return render_template(
         "month_details.html",
         month=month,
@@ -182,78 +243,215 @@ def month_details(month_id):
     )
 
 
+def _destination_choices(accounts):
+    """Transfer destination choices for the bill forms from ``(id, name)`` pairs."""
+    return [(0, "-- No Transfer --"), *accounts]
+
+
+def _wants_fragment():
+    # Sent by the month page's script, which swaps the returned cards in place
+    return request.headers.get("X-Fragment") == "account-cards"
+
+
+def _account_cards(month_id, account_ids=None):
+    """
+    Render the cards of ``account_ids`` (every account of the month when None) on
+    their own. The ``X-Fragment-Scope`` header tells the page whether they replace
+    the whole board or only the cards with the same ids; an id with no card in the
+    response was deleted.
+    """
+    bill_form = BillForm(formdata=None, prefix="bill")
+    bill_edit_form = BillForm(formdata=None)
+    choices = _destination_choices(
+        db.session.execute(select(Account.id, Account.name).where(Account.month_id == month_id)).all()
+    )
+    bill_form.destination_account.choices = choices
+    bill_edit_form.destination_account.choices = choices
+    forms = {
+        "bill_form": bill_form,
+        "income_form": IncomeForm(formdata=None, prefix="income"),
+        "account_edit_form": AccountForm(formdata=None),
+        "bill_edit_form": bill_edit_form,
+        "income_edit_form": IncomeForm(formdata=None),
+    }
+
+    stmt = (
+        select(Account)
+        .where(Account.month_id == month_id)
+        .options(
+            selectinload(Account.bills).selectinload(Bill.linked_income),
+            selectinload(Account.incomes),
+        )
+    )
+    if account_ids is not None:
+        stmt = stmt.where(Account.id.in_({i for i in account_ids if i}))
+    cards = [render_template("_account_card.html", account=account, **forms) for account in db.session.scalars(stmt)]
+    response = Response("".join(cards), mimetype="text/html")
+    response.headers["X-Fragment-Scope"] = "board" if account_ids is None else "cards"
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def _after_change(message, month_id, account_ids=None):
+    """
+    Answer a successful edit on the month page: the changed cards for the page's
+    script, otherwise the usual flash and redirect back to the month.
+    """
+    if _wants_fragment():
+        return _account_cards(month_id, account_ids)
+    flash(message)
+    return redirect(url_for("main.month_details", month_id=month_id))
+
+
+def _rejected(month_id):
+    # The script falls back to submitting the form normally, which shows the errors
+    if _wants_fragment():
+        abort(400)
+    return redirect(url_for("main.month_details", month_id=month_id))
+
+
+@bp.route("/account/<int:account_id>/card")
+@login_required
+def account_card(account_id):
+    account = households.get_or_404(Account, account_id)
+    return _account_cards(account.month_id, [account.id])
+
+
+LAYOUT_FIELDS = {"pos_x": "x", "pos_y": "y", "width": "width", "height": "height"}
+
+
+def _parse_layout(data):
+    """Read a card's position and size from JSON, raising ValueError on anything non-numeric."""
+    try:
+        return {column: int(data.get(key)) for column, key in LAYOUT_FIELDS.items()}
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError("Invalid numeric data") from None
+
+
 @bp.route("/account/<int:account_id>/update_position", methods=["POST"])
 @login_required
 def update_account_position(account_id):
-    account = Account.query.get_or_404(account_id)
+    account = households.get_or_404(Account, account_id)
     data = request.get_json()
     if not data:
         return jsonify({"error": "No JSON data provided"}), 400
     try:
-        new_x = int(data.get("x"))
-        new_y = int(data.get("y"))
-        new_w = int(data.get("width"))
-        new_h = int(data.get("height"))
-    except (TypeError, ValueError):
-        return jsonify({"error": "Invalid numeric data"}), 400
+        layout = _parse_layout(data)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
 
-    account.pos_x = new_x
-    account.pos_y = new_y
-    account.width = new_w
-    account.height = new_h
+    for column, value in layout.items():
+        setattr(account, column, value)
     db.session.commit()
     return jsonify({"success": True})
 
 
+@bp.route("/months/<int:month_id>/layout", methods=["POST"])
+@login_required
+def update_month_layout(month_id):
+    """Save the position and size of many account cards in one transaction."""
+    month = households.get_or_404(Month, month_id)
+    data = request.get_json(silent=True)
+    cards = data.get("accounts") if isinstance(data, dict) else None
+    if not isinstance(cards, list) or not cards:
+        return jsonify({"error": "No account positions provided"}), 400
+    try:
+        params = {int(card["id"]): _parse_layout(card) for card in cards}
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Invalid numeric data"}), 400
+
+    known = set(db.session.scalars(db.select(Account.id).where(Account.month_id == month.id, Account.id.in_(params))))
+    if known != set(params):
+        return jsonify({"error": "Unknown account for this month"}), 404
+
+    db.session.execute(update(Account), [{"id": account_id, **layout} for account_id, layout in params.items()])
+    render_cache.bump_versions([month.id])
+    changes.record(Account, params)
+    db.session.commit()
+    return jsonify({"success": True, "updated": len(params)})
+
+
 @bp.route("/months/<int:month_id>/delete", methods=["POST"])
 @login_required
 def delete_month(month_id):
-    month = Month.query.get_or_404(month_id)
+    month = households.get_or_404(Month, month_id)
     db.session.delete(month)
     db.session.commit()
     flash("Month deleted.")
     return redirect(url_for("main.months"))
 
 
+@bp.route("/months/<int:month_id>/archive", methods=["POST"])
+@login_required
+def archive_month(month_id):
+    month = households.get_or_404(Month, month_id)
+    try:
+        archive.archive_month(month)
+    except ValueError as exc:
+        flash(str(exc))
+        return redirect(url_for("main.months"))
+    db.session.commit()
+    flash("Month archived.")
+    return redirect(url_for("main.months"))
+
+
+@bp.route("/months/<int:month_id>/restore", methods=["POST"])
+@login_required
+def restore_month(month_id):
+    month = households.get_or_404(Month, month_id)
+    try:
+        archive.restore_month(month)
+    except ValueError as exc:
+        flash(str(exc))
+        return redirect(url_for("main.months", archived=1))
+    db.session.commit()
+    flash("Month restored.")
+    return redirect(url_for("main.month_details", month_id=month.id))
+
+
 @bp.route("/months/<int:month_id>/duplicate", methods=["POST"])
 @login_required
 def duplicate_month(month_id):
-    month = Month.query.get_or_404(month_id)
-    new_month = Month(name=month.name + " (Copy)")
-    db.session.add(new_month)
-    db.session.commit()
-    for acc in month.accounts:
-        new_acc = Account(
-            month_id=new_month.id, name=acc.name, pos_x=acc.pos_x, pos_y=acc.pos_y, width=acc.width, height=acc.height
-        )
-        db.session.add(new_acc)
-        db.session.commit()
-        for b in acc.bills:
-            new_due_date = b.due_date + relativedelta(months=1) if b.due_date else None
-            copy_bill = Bill(
-                account_id=new_acc.id,
-                name=b.name,
-                amount=b.amount,
-                due_date=new_due_date,
-                category=b.category,
-                is_paid=b.is_paid,
-                owner=b.owner,
-            )
-            db.session.add(copy_bill)
-        for i in acc.incomes:
-            copy_income = Income(account_id=new_acc.id, name=i.name, amount=i.amount, contributor=i.contributor)
-            db.session.add(copy_income)
+    month = households.get_or_404(Month, month_id)
+    if month.archived and month.snapshot is not None:
+        flash("Restore an archived month before duplicating it.")
+        return redirect(url_for("main.months", archived=1))
+    duplication.duplicate_month(month)
     db.session.commit()
     flash("Month duplicated successfully.")
     return redirect(url_for("main.months"))
 
 
+def _export_response(fmt, month_id, filename):
+    if fmt not in exporter.FORMATS:
+        abort(404)
+    _, mimetype = exporter.FORMATS[fmt]
+    # stream_with_context keeps the app context (and its database session) alive while the body is sent
+    body = stream_with_context(exporter.stream(fmt, month_id, owner=households.owned_months()))
+    return Response(
+        body, mimetype=mimetype, headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
+
+
+@bp.route("/months/export.<fmt>")
+@login_required
+def export_all_months(fmt):
+    return _export_response(fmt, None, "finances")
+
+
+@bp.route("/months/<int:month_id>/export.<fmt>")
+@login_required
+def export_month(month_id, fmt):
+    households.get_or_404(Month, month_id)
+    return _export_response(fmt, month_id, f"month-{month_id}")
+
+
 @bp.route("/months/<int:month_id>/edit", methods=["GET", "POST"])
 @login_required
 def edit_month(month_id):
     from .forms import MonthForm
 
-    month = Month.query.get_or_404(month_id)
+    month = households.get_or_404(Month, month_id)
     form = MonthForm(obj=month)
     if form.validate_on_submit():
         month.name = form.name.data
@@ -266,11 +464,39 @@ def edit_month(month_id):
 @bp.route("/account/<int:account_id>/delete", methods=["POST"])
 @login_required
 def delete_account(account_id):
-    account = Account.query.get_or_404(account_id)
+    account = households.get_or_404(Account, account_id)
     month_id = account.month_id
+    transfers.remove_account_transfers(account)
     db.session.delete(account)
     db.session.commit()
-    flash("Account deleted.")
+    # Its transfers into other accounts go with it, so every card is rendered again
+    return _after_change("Account deleted.", month_id)
+
+
+@bp.route("/account/<int:account_id>/import", methods=["POST"])
+@login_required
+def import_transactions(account_id):
+    account = households.get_or_404(Account, account_id)
+    month_id = account.month_id
+    upload = request.files.get("file")
+    if upload is None or not upload.filename:
+        flash("Choose a CSV or OFX file to import.")
+        return redirect(url_for("main.month_details", month_id=month_id))
+
+    # Werkzeug spools large uploads to disk, and the importer reads them line by line
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+    try:
+        report = importer.import_file(account, stream, importer.detect_format(upload.filename))
+    except importer.ImportInterruptedError as exc:
+        if exc.report.imported:
+            # Importing the whole file again would add these rows twice
+            flash(f"Import stopped part way: the rest of the file could not be read. {exc.report} before that point.")
+        else:
+            flash("That file could not be read as CSV or OFX text.")
+        return redirect(url_for("main.month_details", month_id=month_id))
+    flash(f"Import finished: {report}.")
+    for error in report.errors[:5]:
+        flash(f"Line {error.line}: {error.message}")
     return redirect(url_for("main.month_details", month_id=month_id))
 
 
@@ -279,29 +505,28 @@ def delete_account(account_id):
 def edit_account(account_id):
     from .forms import AccountForm
 
-    account = Account.query.get_or_404(account_id)
+    account = households.get_or_404(Account, account_id)
     form = AccountForm(obj=account)
     if form.validate_on_submit():
         account.name = form.name.data
         db.session.commit()
-        flash("Account updated.")
-        return redirect(url_for("main.month_details", month_id=account.month_id))
+        # The name is also listed in every card's transfer destinations
+        return _after_change("Account updated.", account.month_id)
+    if request.method == "POST" and _wants_fragment():
+        abort(400)
     return render_template("edit_account.html", form=form, account=account)
 
 
 @bp.route("/bill/<int:bill_id>/delete", methods=["POST"])
 @login_required
 def delete_bill(bill_id):
-    bill = Bill.query.get_or_404(bill_id)
+    bill = households.get_or_404(Bill, bill_id)
     month_id = bill.account.month_id
-    if bill.linked_income_id:
-        inc = Income.query.get(bill.linked_income_id)
-        if inc:
-            db.session.delete(inc)
+    changed = [bill.account_id, bill.linked_income.account_id if bill.linked_income else None]
+    transfers.remove_transfer(bill)
     db.session.delete(bill)
     db.session.commit()
-    flash("Bill deleted.")
-    return redirect(url_for("main.month_details", month_id=month_id))
+    return _after_change("Bill deleted.", month_id, changed)
 
 
 @bp.route("/bill/<int:bill_id>/edit", methods=["GET", "POST"])
@@ -309,17 +534,16 @@ def delete_bill(bill_id):
 def edit_bill(bill_id):
     from .forms import BillForm
 
-    bill = Bill.query.get_or_404(bill_id)
+    bill = households.get_or_404(Bill, bill_id)
     form = BillForm(obj=bill)
 
     # Populate destination account choices for transfers:
     accounts = Account.query.filter_by(month_id=bill.account.month_id).all()
-    dest_choices = [(0, "-- No Transfer --")]
-    for acc in accounts:
-        dest_choices.append((acc.id, acc.name))
-    form.destination_account.choices = dest_choices
+    form.destination_account.choices = _destination_choices((acc.id, acc.name) for acc in accounts)
 
     if form.validate_on_submit():
+        # The transfer may move from one account to another, and both cards change
+        changed = [bill.account_id, bill.linked_income.account_id if bill.linked_income else None]
         # Update basic fields
         bill.name = form.name.data
         bill.amount = form.amount.data
@@ -327,70 +551,31 @@ def edit_bill(bill_id):
         bill.category = form.category.data
         bill.owner = form.owner.data
         bill.is_paid = form.is_paid.data
+        # The bill and its transfer income are saved together
+        destination_id = form.destination_account.data if form.transfer.data else None
+        transfers.sync_transfer(bill, destination_id, {a.id: a for a in accounts})
         db.session.commit()
+        if bill.linked_income is not None:
+            changed.append(bill.linked_income.account_id)
+        return _after_change("Bill updated.", bill.account.month_id, changed)
 
-        # Process transfer logic:
-        if form.transfer.data and bill.is_paid:
-            dest_id = form.destination_account.data
-            if dest_id != 0 and dest_id != bill.account_id:
-                if bill.linked_income_id:
-                    inc = Income.query.get(bill.linked_income_id)
-                    if inc:
-                        if inc.account_id != dest_id:
-                            inc.account_id = dest_id
-                        inc.amount = bill.amount
-                        inc.contributor = bill.owner
-                        inc.name = f"Transfer from {bill.account.name}"
-                        db.session.commit()
-                else:
-                    dest_acc = Account.query.get(dest_id)
-                    if dest_acc and dest_acc.month_id == bill.account.month_id:
-                        new_inc = Income(
-                            account_id=dest_acc.id,
-                            name=f"Transfer from {bill.account.name}",
-                            amount=bill.amount,
-                            contributor=bill.owner,
-                        )
-                        db.session.add(new_inc)
-                        db.session.commit()
-                        bill.linked_income_id = new_inc.id
-                        db.session.commit()
-            else:
-                if bill.linked_income_id:
-                    inc = Income.query.get(bill.linked_income_id)
-                    if inc:
-                        db.session.delete(inc)
-                    bill.linked_income_id = None
-                    db.session.commit()
-        else:
-            if bill.linked_income_id:
-                inc = Income.query.get(bill.linked_income_id)
-                if inc:
-                    db.session.delete(inc)
-                bill.linked_income_id = None
-                db.session.commit()
-
-        flash("Bill updated.")
-        return redirect(url_for("main.month_details", month_id=bill.account.month_id))
-    else:
-        print("DEBUG: Bill form did NOT validate.")
-        print("DEBUG: form.errors =", form.errors)
-
+    if request.method == "POST" and _wants_fragment():
+        abort(400)
     return render_template("edit_bill.html", form=form, bill=bill)
 
 
 @bp.route("/income/<int:income_id>/delete", methods=["POST"])
 @login_required
 def delete_income(income_id):
-    income = Income.query.get_or_404(income_id)
+    income = households.get_or_404(Income, income_id)
     month_id = income.account.month_id
     linked_bills = Bill.query.filter_by(linked_income_id=income_id).all()
+    changed = [income.account_id, *(b.account_id for b in linked_bills)]
     for b in linked_bills:
         b.linked_income_id = None
     db.session.delete(income)
     db.session.commit()
-    flash("Income deleted.")
-    return redirect(url_for("main.month_details", month_id=month_id))
+    return _after_change("Income deleted.", month_id, changed)
 
 
 @bp.route("/income/<int:income_id>/edit", methods=["GET", "POST"])
@@ -398,18 +583,67 @@ def delete_income(income_id):
 def edit_income(income_id):
     from .forms import IncomeForm
 
-    income = Income.query.get_or_404(income_id)
+    income = households.get_or_404(Income, income_id)
     form = IncomeForm(obj=income)
     if form.validate_on_submit():
         income.name = form.name.data
         income.amount = form.amount.data
         income.contributor = form.contributor.data
         db.session.commit()
-        flash("Income updated.")
-        return redirect(url_for("main.month_details", month_id=income.account.month_id))
+        return _after_change("Income updated.", income.account.month_id, [income.account_id])
+    if request.method == "POST" and _wants_fragment():
+        abort(400)
     return render_template("edit_income.html", form=form, income=income)
 
 
+@bp.route("/reports")
+@login_required
+def reports_page():
+    dimension = request.args.get("dimension", "category")
+    if dimension not in reports.DIMENSIONS:
+        abort(404)
+    return render_template(
+        "reports.html",
+        dimension=dimension,
+        dimensions=list(reports.DIMENSIONS),
+        trend=reports.trend(dimension, owner=households.owned_months()),
+        comparisons=reports.year_over_year(dimension, owner=households.owned_months()),
+    )
+
+
+@bp.route("/due")
+@login_required
+def due_page():
+    days = request.args.get("days", upcoming.DEFAULT_DAYS, type=int)
+    today, until = upcoming.window(days)
+    overdue, due = upcoming.split_overdue(
+        upcoming.due_bills(until, limit=upcoming.MAX_ROWS, owner=households.owned_months()), today
+    )
+    return render_template(
+        "due.html",
+        days=(until - today).days + 1,
+        today=today,
+        until=until,
+        overdue=overdue,
+        due=due,
+        truncated=len(overdue) + len(due) >= upcoming.MAX_ROWS,
+    )
+
+
+@bp.route("/search")
+@login_required
+def search_page():
+    query = request.args.get("q", "").strip()
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    try:
+        page = search.search(query, offset=offset, owner=households.owned_months())
+    except ValueError as exc:
+        flash(str(exc))
+        page = search.search(query, owner=households.owned_months())
+        offset = 0
+    return render_template("search.html", query=query, hits=page.hits, offset=offset, next_offset=page.next_offset)
+
+
 @bp.route("/health")
 def health():
     try:
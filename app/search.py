@@ -0,0 +1,192 @@
+# search.py
+"""
+Full-text search over bills and incomes in every month.
+
+On SQLite the text lives in two FTS5 tables, ``bill_fts`` (name, category, owner)
+and ``income_fts`` (name, contributor). They index the bill and income tables as
+external content, so they hold only the index, and triggers on those tables keep
+them in step with every insert, update and delete, bulk statements included. A
+query matches both indexes, ranks the hits with bm25 and joins only the matching
+rows back to their account and month, so it costs the same however many months
+there are. Other backends, and databases whose SQLite lacks FTS5, fall back to a
+case-insensitive LIKE over the same columns, newest first.
+
+Each search term matches as a prefix ("insur" finds "Insurance"), and every term
+has to match. Archived months keep their rows in a snapshot and are not searched.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import date
+from decimal import Decimal
+from typing import NamedTuple
+
+from sqlalchemy import Connection, and_, column, func, inspect, literal, literal_column, null, or_, select, table, text
+
+from .extensions import db
+from .listing import contains
+from .models import Account, Bill, Income, Month
+
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 100
+# Ranked results are sorted in full before a page is cut, so deep pages are refused
+MAX_OFFSET = 1000
+
+# Indexed columns of each searchable model
+INDEXED = {
+    "bill": (Bill, ("name", "category", "owner")),
+    "income": (Income, ("name", "contributor")),
+}
+
+_TERM = re.compile(r"\w+")
+
+
+class SearchHit(NamedTuple):
+    kind: str  # "bill" or "income"
+    id: int
+    name: str
+    amount: Decimal
+    category: str | None
+    owner: str | None
+    contributor: str | None
+    due_date: date | None
+    is_paid: bool | None
+    account_id: int
+    account: str
+    month_id: int
+    month: str
+
+
+class SearchPage(NamedTuple):
+    hits: list[SearchHit]
+    # Pass back as ``offset`` for the next page; None on the last page
+    next_offset: int | None
+
+
+def _fts_table(kind: str):
+    _, columns = INDEXED[kind]
+    return table(f"{kind}_fts", column("rowid"), *(column(name) for name in columns))
+
+
+def create_index(conn: Connection) -> bool:
+    """
+    Create the FTS5 tables and their triggers and index the existing rows.
+
+    Returns False, leaving searches on the LIKE fallback, when the database is not
+    SQLite or its SQLite was built without FTS5.
+    """
+    if conn.dialect.name != "sqlite" or not conn.scalar(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")):
+        return False
+    for kind, (model, columns) in INDEXED.items():
+        source, fts = model.__tablename__, f"{kind}_fts"
+        names = ", ".join(columns)
+        new = ", ".join(f"new.{name}" for name in columns)
+        old = ", ".join(f"old.{name}" for name in columns)
+        remove = f"INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+        add = f"INSERT INTO {fts} (rowid, {names}) VALUES (new.id, {new});"
+        conn.execute(
+            text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{source}', "
+                "content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+        )
+        conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {source} BEGIN {add} END"))
+        conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {source} BEGIN {remove} END"))
+        # Only edits to indexed columns touch the index, so ticking a bill paid costs nothing extra
+        conn.execute(
+            text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} ON {source} "
+                f"BEGIN {remove} {add} END"
+            )
+        )
+        conn.execute(text(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')"))
+    return True
+
+
+def terms(query: str) -> list[str]:
+    return _TERM.findall(query or "")
+
+
+def _match(words: list[str]) -> str:
+    # Quoted so FTS5 operators and column filters typed by the user are taken as plain text
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+def _fts_ready() -> bool:
+    bind_arguments = {"mapper": inspect(Bill)}
+    if db.session.get_bind(**bind_arguments).dialect.name != "sqlite":
+        return False
+    found = db.session.scalar(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bill_fts'"), bind_arguments=bind_arguments
+    )
+    return found is not None
+
+
+def _hits(kind: str, rank, source=None):
+    """The SearchHit columns for ``kind`` rows, joined up to their month, plus ``rank``."""
+    model, _ = INDEXED[kind]
+    source = model.__table__ if source is None else source
+    bill = model is Bill
+    columns = {
+        "kind": literal(kind),
+        "id": model.id,
+        "name": model.name,
+        "amount": model.amount,
+        "category": Bill.category if bill else null(),
+        "owner": Bill.owner if bill else null(),
+        "contributor": null() if bill else Income.contributor,
+        "due_date": Bill.due_date if bill else null(),
+        "is_paid": Bill.is_paid if bill else null(),
+        "account_id": Account.id,
+        "account": Account.name,
+        "month_id": Month.id,
+        "month": Month.name,
+        "rank": rank,
+    }
+    # Labelled alike in both halves of the union so the ORDER BY can name them
+    stmt = select(*(value.label(name) for name, value in columns.items()))
+    return (
+        stmt.select_from(source).join(Account, model.account_id == Account.id).join(Month, Account.month_id == Month.id)
+    )
+
+
+def _statement(words: list[str], fts: bool, owner=None):
+    parts = []
+    if fts:
+        match = _match(words)
+        for kind, (model, _) in INDEXED.items():
+            index_table = _fts_table(kind)
+            index = literal_column(index_table.name)
+            source = index_table.join(model, model.id == index_table.c.rowid)
+            parts.append(_hits(kind, func.bm25(index), source).where(index.op("MATCH")(match)))
+        order = [literal_column("rank"), literal_column("kind"), literal_column("id")]
+    else:
+        for kind, (model, columns) in INDEXED.items():
+            matches = [or_(*(contains(getattr(model, name), word) for name in columns)) for word in words]
+            parts.append(_hits(kind, literal(0)).where(and_(*matches)))
+        order = [literal_column("month_id").desc(), literal_column("kind"), literal_column("id").desc()]
+    if owner is not None:
+        parts = [part.where(owner) for part in parts]
+    return parts[0].union_all(*parts[1:]).order_by(*order)
+
+
+def search(query: str, limit: int = DEFAULT_LIMIT, offset: int = 0, owner=None) -> SearchPage:
+    """
+    Return one page of bills and incomes matching ``query``, best matches first.
+
+    ``owner`` is an optional criterion on Month such as ``households.owned_months()``.
+    Raises ValueError for an offset past MAX_OFFSET.
+    """
+    if offset > MAX_OFFSET:
+        raise ValueError(f"Only the first {MAX_OFFSET} results can be paged through")
+    words = terms(query)
+    if not words:
+        return SearchPage([], None)
+
+    # One extra row tells whether there is a next page
+    stmt = _statement(words, _fts_ready(), owner).limit(limit + 1).offset(offset)
+    rows = [SearchHit(*row[:-1]) for row in db.session.execute(stmt)]
+    if len(rows) <= limit:
+        return SearchPage(rows, None)
+    return SearchPage(rows[:limit], offset + limit)
@@ -0,0 +1,66 @@
+# totals.py
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import NamedTuple
+
+from sqlalchemy import func, select
+
+from .extensions import db
+from .models import Account, Bill, Income
+
+ZERO = Decimal("0.00")
+
+
+class AccountTotals(NamedTuple):
+    total_bills: Decimal
+    total_incomes: Decimal
+
+    @property
+    def remainder(self) -> Decimal:
+        return self.total_incomes - self.total_bills
+
+
+def sum_cents(column):
+    """
+    Sum a money column as whole pence.
+
+    SQLite stores ``Numeric`` values as floating point, so summing them directly
+    accumulates binary rounding error. Rounding each row to an integer number of
+    pence first keeps the aggregate exact on every backend.
+    """
+    return func.sum(func.round(column * 100))
+
+
+def from_cents(value) -> Decimal:
+    if value is None:
+        return ZERO
+    return (Decimal(int(value)) / 100).quantize(ZERO)
+
+
+def account_totals(month_id: int | None = None) -> dict[int, AccountTotals]:
+    """
+    Return bill and income totals for every account in a month, or in every month.
+
+    Both sums are computed by the database in a single statement: each side is
+    grouped by account in a subquery and outer joined onto the accounts, so
+    accounts without bills or incomes still appear with zero totals.
+    """
+    bill_sums = select(Bill.account_id, sum_cents(Bill.amount).label("total")).group_by(Bill.account_id)
+    income_sums = select(Income.account_id, sum_cents(Income.amount).label("total")).group_by(Income.account_id)
+    stmt = select(Account.id)
+    if month_id is not None:
+        bill_sums = bill_sums.join(Account, Account.id == Bill.account_id).where(Account.month_id == month_id)
+        income_sums = income_sums.join(Account, Account.id == Income.account_id).where(Account.month_id == month_id)
+        stmt = stmt.where(Account.month_id == month_id)
+    bill_sums = bill_sums.subquery()
+    income_sums = income_sums.subquery()
+    stmt = (
+        stmt.add_columns(bill_sums.c.total, income_sums.c.total)
+        .outerjoin(bill_sums, bill_sums.c.account_id == Account.id)
+        .outerjoin(income_sums, income_sums.c.account_id == Account.id)
+    )
+    return {
+        account_id: AccountTotals(from_cents(bills), from_cents(incomes))
+        for account_id, bills, incomes in db.session.execute(stmt)
+    }
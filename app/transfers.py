@@ -0,0 +1,93 @@
+# transfers.py
+"""
+Transfer bills and the income they create in the destination account.
+
+A paid bill marked as a transfer owns one linked ``Income`` in another account of
+the same month. These helpers create, move, update or remove that income inside
+the caller's transaction. The bill points at its income through the relationship,
+so both rows are written by the same flush and the caller commits once: no other
+worker can see a transfer bill without its income.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+from .extensions import db
+from .models import Account, Bill, Income
+
+
+def income_name(source: Account) -> str:
+    return f"Transfer from {source.name}"
+
+
+def _account(bill: Bill) -> Account | None:
+    # The relationship can still hold the old account after account_id was set directly
+    if bill.account is not None and bill.account.id == bill.account_id:
+        return bill.account
+    return db.session.get(Account, bill.account_id) if bill.account_id is not None else None
+
+
+def _destination(source: Account, destination_id: int | None, accounts: Mapping[int, Account] | None):
+    """Return the destination account, or None when it is missing, the source itself or in another month."""
+    if not destination_id or destination_id == source.id:
+        return None
+    destination = accounts.get(destination_id) if accounts is not None else None
+    if destination is None:
+        destination = db.session.get(Account, destination_id)
+    if destination is None or destination.month_id != source.month_id:
+        return None
+    return destination
+
+
+def remove_transfer(bill: Bill) -> None:
+    """Delete the bill's linked income, if any, and unlink it."""
+    income = bill.linked_income
+    bill.linked_income = None
+    if income is not None:
+        db.session.delete(income)
+
+
+def remove_account_transfers(account: Account) -> None:
+    """Delete the incomes the account's bills put in other accounts, before the account goes."""
+    for bill in account.bills:
+        remove_transfer(bill)
+
+
+def sync_transfer(
+    bill: Bill, destination_id: int | None, accounts: Mapping[int, Account] | None = None
+) -> Income | None:
+    """
+    Make the bill's linked income match the bill and return it.
+
+    ``destination_id`` is the account the money goes to, or None/0 when the bill
+    is not a transfer. Only paid bills transfer. An invalid destination removes
+    the transfer. ``accounts`` may map ids to already loaded accounts of the month
+    to save a lookup. Nothing is committed.
+    """
+    source = _account(bill)
+    destination = _destination(source, destination_id, accounts) if source is not None and bill.is_paid else None
+    if destination is None:
+        remove_transfer(bill)
+        return None
+
+    income = bill.linked_income
+    if income is None:
+        income = Income()
+        db.session.add(income)
+        bill.linked_income = income
+    # Set the key rather than the relationship: the balance hooks read moves from account_id
+    income.account_id = destination.id
+    income.name = income_name(source)
+    income.amount = bill.amount
+    income.contributor = bill.owner
+    return income
+
+
+def refresh_transfer(bill: Bill) -> Income | None:
+    """
+    Bring a transfer's income in line with its edited bill, keeping its destination,
+    for writes such as the API's that name no destination. Nothing is committed.
+    """
+    income = bill.linked_income
+    return sync_transfer(bill, income.account_id if income is not None else None)
@@ -0,0 +1,154 @@
+# upcoming.py
+"""
+Unpaid bills by due date across every month: the due page, the API and an ICS feed.
+
+All three read one query over ``bill`` filtered on ``is_paid`` and a due date
+range. The partial index ``ix_bill_unpaid_due`` on ``(is_paid, due_date)`` (bills
+without a due date left out) answers it as a range scan in due date order, so
+the cost follows the number of bills in the window rather than the number of
+bills ever entered. The calendar is written while the rows are fetched in
+chunks, like the exports, so a long window never sits in memory at once.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import NamedTuple
+
+from sqlalchemy import false, select
+
+from .extensions import db
+from .models import Account, Bill, Month
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+# Rows shown on the page and per API call; years of unpaid bills should not all render at once
+MAX_ROWS = 500
+CHUNK_SIZE = 500
+
+
+class DueBill(NamedTuple):
+    id: int
+    name: str
+    amount: Decimal
+    due_date: date
+    category: str
+    owner: str
+    account_id: int
+    account: str
+    month_id: int
+    month: str
+
+
+def _statement(since: date | None, until: date, owner=None):
+    stmt = (
+        select(
+            Bill.id,
+            Bill.name,
+            Bill.amount,
+            Bill.due_date,
+            Bill.category,
+            Bill.owner,
+            Account.id,
+            Account.name,
+            Month.id,
+            Month.name,
+        )
+        .join(Account, Bill.account_id == Account.id)
+        .join(Month, Account.month_id == Month.id)
+        # "= false" rather than "IS false", which the index cannot serve
+        .where(Bill.is_paid == false(), Bill.due_date <= until)
+        .order_by(Bill.due_date, Bill.id)
+    )
+    if since is not None:
+        stmt = stmt.where(Bill.due_date >= since)
+    if owner is not None:
+        stmt = stmt.where(owner)
+    return stmt
+
+
+def due_bills(until: date, since: date | None = None, limit: int | None = None, owner=None) -> list[DueBill]:
+    """
+    Unpaid bills due from ``since`` (or any time before, when None) to ``until``,
+    soonest first; ``owner`` is an optional criterion on Month.
+    """
+    stmt = _statement(since, until, owner)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [DueBill(*row) for row in db.session.execute(stmt)]
+
+
+def window(days: int, today: date | None = None) -> tuple[date, date]:
+    """Today and the last day of a ``days`` long window, with ``days`` clamped to 1..MAX_DAYS."""
+    today = today or date.today()
+    return today, today + timedelta(days=min(max(days, 1), MAX_DAYS) - 1)
+
+
+def split_overdue(bills: list[DueBill], today: date) -> tuple[list[DueBill], list[DueBill]]:
+    overdue = [b for b in bills if b.due_date < today]
+    return overdue, bills[len(overdue) :]
+
+
+# ICS
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    """Split a content line into 75 octet pieces as RFC 5545 requires."""
+    data = line.encode()
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start, size = [], 0, 75
+    while start < len(data):
+        end = min(start + size, len(data))
+        # Never cut a UTF-8 sequence in half
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode())
+        start, size = end, 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _event(bill: DueBill, stamp: str, host: str) -> str:
+    lines = (
+        "BEGIN:VEVENT",
+        f"UID:bill-{bill.id}@{host}",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART;VALUE=DATE:{bill.due_date:%Y%m%d}",
+        f"DTEND;VALUE=DATE:{bill.due_date + timedelta(days=1):%Y%m%d}",
+        "SUMMARY:" + _escape(f"{bill.name} £{bill.amount:.2f}"),
+        "DESCRIPTION:" + _escape(f"{bill.month} / {bill.account} ({bill.category}, {bill.owner})"),
+        "TRANSP:TRANSPARENT",
+        "END:VEVENT",
+    )
+    return "".join(_fold(line) for line in lines)
+
+
+def calendar(
+    until: date,
+    since: date | None = None,
+    host: str = "finances-tracker",
+    chunk_size: int = CHUNK_SIZE,
+    owner=None,
+) -> Iterator[str]:
+    """Yield an iCalendar document of the unpaid bills in the window, one string per chunk of rows."""
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    yield "".join(
+        _fold(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//Finances Tracker//Bills due//EN",
+            "CALSCALE:GREGORIAN",
+            "X-WR-CALNAME:Bills due",
+        )
+    )
+    result = db.session.execute(_statement(since, until, owner).execution_options(yield_per=chunk_size))
+    for chunk in result.partitions():
+        yield "".join(_event(DueBill(*row), stamp, host) for row in chunk)
+    yield "END:VCALENDAR\r\n"
@@ -0,0 +1,331 @@
+"""
+Latency and query counts of the hot routes against a generated database, checked against stored baselines.
+
+A temporary SQLite file is seeded with months x accounts x bills x incomes plus some
+transfer pairs (a paid bill linked to the income it created in another account), then
+each scenario is driven through the Flask test client. For every scenario the run
+reports p50/p95/p99/max latency and the statements executed per request.
+
+Baselines live in baselines.json, one entry per scale. A run fails when a scenario
+executes more statements than its baseline or its p50 latency exceeds the baseline
+by more than --tolerance. Latencies depend on the machine, so save a baseline on the
+machine that compares against it.
+
+    uv run python benchmarks/hot_routes.py --scale small
+    uv run python benchmarks/hot_routes.py --scale large --save-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import calendar
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from decimal import Decimal
+from typing import NamedTuple
+
+# Test settings (no CSRF, a fixed secret key) for the apps the benchmark builds; they pass their own database URI
+os.environ.setdefault("FINANCES_TESTING", "1")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Preset -> (months, accounts per month, bills per account, incomes per account, transfers per month)
+SCALES = {
+    "tiny": (2, 3, 5, 1, 2),
+    "small": (6, 4, 25, 2, 4),
+    "large": (24, 10, 100, 5, 10),
+}
+
+
+class Scale(NamedTuple):
+    months: int
+    accounts: int
+    bills: int
+    incomes: int
+    transfers: int
+
+    @property
+    def key(self) -> str:
+        return f"m{self.months}-a{self.accounts}-b{self.bills}-i{self.incomes}-t{self.transfers}"
+
+
+class Seeded(NamedTuple):
+    user_id: int
+    month_ids: list[int]
+    # Accounts of the first month, and its transfer bills
+    account_ids: list[int]
+    transfer_bill_ids: list[int]
+
+
+def build_app(uri: str, overrides: dict | None = None):
+    from app import create_app
+
+    # The render cache would turn every repeated page view into a hit; measure the real work
+    return create_app(
+        {"SQLALCHEMY_DATABASE_URI": uri, "DB_AUTO_UPGRADE": True, "RENDER_CACHE": "none", **(overrides or {})}
+    )
+
+
+def seed(app, scale: Scale) -> Seeded:
+    """Fill the database; bills and incomes go in with bulk inserts, totals are rebuilt at the end."""
+    from sqlalchemy import insert
+
+    from app import balances
+    from app.extensions import db
+    from app.models import Account, Bill, Income, Month, User
+
+    with app.app_context():
+        user = User(username="bench")
+        user.set_password("bench-password")
+        db.session.add(user)
+        months = [Month(name=f"{calendar.month_name[i % 12 + 1]} {2000 + i // 12}") for i in range(scale.months)]
+        db.session.add_all(months)
+        db.session.flush()
+        accounts = [Account(month_id=m.id, name=f"Account {a}") for m in months for a in range(scale.accounts)]
+        db.session.add_all(accounts)
+        db.session.flush()
+
+        bills = [
+            {
+                "account_id": acc.id,
+                "name": f"Bill {b}",
+                "amount": Decimal(f"{(b % 90) + 10}.{b % 100:02d}"),
+                "category": ("Housing", "Utilities", "Food", "Transport", None)[b % 5],
+                "owner": ("Alex", "Sam", None)[b % 3],
+                "is_paid": b % 2 == 0,
+            }
+            for acc in accounts
+            for b in range(scale.bills)
+        ]
+        incomes = [
+            {"account_id": acc.id, "name": f"Income {i}", "amount": Decimal("1500.00"), "contributor": "Alex"}
+            for acc in accounts
+            for i in range(scale.incomes)
+        ]
+        if bills:
+            db.session.execute(insert(Bill), bills)
+        if incomes:
+            db.session.execute(insert(Income), incomes)
+
+        transfer_bills = []
+        if scale.accounts > 1:
+            for m in months:
+                month_accounts = [a for a in accounts if a.month_id == m.id]
+                for t in range(scale.transfers):
+                    source = month_accounts[t % len(month_accounts)]
+                    target = month_accounts[(t + 1) % len(month_accounts)]
+                    income = Income(account=target, name=f"Transfer from {source.name}", amount=Decimal("250.00"))
+                    bill = Bill(account=source, name=f"Transfer {t}", amount=Decimal("250.00"), is_paid=True)
+                    bill.linked_income = income
+                    db.session.add_all([income, bill])
+                    transfer_bills.append(bill)
+        db.session.flush()
+        balances.rebuild()
+        db.session.commit()
+
+        first = months[0].id
+        seeded = Seeded(
+            user.id,
+            [m.id for m in months],
+            [a.id for a in accounts if a.month_id == first],
+            [b.id for b in transfer_bills if b.account.month_id == first],
+        )
+        db.session.remove()
+    return seeded
+
+
+def _month_details(client, ids: Seeded, i: int):
+    return client.get(f"/months/{ids.month_ids[i % len(ids.month_ids)]}")
+
+
+def _months(client, ids: Seeded, i: int):
+    return client.get("/months")
+
+
+def _update_account_position(client, ids: Seeded, i: int):
+    account_id = ids.account_ids[i % len(ids.account_ids)]
+    return client.post(
+        f"/account/{account_id}/update_position", json={"x": i % 500, "y": i % 300, "width": 300, "height": 250}
+    )
+
+
+def _edit_bill_transfer(client, ids: Seeded, i: int):
+    # Alternate the destination so every request really moves the linked income
+    bill_id = ids.transfer_bill_ids[i % len(ids.transfer_bill_ids)]
+    destination = ids.account_ids[1 + (i // len(ids.transfer_bill_ids)) % (len(ids.account_ids) - 1)]
+    return client.post(
+        f"/bill/{bill_id}/edit",
+        data={
+            "name": "Transfer",
+            "amount": "250.00",
+            "is_paid": "y",
+            "transfer": "y",
+            "destination_account": str(destination),
+        },
+    )
+
+
+def _duplicate_month(client, ids: Seeded, i: int):
+    return client.post(f"/months/{ids.month_ids[0]}/duplicate")
+
+
+# Run in this order: duplicating last keeps the earlier scenarios on the seeded data
+SCENARIOS: dict[str, Callable] = {
+    "month_details": _month_details,
+    "months": _months,
+    "update_account_position": _update_account_position,
+    "edit_bill_transfer": _edit_bill_transfer,
+    "duplicate_month": _duplicate_month,
+}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def run(app, ids: Seeded, iterations: int, warmup: int = 2, only: list[str] | None = None) -> dict[str, dict]:
+    from sqlalchemy import event
+
+    from app.extensions import db
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(ids.user_id)
+        sess["_fresh"] = True
+
+    counter = [0]
+
+    def _count(*args):
+        counter[0] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", _count)
+    results = {}
+    try:
+        for name, scenario in SCENARIOS.items():
+            if only and name not in only:
+                continue
+            if name == "edit_bill_transfer" and (not ids.transfer_bill_ids or len(ids.account_ids) < 3):
+                continue
+            timings, queries = [], []
+            for i in range(warmup + iterations):
+                counter[0] = 0
+                started = time.perf_counter()
+                response = scenario(client, ids, i)
+                elapsed = (time.perf_counter() - started) * 1000
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{name} answered {response.status_code}")
+                if i >= warmup:
+                    timings.append(elapsed)
+                    queries.append(counter[0])
+            results[name] = {
+                "p50_ms": round(percentile(timings, 50), 2),
+                "p95_ms": round(percentile(timings, 95), 2),
+                "p99_ms": round(percentile(timings, 99), 2),
+                "max_ms": round(max(timings), 2),
+                "queries": max(queries),
+            }
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """Return one message per regression against ``baseline``."""
+    problems = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["queries"] > expected["queries"]:
+            problems.append(f"{name}: {result['queries']} queries per request, baseline {expected['queries']}")
+        limit = expected["p50_ms"] * (1 + tolerance)
+        if result["p50_ms"] > limit:
+            problems.append(f"{name}: p50 {result['p50_ms']:.2f} ms, baseline {expected['p50_ms']:.2f} ms")
+    return problems
+
+
+def load_baselines(path: str = BASELINES) -> dict:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(key: str, results: dict[str, dict], path: str = BASELINES) -> None:
+    baselines = load_baselines(path)
+    # Merge, so a run limited with --only keeps the other scenarios' baselines
+    baselines.setdefault(key, {}).update(results)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(baselines, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--scale", choices=SCALES, default="small", help="Preset sizes, overridden by the options below"
+    )
+    parser.add_argument("--months", type=int)
+    parser.add_argument("--accounts", type=int, help="Accounts per month")
+    parser.add_argument("--bills", type=int, help="Bills per account")
+    parser.add_argument("--incomes", type=int, help="Incomes per account")
+    parser.add_argument("--transfers", type=int, help="Transfer pairs per month")
+    parser.add_argument("--iterations", type=int, default=30, help="Measured requests per scenario")
+    parser.add_argument("--only", nargs="*", choices=SCENARIOS, help="Run only these scenarios")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed p50 slowdown, 0.5 = 50%%")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline for the scale")
+    parser.add_argument("--baselines", default=BASELINES, help="Baseline file")
+    args = parser.parse_args(argv)
+
+    preset = SCALES[args.scale]
+    scale = Scale(
+        *(
+            getattr(args, field) if getattr(args, field) is not None else preset[i]
+            for i, field in enumerate(Scale._fields)
+        )
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        ids = seed(app, scale)
+        results = run(app, ids, args.iterations, only=args.only)
+        from app.extensions import db
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print(f"scale {scale.key}, {args.iterations} requests per scenario")
+    print(f"{'scenario':<26} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'queries':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:<26} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f} {r['queries']:>8}"
+        )
+
+    if args.save_baseline:
+        save_baseline(scale.key, results, args.baselines)
+        print(f"baseline saved for {scale.key}")
+        return 0
+
+    baseline = load_baselines(args.baselines).get(scale.key)
+    if baseline is None:
+        print(f"no baseline for {scale.key}; run with --save-baseline to record one")
+        return 0
+    problems = compare(results, baseline, args.tolerance)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Concurrent read/write throughput against a SQLite file, with and without the tuning profile.
+
+Each worker process builds its own app, like a gunicorn worker, and drives it through
+the Flask test client: readers load a month page while writers save card positions
+the way the drag-and-drop board does.
+
+    uv run python benchmarks/sqlite_concurrency.py --readers 3 --writers 2 --duration 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+# Test settings (no CSRF, a fixed secret key) for the apps each worker builds; they pass their own database URI
+os.environ.setdefault("FINANCES_TESTING", "1")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+PROFILES = {
+    "baseline": {"SQLITE_TUNING": False},
+    "tuned": {},
+}
+
+
+def _build(uri: str, overrides: dict):
+    from app import create_app
+
+    return create_app({"SQLALCHEMY_DATABASE_URI": uri, "DB_AUTO_UPGRADE": True, **overrides})
+
+
+def _seed(uri: str, overrides: dict, accounts: int, bills: int) -> tuple[int, list[int], int]:
+    from app.extensions import db
+    from app.models import Account, Bill, Income, Month, User
+
+    app = _build(uri, overrides)
+    with app.app_context():
+        user = User(username="bench")
+        user.set_password("bench-password")
+        month = Month(name="Benchmark")
+        db.session.add_all([user, month])
+        db.session.flush()
+        account_ids = []
+        for a in range(accounts):
+            acc = Account(month_id=month.id, name=f"Account {a}")
+            db.session.add(acc)
+            db.session.flush()
+            account_ids.append(acc.id)
+            db.session.add_all(Bill(account_id=acc.id, name=f"Bill {b}", amount=Decimal("12.34")) for b in range(bills))
+            db.session.add(Income(account_id=acc.id, name="Pay", amount=Decimal("1000.00")))
+        db.session.commit()
+        ids = (month.id, account_ids, user.id)
+        db.engine.dispose()
+    return ids
+
+
+def _worker(role, uri, overrides, month_id, account_ids, user_id, deadline, results):
+    app = _build(uri, overrides)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user_id)
+        sess["_fresh"] = True
+    ok = errors = 0
+    i = 0
+    while time.time() < deadline:
+        i += 1
+        try:
+            if role == "reader":
+                r = client.get(f"/months/{month_id}")
+            else:
+                account_id = account_ids[i % len(account_ids)]
+                r = client.post(
+                    f"/account/{account_id}/update_position",
+                    json={"x": i % 500, "y": i % 300, "width": 300, "height": 250},
+                )
+            if r.status_code == 200:
+                ok += 1
+            else:
+                errors += 1
+        except Exception:
+            errors += 1
+    results.put((role, ok, errors))
+
+
+def run_profile(name: str, args) -> dict:
+    overrides = PROFILES[name]
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        month_id, account_ids, user_id = _seed(uri, overrides, args.accounts, args.bills)
+        results = mp.Queue()
+        deadline = time.time() + args.duration
+        roles = ["reader"] * args.readers + ["writer"] * args.writers
+        procs = [
+            mp.Process(target=_worker, args=(role, uri, overrides, month_id, account_ids, user_id, deadline, results))
+            for role in roles
+        ]
+        for p in procs:
+            p.start()
+        totals = {"reader": [0, 0], "writer": [0, 0]}
+        for _ in procs:
+            role, ok, errors = results.get()
+            totals[role][0] += ok
+            totals[role][1] += errors
+        for p in procs:
+            p.join()
+    return {
+        "reads_per_s": totals["reader"][0] / args.duration,
+        "writes_per_s": totals["writer"][0] / args.duration,
+        "errors": totals["reader"][1] + totals["writer"][1],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=3)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per profile")
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--bills", type=int, default=20, help="Bills per account")
+    args = parser.parse_args(argv)
+
+    print(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'errors':>8}")
+    for name in PROFILES:
+        res = run_profile(name, args)
+        print(f"{name:<10} {res['reads_per_s']:>10.1f} {res['writes_per_s']:>10.1f} {res['errors']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
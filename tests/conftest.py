@@ -1,18 +1,15 @@
 import contextlib
 import importlib
 import os
-import sys
 
 import pytest
 
+# Set before the app is first built, which reads it
+os.environ["FINANCES_TESTING"] = "1"
+
 
 @pytest.fixture(scope="session")
 def app_module():
-    # Safe test config
-    os.environ["FINANCES_TESTING"] = "1"
-    # If already imported, drop and re-import so the env takes effect
-    if "app" in sys.modules:
-        sys.modules.pop("app")
     return importlib.import_module("app")
 
 
@@ -28,10 +25,12 @@ def client(app):
 
 @pytest.fixture
 def db(app):
+    from app import migrations  # type: ignore
     from app.extensions import db as _db  # type: ignore
 
     with app.app_context():
-        _db.create_all()
+        # Through the migrations, which also add what create_all() cannot, such as the search index
+        migrations.upgrade()
         try:
             yield _db
         finally:
@@ -43,3 +42,33 @@ def db(app):
             # Dispose engine to avoid unclosed DB warnings on Windows
             with contextlib.suppress(Exception):
                 _db.engine.dispose()
+
+
+@pytest.fixture
+def auth_client(client, db):
+    from app.models import User  # type: ignore
+
+    user = User(username="tester")
+    user.set_password("secret123")
+    db.session.add(user)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+    return client
+
+
+@pytest.fixture
+def query_counter(db):
+    from sqlalchemy import event
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _record)
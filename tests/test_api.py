@@ -0,0 +1,130 @@
+import base64
+from decimal import Decimal
+
+from flask import g
+
+
+def _basic(username, password):
+    token = base64.b64encode(f"{username}:{password}".encode()).decode()
+    return {"Authorization": f"Basic {token}"}
+
+
+def test_api_requires_authentication(client, db):
+    from app.models import User  # type: ignore
+
+    user = User(username="script")
+    user.set_password("s3cret-pass")
+    db.session.add(user)
+    db.session.commit()
+
+    def get(**headers):
+        # The db fixture's app context outlives each request, so drop the cached user
+        g.pop("_login_user", None)
+        return client.get("/api/v1/months", headers=headers)
+
+    resp = get()
+    assert resp.status_code == 401
+    assert resp.headers["WWW-Authenticate"].startswith("Basic")
+    assert get(**_basic("script", "wrong")).status_code == 401
+    assert get(**_basic("script", "s3cret-pass")).status_code == 200
+
+
+def test_crud_round_trip_keeps_totals(auth_client, db):
+    from app.models import Month  # type: ignore
+
+    month = auth_client.post("/api/v1/months", json={"name": "July"})
+    assert month.status_code == 201
+    month_id = month.get_json()["data"]["id"]
+    assert month.headers["Location"].endswith(f"/api/v1/months/{month_id}")
+
+    account_id = auth_client.post("/api/v1/accounts", json={"month_id": month_id, "name": "Current"}).get_json()[
+        "data"
+    ]["id"]
+    bill = auth_client.post(
+        "/api/v1/bills",
+        json={"account_id": account_id, "name": "Rent", "amount": "£1,200.50", "due_date": "2025-07-01"},
+    ).get_json()["data"]
+    assert bill["amount"] == "1200.50"
+    assert bill["due_date"] == "2025-07-01"
+
+    resp = auth_client.patch(f"/api/v1/bills/{bill['id']}", json={"amount": "1000", "is_paid": True})
+    assert resp.status_code == 200
+    assert resp.get_json()["data"]["is_paid"] is True
+    assert db.session.get(Month, month_id).total_bills == Decimal("1000.00")
+
+    assert auth_client.delete(f"/api/v1/bills/{bill['id']}").status_code == 204
+    assert auth_client.get(f"/api/v1/bills/{bill['id']}").status_code == 404
+    db.session.expire_all()
+    assert db.session.get(Month, month_id).total_bills == Decimal("0.00")
+
+
+def test_invalid_writes_are_rejected(auth_client, db):
+    assert auth_client.post("/api/v1/months", json={}).status_code == 400
+    assert auth_client.post("/api/v1/months", json={"name": "x" * 51}).status_code == 400
+    assert auth_client.post("/api/v1/months", json={"name": "A", "id": 5}).status_code == 400
+    assert auth_client.post("/api/v1/accounts", json={"month_id": 999, "name": "Ghost"}).status_code == 400
+    assert auth_client.post("/api/v1/widgets", json={"name": "A"}).status_code == 404
+
+
+def test_keyset_pagination_and_sparse_fields(auth_client, db):
+    from app.models import Month  # type: ignore
+
+    db.session.add_all([Month(name=f"Month {n}") for n in range(5)])
+    db.session.commit()
+
+    names, after = [], None
+    while True:
+        query = "limit=2&fields=id,name" + (f"&after={after}" if after else "")
+        page = auth_client.get(f"/api/v1/months?{query}").get_json()
+        assert all(set(row) == {"id", "name"} for row in page["data"])
+        names += [row["name"] for row in page["data"]]
+        after = page["next"]
+        if after is None:
+            break
+    assert names == [f"Month {n}" for n in range(5)]
+
+    assert auth_client.get("/api/v1/months?fields=password").status_code == 400
+    assert auth_client.get("/api/v1/months?limit=abc").status_code == 400
+
+
+def test_etags_support_conditional_requests(auth_client, db):
+    month_id = auth_client.post("/api/v1/months", json={"name": "August"}).get_json()["data"]["id"]
+
+    first = auth_client.get(f"/api/v1/months/{month_id}")
+    etag = first.headers["ETag"]
+    assert auth_client.get(f"/api/v1/months/{month_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    stale = auth_client.patch(f"/api/v1/months/{month_id}", json={"name": "Sept"}, headers={"If-Match": '"nope"'})
+    assert stale.status_code == 412
+    ok = auth_client.patch(f"/api/v1/months/{month_id}", json={"name": "September"}, headers={"If-Match": etag})
+    assert ok.status_code == 200
+    assert auth_client.get(f"/api/v1/months/{month_id}", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_bill_writes_keep_the_transfer_income_in_step(auth_client, db):
+    from app import transfers  # type: ignore
+    from app.balances import find_discrepancies  # type: ignore
+    from app.models import Account, Bill, Income, Month  # type: ignore
+
+    month = Month(name="August")
+    current = Account(month=month, name="cur")
+    savings = Account(month=month, name="savings")
+    db.session.add_all([month, current, savings])
+    db.session.flush()
+    bill = Bill(account_id=current.id, name="Save", amount=Decimal("50.00"), is_paid=True)
+    db.session.add(bill)
+    transfers.sync_transfer(bill, savings.id)
+    db.session.commit()
+    bill_id, income_id, savings_id = bill.id, bill.linked_income_id, savings.id
+
+    resp = auth_client.patch(f"/api/v1/bills/{bill_id}", json={"amount": "80.00"})
+    assert resp.status_code == 200
+    income = auth_client.get(f"/api/v1/incomes/{income_id}").get_json()["data"]
+    assert (income["account_id"], income["amount"]) == (savings_id, "80.00")
+
+    assert auth_client.delete(f"/api/v1/bills/{bill_id}").status_code == 204
+    assert auth_client.get(f"/api/v1/incomes/{income_id}").status_code == 404
+    db.session.expire_all()
+    assert Income.query.filter_by(name="Transfer from cur").count() == 0
+    assert db.session.get(Account, savings_id).total_incomes == Decimal("0.00")
+    assert find_discrepancies() == []
@@ -1,20 +1,24 @@
-import contextlib
 import importlib
 import types
 
 
-def test_reload_module_executes_create_app_under_coverage():
-    mod = importlib.import_module("app.app")
+def test_reload_module_builds_nothing_until_app_is_used():
+    from app.extensions import db as _db  # type: ignore
+
+    mod = importlib.import_module("app")
     assert isinstance(mod, types.ModuleType)
+    previous = mod._app
 
     reloaded = importlib.reload(mod)
-    assert hasattr(reloaded, "app")
-
-    # Blueprint should be registered on the reloaded app
-    names = [bp.name for bp in reloaded.app.blueprints.values()]
-    assert "main" in names
-
-    from app.extensions import db as _db  # type: ignore
+    try:
+        assert reloaded._app is None
 
-    with reloaded.app.app_context(), contextlib.suppress(Exception):
-        _db.engine.dispose()
+        # `app:app` builds one application on first access and then reuses it
+        app = reloaded.app
+        assert reloaded.app is app
+        names = [bp.name for bp in app.blueprints.values()]
+        assert "main" in names and "api" in names
+        with app.app_context():
+            _db.engine.dispose()
+    finally:
+        reloaded._app = previous
@@ -0,0 +1,114 @@
+from datetime import date
+from decimal import Decimal
+
+from test_duplication import _seed_transfer_month
+
+
+def test_archive_and_restore_round_trip(db):
+    from app import archive  # type: ignore
+    from app.balances import find_discrepancies  # type: ignore
+    from app.models import Account, Bill, Income, Month, MonthSnapshot  # type: ignore
+
+    month = _seed_transfer_month(db)
+    month_id = month.id
+
+    snapshot = archive.archive_month(month)
+    db.session.commit()
+
+    assert snapshot.row_count == 6
+    assert (Account.query.count(), Bill.query.count(), Income.query.count()) == (0, 0, 0)
+    month = db.session.get(Month, month_id)
+    assert month.archived is True
+    assert (month.total_bills, month.total_incomes) == (Decimal("1200.00"), Decimal("2800.00"))
+
+    cards = {a.name: a for a in archive.archived_accounts(month)}
+    assert cards["Current"].remainder == Decimal("1300.00")
+    assert [b.due_date for b in cards["Current"].bills] == [date(2025, 1, 31), None]
+
+    archive.restore_month(month)
+    db.session.commit()
+
+    assert MonthSnapshot.query.count() == 0
+    assert month.archived is False
+    current = Account.query.filter_by(month_id=month_id, name="Current").one()
+    assert (current.pos_x, current.total_bills) == (50, Decimal("1200.00"))
+    transfer = Bill.query.filter_by(name="To savings").one()
+    assert transfer.linked_income.account.name == "Savings"
+    assert find_discrepancies() == []
+
+
+def test_archived_months_are_listed_separately_and_read_only(auth_client, db):
+    from app.models import Month  # type: ignore
+
+    kept = Month(name="Budget kept live")
+    db.session.add(kept)
+    db.session.commit()
+    month_id = _seed_transfer_month(db).id
+
+    assert auth_client.post(f"/months/{month_id}/archive").status_code == 302
+
+    listing = auth_client.get("/months").data
+    assert b"Budget kept live" in listing and b"January 2025" not in listing
+    archived = auth_client.get("/months?archived=1").data
+    assert b"January 2025" in archived and b"Budget kept live" not in archived
+
+    page = auth_client.get(f"/months/{month_id}")
+    assert b"Archived" in page.data and b"Salary" in page.data
+    auth_client.post(f"/months/{month_id}", data={"account-name": "New", "account-submit": "Save"})
+    assert db.session.get(Month, month_id).accounts == []
+
+    assert auth_client.post(f"/months/{month_id}/restore").status_code == 302
+    assert b"Salary" in auth_client.get(f"/months/{month_id}").data
+    assert b"January 2025" in auth_client.get("/months").data
+
+
+def test_api_cannot_write_into_archived_months(auth_client, db):
+    from app import archive  # type: ignore
+    from app.models import Account, Bill, Month  # type: ignore
+
+    live = Month(name="Live")
+    account = Account(month=live, name="Spare")
+    db.session.add_all([live, account])
+    db.session.flush()
+    bill = Bill(account_id=account.id, name="Phone", amount=Decimal("20.00"))
+    db.session.add(bill)
+    db.session.commit()
+    account_id, bill_id = account.id, bill.id
+    month = _seed_transfer_month(db)
+    month_id = month.id
+    archive.archive_month(month)
+    db.session.commit()
+
+    resp = auth_client.post("/api/v1/accounts", json={"month_id": month_id, "name": "Sneaky"})
+    assert resp.status_code == 409 and "archived" in resp.get_json()["error"]
+    assert auth_client.patch(f"/api/v1/accounts/{account_id}", json={"month_id": month_id}).status_code == 409
+
+    # Accounts of archived months are gone from the live tables, so point bills at one indirectly
+    other = Month(name="Other")
+    target = Account(month=other, name="Target")
+    db.session.add_all([other, target])
+    db.session.commit()
+    target_id, other_id = target.id, other.id
+    db.session.execute(db.update(Month).where(Month.id == other_id).values(archived=True))
+    db.session.commit()
+    resp = auth_client.post("/api/v1/bills", json={"account_id": target_id, "name": "Sneaky", "amount": "5"})
+    assert resp.status_code == 409
+    assert auth_client.patch(f"/api/v1/bills/{bill_id}", json={"account_id": target_id}).status_code == 409
+    assert Bill.query.filter_by(name="Sneaky").count() == 0
+    assert db.session.get(Bill, bill_id).account_id == account_id
+
+
+def test_archive_months_cli(app, db):
+    from app.models import Month  # type: ignore
+
+    month_id = _seed_transfer_month(db).id
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["archive-months", str(month_id)])
+    assert result.exit_code == 0, result.output
+    assert "6 rows" in result.output
+    assert runner.invoke(args=["archive-months", str(month_id)]).exit_code != 0
+
+    assert runner.invoke(args=["archive-months", "--restore", str(month_id)]).exit_code == 0
+    db.session.expire_all()
+    assert db.session.get(Month, month_id).archived is False
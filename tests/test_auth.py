@@ -0,0 +1,117 @@
+import base64
+
+import pytest
+from flask import g
+
+
+@pytest.fixture
+def fresh_auth(app, monkeypatch):
+    from app.auth import RateLimiter, TTLCache  # type: ignore
+
+    monkeypatch.setitem(app.extensions, "user_cache", TTLCache(60))
+    monkeypatch.setitem(app.extensions, "credential_cache", TTLCache(60))
+    monkeypatch.setitem(app.extensions, "login_limiter", RateLimiter(3, 60))
+    return app
+
+
+@pytest.fixture
+def user(db):
+    from app.models import User  # type: ignore
+
+    u = User(username="robin")
+    u.set_password("secret123")
+    db.session.add(u)
+    db.session.commit()
+    return u
+
+
+def _basic(username, password):
+    token = base64.b64encode(f"{username}:{password}".encode()).decode()
+    return {"Authorization": f"Basic {token}"}
+
+
+def _user_selects(statements):
+    return [s for s in statements if "FROM user" in s]
+
+
+def test_session_user_is_loaded_from_the_cache(fresh_auth, client, db, user, query_counter):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+
+    def months():
+        g.pop("_login_user", None)
+        db.session.remove()
+        return client.get("/months")
+
+    assert months().status_code == 200
+    query_counter.clear()
+    assert months().status_code == 200
+    assert _user_selects(query_counter) == []
+
+    # Changing the user evicts it, so the next request reads the row again
+    db.session.get(type(user), user.id).username = "robin2"
+    db.session.commit()
+    query_counter.clear()
+    months()
+    assert len(_user_selects(query_counter)) == 1
+
+
+def test_login_upgrades_old_hashes(fresh_auth, client, db, user, monkeypatch):
+    from werkzeug.security import generate_password_hash
+
+    from app.models import User  # type: ignore
+
+    user.password_hash = generate_password_hash("secret123", method="pbkdf2:sha256:1000")
+    db.session.commit()
+    monkeypatch.setitem(fresh_auth.config, "PASSWORD_HASH_METHOD", "pbkdf2:sha256:2000")
+
+    resp = client.post("/login", data={"username": "robin", "password": "secret123"})
+
+    assert resp.status_code == 302
+    db.session.expire_all()
+    assert db.session.get(User, user.id).password_hash.startswith("pbkdf2:sha256:2000$")
+
+
+def test_repeated_failures_are_throttled(fresh_auth, client, db, user):
+    for _ in range(3):
+        assert client.post("/login", data={"username": "robin", "password": "wrong"}).status_code == 302
+
+    blocked = client.post("/login", data={"username": "robin", "password": "secret123"})
+    assert blocked.status_code == 429
+    assert b"Too many failed sign in attempts" in blocked.data
+
+    g.pop("_login_user", None)
+    api = client.get("/api/v1/months", headers=_basic("robin", "secret123"))
+    assert api.status_code == 429
+    assert int(api.headers["Retry-After"]) > 0
+
+
+def test_api_reuses_verified_credentials(fresh_auth, client, db, user, monkeypatch):
+    from app.models import User  # type: ignore
+
+    checks = []
+    check_password = User.check_password
+    monkeypatch.setattr(User, "check_password", lambda self, pw: checks.append(pw) or check_password(self, pw))
+
+    for _ in range(3):
+        g.pop("_login_user", None)
+        assert client.get("/api/v1/months", headers=_basic("robin", "secret123")).status_code == 200
+    assert len(checks) == 1
+
+    g.pop("_login_user", None)
+    assert client.get("/api/v1/months", headers=_basic("robin", "other")).status_code == 401
+
+
+def test_rate_limiter_window(monkeypatch):
+    from app import auth  # type: ignore
+
+    now = [1000.0]
+    monkeypatch.setattr(auth.time, "monotonic", lambda: now[0])
+    limiter = auth.RateLimiter(2, 60)
+
+    limiter.hit("a")
+    limiter.hit("a")
+    assert limiter.retry_after("a", "b") == 61
+    now[0] += 61
+    assert limiter.retry_after("a") == 0
@@ -0,0 +1,229 @@
+from decimal import Decimal
+
+
+def _month_with_accounts(db):
+    from app.models import Account, Month  # type: ignore
+
+    m = Month(name="May")
+    db.session.add(m)
+    db.session.flush()
+    current = Account(month_id=m.id, name="Current")
+    savings = Account(month_id=m.id, name="Savings")
+    db.session.add_all([current, savings])
+    db.session.commit()
+    return m, current, savings
+
+
+def test_totals_follow_create_edit_and_delete(db):
+    from app.balances import find_discrepancies  # type: ignore
+    from app.models import Bill, Income  # type: ignore
+
+    m, current, savings = _month_with_accounts(db)
+    rent = Bill(account_id=current.id, name="Rent", amount=Decimal("700.00"))
+    pay = Income(account_id=current.id, name="Pay", amount=Decimal("2000.00"))
+    db.session.add_all([rent, pay])
+    db.session.commit()
+
+    assert current.total_bills == Decimal("700.00")
+    assert current.remainder == Decimal("1300.00")
+    assert m.total_incomes == Decimal("2000.00")
+
+    rent.amount = Decimal("750.50")
+    pay.account_id = savings.id
+    db.session.commit()
+
+    assert current.total_bills == Decimal("750.50")
+    assert current.total_incomes == Decimal("0.00")
+    assert savings.total_incomes == Decimal("2000.00")
+    assert m.remainder == Decimal("1249.50")
+
+    db.session.delete(rent)
+    db.session.commit()
+    assert current.total_bills == Decimal("0.00")
+    assert m.total_bills == Decimal("0.00")
+    assert find_discrepancies() == []
+
+
+def test_deleting_an_account_updates_the_month(db):
+    from app.balances import find_discrepancies  # type: ignore
+    from app.models import Bill, Income  # type: ignore
+
+    m, current, savings = _month_with_accounts(db)
+    db.session.add_all(
+        [
+            Bill(account_id=current.id, name="Rent", amount=Decimal("100.00")),
+            Income(account_id=savings.id, name="Interest", amount=Decimal("5.00")),
+        ]
+    )
+    db.session.commit()
+
+    db.session.delete(current)
+    db.session.commit()
+
+    assert m.total_bills == Decimal("0.00")
+    assert m.total_incomes == Decimal("5.00")
+    assert find_discrepancies() == []
+
+
+def test_totals_are_incremented_in_sql_so_concurrent_writes_add_up(db):
+    from app.balances import find_discrepancies  # type: ignore
+    from app.models import Account, Bill, Month  # type: ignore
+
+    m, current, _ = _month_with_accounts(db)
+    assert current.total_bills == Decimal("0.00")
+    # Another worker commits a bill of 5 behind this session's back, leaving its loaded totals stale
+    db.session.execute(
+        db.insert(Bill).values(account_id=current.id, name="Gym", amount=Decimal("5.00")),
+    )
+    for model, ident in ((Account, current.id), (Month, m.id)):
+        db.session.execute(
+            db.update(model).where(model.id == ident).values(total_bills=model.total_bills + 5),
+            execution_options={"synchronize_session": False},
+        )
+
+    db.session.add(Bill(account_id=current.id, name="Phone", amount=Decimal("7.00")))
+    db.session.commit()
+    assert current.total_bills == Decimal("12.00")
+    assert m.total_bills == Decimal("12.00")
+    assert find_discrepancies() == []
+
+
+def test_add_bulk_moves_totals_for_rows_inserted_outside_the_session(db):
+    from sqlalchemy import insert
+
+    from app import balances, changes  # type: ignore
+    from app.models import Bill  # type: ignore
+
+    m, current, savings = _month_with_accounts(db)
+    version = max((c.version for c in changes.since(0, 100)), default=0)
+    db.session.execute(
+        insert(Bill),
+        [
+            {"account_id": current.id, "name": "Rent", "amount": Decimal("100.00")},
+            {"account_id": savings.id, "name": "Fund", "amount": Decimal("20.00")},
+        ],
+    )
+    balances.add_bulk(
+        {current.id: (Decimal("100.00"), Decimal("0")), savings.id: (Decimal("20.00"), Decimal("0"))},
+        {m.id: (Decimal("120.00"), Decimal("0"))},
+    )
+
+    # The rows the session already held see the new totals rather than stale ones
+    assert (current.total_bills, savings.total_bills, m.total_bills) == (
+        Decimal("100.00"),
+        Decimal("20.00"),
+        Decimal("120.00"),
+    )
+    db.session.commit()
+    assert balances.find_discrepancies() == []
+    journaled = {(c.resource, c.item_id) for c in changes.since(version, 100)}
+    assert {("accounts", current.id), ("accounts", savings.id), ("months", m.id)} <= journaled
+
+
+def test_moving_an_account_moves_its_totals(auth_client, db):
+    from app.balances import find_discrepancies  # type: ignore
+    from app.models import Bill, Month  # type: ignore
+
+    m, current, _ = _month_with_accounts(db)
+    other = Month(name="June")
+    db.session.add_all([other, Bill(account_id=current.id, name="Rent", amount=Decimal("10.00"))])
+    db.session.commit()
+    month_id, other_id = m.id, other.id
+
+    resp = auth_client.patch(f"/api/v1/accounts/{current.id}", json={"month_id": other_id})
+    assert resp.status_code == 200
+    db.session.expire_all()
+    assert db.session.get(Month, month_id).total_bills == Decimal("0.00")
+    assert db.session.get(Month, other_id).total_bills == Decimal("10.00")
+    assert find_discrepancies() == []
+
+
+def test_routes_keep_totals_consistent(auth_client, db):
+    from app.balances import find_discrepancies  # type: ignore
+    from app.models import Bill, Month  # type: ignore
+
+    m, current, savings = _month_with_accounts(db)
+    month_id, current_id, savings_id = m.id, current.id, savings.id
+
+    r = auth_client.post(
+        f"/months/{month_id}",
+        data={
+            "account_id": current_id,
+            "bill-name": "To savings",
+            "bill-amount": "250.00",
+            "bill-is_paid": "y",
+            "bill-transfer": "y",
+            "bill-destination_account": str(savings_id),
+            "bill-submit": "Save Bill",
+        },
+    )
+    assert r.status_code == 302
+    bill = Bill.query.filter_by(name="To savings").one()
+    assert bill.linked_income_id is not None
+
+    r = auth_client.post(
+        f"/bill/{bill.id}/edit",
+        data={
+            "name": "To savings",
+            "amount": "300.00",
+            "is_paid": "y",
+            "transfer": "y",
+            "destination_account": savings_id,
+        },
+    )
+    assert r.status_code == 302
+
+    r = auth_client.post(f"/months/{month_id}/duplicate")
+    assert r.status_code == 302
+
+    db.session.expire_all()
+    month = db.session.get(Month, month_id)
+    assert month.total_bills == Decimal("300.00")
+    assert month.total_incomes == Decimal("300.00")
+    assert find_discrepancies() == []
+
+    r = auth_client.get("/months")
+    assert "£300.00".encode() in r.data
+
+
+def test_archived_months_keep_their_totals_through_a_check(app, db):
+    from app import archive  # type: ignore
+    from app.balances import find_discrepancies  # type: ignore
+    from app.models import Bill, Month  # type: ignore
+
+    m, current, _ = _month_with_accounts(db)
+    db.session.add(Bill(account_id=current.id, name="Rent", amount=Decimal("100.00")))
+    db.session.commit()
+    month_id = m.id
+    archive.archive_month(m)
+    db.session.commit()
+
+    assert find_discrepancies() == []
+    assert app.test_cli_runner().invoke(args=["check-balances", "--rebuild"]).exit_code == 0
+    month = db.session.get(Month, month_id)
+    archive.restore_month(month)
+    db.session.commit()
+    assert month.total_bills == Decimal("100.00")
+    assert find_discrepancies() == []
+
+
+def test_check_balances_cli_reports_and_rebuilds(app, db):
+    from app.models import Account, Bill  # type: ignore
+
+    m, current, _ = _month_with_accounts(db)
+    db.session.add(Bill(account_id=current.id, name="Rent", amount=Decimal("10.00")))
+    db.session.commit()
+    # Simulate drift from a write that bypassed the session events
+    db.session.execute(db.update(Account).where(Account.id == current.id).values(total_bills=0))
+    db.session.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["check-balances"])
+    assert result.exit_code != 0
+    assert f"account {current.id}" in result.output
+
+    result = runner.invoke(args=["check-balances", "--rebuild"])
+    assert result.exit_code == 0
+    assert "Rebuilt 1" in result.output
+
+    assert runner.invoke(args=["check-balances"]).exit_code == 0
@@ -0,0 +1,32 @@
+from benchmarks import hot_routes
+
+
+def test_hot_routes_run_against_generated_data(tmp_path):
+    app = hot_routes.build_app(f"sqlite:///{tmp_path / 'bench.db'}")
+    ids = hot_routes.seed(app, hot_routes.Scale(*hot_routes.SCALES["tiny"]))
+
+    results = hot_routes.run(app, ids, iterations=2, warmup=0)
+
+    assert set(results) == set(hot_routes.SCENARIOS)
+    for result in results.values():
+        assert result["queries"] > 0
+        assert 0 < result["p50_ms"] <= result["max_ms"]
+    from app.extensions import db  # type: ignore
+
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_compare_flags_extra_queries_and_slowdowns():
+    baseline = {"months": {"p50_ms": 10.0, "queries": 2}, "gone": {"p50_ms": 1.0, "queries": 1}}
+
+    assert hot_routes.compare({"months": {"p50_ms": 14.0, "queries": 2}}, baseline, tolerance=0.5) == []
+    problems = hot_routes.compare({"months": {"p50_ms": 16.0, "queries": 3}}, baseline, tolerance=0.5)
+    assert len(problems) == 2
+    assert "3 queries per request" in problems[0]
+    assert "p50 16.00 ms" in problems[1]
+
+
+def test_percentile_is_nearest_rank():
+    samples = [float(n) for n in range(1, 101)]
+    assert (hot_routes.percentile(samples, 50), hot_routes.percentile(samples, 99)) == (50.0, 99.0)
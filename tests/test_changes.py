@@ -0,0 +1,129 @@
+from decimal import Decimal
+
+
+def _feed(client, since=0, **args):
+    return client.get("/api/v1/changes", query_string={"since": since, **args}).get_json()
+
+
+def _keys(feed):
+    return [(c["resource"], c["id"], c["deleted"]) for c in feed["data"]]
+
+
+def test_mutations_are_journaled_once_per_item(auth_client, db):
+    month = auth_client.post("/api/v1/months", json={"name": "March"}).get_json()["data"]
+    account = auth_client.post("/api/v1/accounts", json={"month_id": month["id"], "name": "Current"}).get_json()
+    account = account["data"]
+    bill = auth_client.post(
+        "/api/v1/bills", json={"account_id": account["id"], "name": "Rent", "amount": "900.00"}
+    ).get_json()["data"]
+
+    feed = _feed(auth_client)
+    assert sorted(_keys(feed)) == [
+        ("accounts", account["id"], False),
+        ("bills", bill["id"], False),
+        ("months", month["id"], False),
+    ]
+    start = feed["version"]
+
+    # Two edits of the same bill leave one entry, with the bill's and its totals' current values
+    for amount in ("950.00", "975.00"):
+        auth_client.patch(f"/api/v1/bills/{bill['id']}", json={"amount": amount})
+    feed = _feed(auth_client, start)
+    changed = {c["resource"]: c for c in feed["data"]}
+    assert sorted(changed) == ["accounts", "bills", "months"]
+    assert changed["bills"]["data"]["amount"] == "975.00" and changed["bills"]["month_id"] == month["id"]
+    assert changed["months"]["data"]["total_bills"] == "975.00"
+
+    # Nothing new since the latest version
+    assert _feed(auth_client, feed["version"]) == {"data": [], "version": feed["version"], "more": False}
+
+
+def test_deletes_leave_tombstones(auth_client, db):
+    from app.models import Account, Bill, Month  # type: ignore
+
+    month = Month(name="April")
+    account = Account(month=month, name="Current")
+    bill = Bill(account=account, name="Gym", amount=Decimal("25.00"))
+    db.session.add_all([month, account, bill])
+    db.session.commit()
+    ids = {"months": month.id, "accounts": account.id, "bills": bill.id}
+    start = _feed(auth_client)["version"]
+
+    assert auth_client.post(f"/months/{month.id}/delete").status_code == 302
+    feed = _feed(auth_client, start)
+    assert sorted(_keys(feed)) == sorted((resource, item_id, True) for resource, item_id in ids.items())
+    assert all(c["data"] is None for c in feed["data"])
+
+
+def test_bulk_changes_are_journaled(auth_client, db):
+    from app.models import Account, Bill, Month  # type: ignore
+
+    month = Month(name="May")
+    accounts = [Account(month=month, name=f"Account {n}") for n in range(2)]
+    bill = Bill(account=accounts[0], name="Water", amount=Decimal("20.00"))
+    db.session.add_all([month, *accounts, bill])
+    db.session.commit()
+    month_id, account_ids, bill_id = month.id, [a.id for a in accounts], bill.id
+
+    start = _feed(auth_client)["version"]
+    cards = [{"id": a, "x": 10, "y": 10, "width": 300, "height": 250} for a in account_ids]
+    auth_client.post(f"/months/{month_id}/layout", json={"accounts": cards})
+    feed = _feed(auth_client, start)
+    assert sorted(_keys(feed)) == [("accounts", a, False) for a in account_ids]
+    assert feed["data"][0]["data"]["pos_x"] == 10
+
+    start = feed["version"]
+    auth_client.post(f"/months/{month_id}/archive")
+    keys = _keys(_feed(auth_client, start))
+    assert ("bills", bill_id, True) in keys and ("months", month_id, False) in keys
+
+    start = _feed(auth_client, start)["version"]
+    auth_client.post(f"/months/{month_id}/restore")
+    auth_client.post(f"/months/{month_id}/duplicate")
+    resources = [c["resource"] for c in _feed(auth_client, start)["data"] if not c["deleted"]]
+    # The restored month and its copy, each with two accounts and a bill
+    assert sorted(resources) == ["accounts"] * 4 + ["bills"] * 2 + ["months"] * 2
+
+
+def test_feed_pages_and_is_scoped_to_the_household(auth_client, db):
+    from app.models import Household, Month  # type: ignore
+
+    other = Household(name="Elsewhere")
+    db.session.add(other)
+    db.session.flush()
+    db.session.add_all([Month(name=f"Month {n}") for n in range(3)] + [Month(name="Hidden", household_id=other.id)])
+    db.session.commit()
+
+    first = _feed(auth_client, limit=2)
+    assert len(first["data"]) == 2 and first["more"] is True
+    second = auth_client.get(first["links"]["next"]).get_json()
+    assert second["more"] is False
+    names = [c["data"]["name"] for c in first["data"] + second["data"]]
+    assert names == ["Month 0", "Month 1", "Month 2"]
+    assert [c["version"] for c in first["data"] + second["data"]] == sorted(
+        c["version"] for c in first["data"] + second["data"]
+    )
+
+
+def test_postgresql_writers_take_their_households_journal_lock():
+    from types import SimpleNamespace
+
+    from app import changes  # type: ignore
+
+    executed = []
+    conn = SimpleNamespace(
+        dialect=SimpleNamespace(name="postgresql"),
+        execute=lambda stmt, params=None: executed.append((str(stmt), params)),
+    )
+    changes._lock(conn, [3, None, 3, 1])
+    key = changes.ADVISORY_LOCK_KEY
+    assert [params for _, params in executed] == [
+        {"key": key, "household": 0},
+        {"key": key, "household": 1},
+        {"key": key, "household": 3},
+    ]
+    assert executed[0][0] == "SELECT pg_advisory_xact_lock(:key, :household)"
+
+    conn.dialect.name = "sqlite"
+    changes._lock(conn, [1])
+    assert len(executed) == 3
@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import pytest
+
+
+def test_sqlite_profile_applied_to_file_database(tmp_path):
+    from app import create_app  # type: ignore
+    from app.extensions import db as _db  # type: ignore
+
+    uri = f"sqlite:///{tmp_path / 'tuned.db'}"
+    app = create_app({"SQLALCHEMY_DATABASE_URI": uri, "DB_POOL_SIZE": 3, "DB_POOL_PRE_PING": True})
+
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"] == {"pool_size": 3, "pool_pre_ping": True}
+    with app.app_context():
+        with _db.engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+            assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+        assert _db.engine.pool.size() == 3
+        _db.engine.dispose()
+
+
+def test_pool_options_skipped_for_memory_database(app):
+    assert "pool_size" not in app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+
+
+def test_invalid_pragma_value_rejected():
+    from app.database import sqlite_pragmas  # type: ignore
+
+    with pytest.raises(ValueError):
+        sqlite_pragmas({"SQLITE_JOURNAL_MODE": "WAL; DROP TABLE month"})
+    assert sqlite_pragmas({"SQLITE_CACHE_SIZE": -2000, "SQLITE_FOREIGN_KEYS": False}) == [
+        ("cache_size", -2000),
+        ("foreign_keys", "OFF"),
+    ]
+
+
+def test_deleting_transfer_destination_clears_link(db):
+    from app.models import Account, Bill, Income, Month  # type: ignore
+
+    assert db.session.execute(db.text("PRAGMA foreign_keys")).scalar() == 1
+
+    m = Month(name="June")
+    db.session.add(m)
+    db.session.flush()
+    current = Account(month_id=m.id, name="Current")
+    savings = Account(month_id=m.id, name="Savings")
+    db.session.add_all([current, savings])
+    db.session.flush()
+    moved = Income(account_id=savings.id, name="Transfer from Current", amount=Decimal("50.00"))
+    bill = Bill(account_id=current.id, name="To savings", amount=Decimal("50.00"), linked_income=moved)
+    db.session.add_all([moved, bill])
+    db.session.commit()
+
+    db.session.delete(savings)
+    db.session.commit()
+
+    assert bill.linked_income_id is None
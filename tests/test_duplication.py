@@ -0,0 +1,101 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+
+def _seed_transfer_month(db, name="January 2025"):
+    from app.models import Account, Bill, Income, Month  # type: ignore
+
+    m = Month(name=name)
+    db.session.add(m)
+    db.session.flush()
+    current = Account(month_id=m.id, name="Current", pos_x=50, pos_y=100, width=400, height=300)
+    savings = Account(month_id=m.id, name="Savings")
+    db.session.add_all([current, savings])
+    db.session.flush()
+    salary = Income(account_id=current.id, name="Salary", amount=Decimal("2500.00"), contributor="Alice")
+    moved = Income(account_id=savings.id, name="Transfer from Current", amount=Decimal("300.00"))
+    db.session.add_all([salary, moved])
+    db.session.flush()
+    db.session.add_all(
+        [
+            Bill(account_id=current.id, name="Rent", amount=Decimal("900.00"), due_date=date(2025, 1, 31)),
+            Bill(
+                account_id=current.id,
+                name="To savings",
+                amount=Decimal("300.00"),
+                is_paid=True,
+                linked_income_id=moved.id,
+            ),
+        ]
+    )
+    db.session.commit()
+    return m
+
+
+def test_duplicate_month_copies_rows_and_remaps_transfers(db):
+    from app.duplication import duplicate_month  # type: ignore
+    from app.models import Bill, Income  # type: ignore
+
+    source = _seed_transfer_month(db)
+    copy = duplicate_month(source)
+    db.session.commit()
+
+    assert copy.name == "January 2025 (Copy)"
+    accounts = {a.name: a for a in copy.accounts}
+    assert set(accounts) == {"Current", "Savings"}
+    assert (accounts["Current"].pos_x, accounts["Current"].width) == (50, 400)
+
+    rent = Bill.query.filter_by(account_id=accounts["Current"].id, name="Rent").one()
+    assert rent.due_date == date(2025, 2, 28)
+
+    transfer = Bill.query.filter_by(account_id=accounts["Current"].id, name="To savings").one()
+    linked = db.session.get(Income, transfer.linked_income_id)
+    assert linked.account_id == accounts["Savings"].id
+    assert linked.amount == Decimal("300.00")
+
+
+def test_duplicate_months_forward_shifts_from_the_original(db):
+    from app.duplication import duplicate_months_forward  # type: ignore
+    from app.models import Bill  # type: ignore
+
+    source = _seed_transfer_month(db)
+    created = duplicate_months_forward(source, 3)
+    db.session.commit()
+
+    assert [m.name for m in created] == ["February 2025", "March 2025", "April 2025"]
+    march_rent = next(b for a in created[1].accounts for b in a.bills if b.name == "Rent")
+    assert march_rent.due_date == date(2025, 3, 31)
+    assert Bill.query.count() == 2 * 4
+
+
+def test_shifted_month_name_fallback():
+    from app.duplication import parse_month_name, shifted_month_name  # type: ignore
+
+    assert shifted_month_name("Dec 2024", 1) == "Jan 2025"
+    assert shifted_month_name("Holiday budget", 1) is None
+    assert parse_month_name(" March 2025 ") == (datetime(2025, 3, 1), "%B %Y")
+    assert parse_month_name("Holiday budget") is None
+
+
+def test_duplicate_month_cli(app, db):
+    from app.models import Month  # type: ignore
+
+    source = _seed_transfer_month(db, name="Budget")
+    result = app.test_cli_runner().invoke(args=["duplicate-month", str(source.id), "--count", "2"])
+
+    assert result.exit_code == 0, result.output
+    assert "Budget (+2)" in result.output
+    assert Month.query.count() == 3
+
+    missing = app.test_cli_runner().invoke(args=["duplicate-month", "999"])
+    assert missing.exit_code != 0
+
+
+def test_duplicate_route_creates_copy(auth_client, db):
+    from app.models import Month  # type: ignore
+
+    source_id = _seed_transfer_month(db).id
+    r = auth_client.post(f"/months/{source_id}/duplicate", follow_redirects=False)
+
+    assert r.status_code in (302, 303)
+    assert Month.query.filter_by(name="January 2025 (Copy)").count() == 1
@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+
+def _seed(db):
+    from app.models import Account, Bill, Income, Month  # type: ignore
+
+    ids = []
+    for name in ("July", "August"):
+        month = Month(name=name)
+        db.session.add(month)
+        db.session.flush()
+        acc = Account(month_id=month.id, name="Current")
+        db.session.add(acc)
+        db.session.flush()
+        db.session.add_all(
+            [
+                Bill(account_id=acc.id, name="Rent", amount=Decimal("700.10"), due_date=date(2025, 7, 1)),
+                Income(account_id=acc.id, name="Pay", amount=Decimal("1500.00"), contributor="Sam"),
+            ]
+        )
+        ids.append(month.id)
+    db.session.commit()
+    return ids
+
+
+def test_csv_export_of_one_month(auth_client, db):
+    july, _ = _seed(db)
+
+    resp = auth_client.get(f"/months/{july}/export.csv")
+
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert resp.headers["Content-Disposition"] == f'attachment; filename="month-{july}.csv"'
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert [(r["month"], r["type"], r["name"], r["amount"], r["due_date"], r["person"]) for r in rows] == [
+        ("July", "bill", "Rent", "700.10", "2025-07-01", "Shared"),
+        ("July", "income", "Pay", "1500.00", "", "Sam"),
+    ]
+
+
+def test_jsonl_export_of_every_month_in_chunks(app, db):
+    from app import exporter  # type: ignore
+
+    _seed(db)
+
+    chunks = list(exporter.stream("jsonl", chunk_size=1))
+    rows = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+
+    assert len(chunks) == 4
+    assert [r["month"] for r in rows] == ["July", "July", "August", "August"]
+    assert rows[0]["amount"] == "700.10"
+    assert rows[1]["is_paid"] is None
+
+
+def test_unknown_export_format_is_404(auth_client, db):
+    assert auth_client.get("/months/export.xlsx").status_code == 404
+
+
+def test_export_cli(app, db, tmp_path):
+    _seed(db)
+    out = tmp_path / "all.csv"
+
+    result = app.test_cli_runner().invoke(args=["export-data", "--output", str(out)])
+
+    assert result.exit_code == 0, result.output
+    assert out.read_text().splitlines()[0].startswith("month_id,month,account,type")
+    assert len(out.read_text().splitlines()) == 5
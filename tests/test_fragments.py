@@ -0,0 +1,105 @@
+from decimal import Decimal
+
+import pytest
+
+FRAGMENT = {"X-Fragment": "account-cards"}
+
+
+@pytest.fixture
+def board(db):
+    from app.models import Account, Bill, Month  # type: ignore
+
+    month = Month(name="June")
+    db.session.add(month)
+    db.session.flush()
+    current = Account(month_id=month.id, name="Current")
+    savings = Account(month_id=month.id, name="Savings")
+    db.session.add_all([current, savings])
+    db.session.flush()
+    db.session.add(Bill(account_id=current.id, name="Rent", amount=Decimal("500.00")))
+    db.session.commit()
+    return month.id, current.id, savings.id
+
+
+def _add_bill(client, month_id, account_id, headers=None, **fields):
+    data = {"account_id": account_id, "bill-name": "Phone", "bill-amount": "20.00", "bill-submit": "Save Bill"}
+    data.update(fields)
+    return client.post(f"/months/{month_id}", data=data, headers=headers or {})
+
+
+def test_fragment_add_returns_only_the_changed_card(auth_client, board):
+    month_id, current, savings = board
+
+    resp = _add_bill(auth_client, month_id, current, FRAGMENT)
+    assert resp.status_code == 200
+    assert resp.headers["X-Fragment-Scope"] == "cards"
+    html = resp.get_data(as_text=True)
+    assert html.count('class="account-slot"') == 1 and f'id="account-slot-{current}"' in html
+    assert "Phone" in html and "£520.00" in html
+    assert "<html" not in html and len(html) < len(auth_client.get(f"/months/{month_id}").data)
+
+    # No flash is left behind for the next full page
+    with auth_client.session_transaction() as sess:
+        assert not sess.get("_flashes")
+
+
+def test_fragment_transfer_edit_returns_both_cards(auth_client, board, db):
+    from app.models import Bill  # type: ignore
+
+    month_id, current, savings = board
+    bill = Bill.query.filter_by(name="Rent").one()
+    data = {"name": "Rent", "amount": "500.00", "is_paid": "y", "transfer": "y", "destination_account": savings}
+    resp = auth_client.post(f"/bill/{bill.id}/edit", data=data, headers=FRAGMENT)
+    assert resp.status_code == 200
+    html = resp.get_data(as_text=True)
+    assert f'id="account-slot-{current}"' in html and f'id="account-slot-{savings}"' in html
+    assert "Transfer from Current" in html
+
+    html = auth_client.post(f"/bill/{bill.id}/delete", headers=FRAGMENT).get_data(as_text=True)
+    assert html.count('class="account-slot"') == 2
+    assert "Rent" not in html and "Transfer from Current" not in html
+
+
+def test_account_changes_redraw_the_board_and_full_pages_still_redirect(auth_client, board):
+    month_id, current, savings = board
+
+    resp = auth_client.post(f"/account/{savings}/delete", headers=FRAGMENT)
+    assert resp.headers["X-Fragment-Scope"] == "board"
+    html = resp.get_data(as_text=True)
+    assert f'id="account-slot-{current}"' in html and f'id="account-slot-{savings}"' not in html
+
+    resp = _add_bill(auth_client, month_id, current)
+    assert resp.status_code == 302 and resp.headers["Location"].endswith(f"/months/{month_id}")
+    assert "Bill added." in auth_client.get(resp.headers["Location"]).get_data(as_text=True)
+
+
+def test_rejected_fragment_posts_and_the_card_endpoint(auth_client, board):
+    month_id, current, _ = board
+
+    assert _add_bill(auth_client, month_id, current, FRAGMENT, **{"bill-amount": ""}).status_code == 400
+    assert _add_bill(auth_client, month_id, 999999, FRAGMENT).status_code == 400
+
+    resp = auth_client.get(f"/account/{current}/card")
+    assert resp.status_code == 200 and "Rent" in resp.get_data(as_text=True)
+    assert auth_client.get("/account/999999/card").status_code == 404
+
+
+def test_add_forms_post_fragments_for_their_card(auth_client, board):
+    import re
+
+    month_id, current, savings = board
+    page = auth_client.get(f"/months/{month_id}").get_data(as_text=True)
+    action = f'action="/months/{month_id}" data-fragment'
+    for modal in ("addBillModal", "addIncomeModal"):
+        body = re.search(rf'id="{modal}{savings}".*?</form>', page, re.S).group(0)
+        assert action in body
+
+    html = _add_bill(auth_client, month_id, savings, FRAGMENT).get_data(as_text=True)
+    assert html.count('class="account-slot"') == 1 and f'id="account-slot-{savings}"' in html
+
+    data = {"account_id": savings, "income-name": "Interest", "income-amount": "3.50", "income-submit": ""}
+    resp = auth_client.post(f"/months/{month_id}", data=data, headers=FRAGMENT)
+    assert resp.status_code == 200 and resp.headers["X-Fragment-Scope"] == "cards"
+    html = resp.get_data(as_text=True)
+    assert html.count('class="account-slot"') == 1 and f'id="account-slot-{savings}"' in html
+    assert "Interest" in html and "£3.50" in html
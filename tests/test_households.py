@@ -0,0 +1,118 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from flask import g
+
+
+@pytest.fixture
+def two_households(app, client, db, monkeypatch):
+    """Two signed-up users in separate households, each with one month; returns a sign-in helper."""
+    from app import households  # type: ignore
+    from app.auth import TTLCache  # type: ignore
+    from app.models import Account, Bill, Month, User  # type: ignore
+
+    # Earlier tests' users were deleted in bulk, so their cached rows may still sit under these ids
+    monkeypatch.setitem(app.extensions, "user_cache", TTLCache(60))
+
+    users = {}
+    for name in ("alex", "sam"):
+        user = User(username=name)
+        user.set_password("secret123")
+        households.create_household(user)
+        db.session.add(user)
+        db.session.flush()
+        month = Month(name=f"{name} budget", household_id=user.household_id)
+        account = Account(month=month, name="Current")
+        db.session.add_all([month, account])
+        db.session.flush()
+        due = date.today() + timedelta(days=3)
+        db.session.add(Bill(account_id=account.id, name=f"{name} rent", amount=Decimal("500.00"), due_date=due))
+        db.session.commit()
+        users[name] = (user.id, month.id, account.id)
+
+    def sign_in(name):
+        g.pop("_login_user", None)
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(users[name][0])
+            sess["_fresh"] = True
+        return users[name]
+
+    return sign_in
+
+
+def test_pages_only_show_the_households_months(client, two_households):
+    _, alex_month, alex_account = two_households("alex")
+    _, sam_month, _ = two_households("sam")
+
+    listing = client.get("/months").data
+    assert b"sam budget" in listing and b"alex budget" not in listing
+    assert client.get(f"/months/{alex_month}").status_code == 404
+    assert client.get(f"/account/{alex_account}/edit").status_code == 404
+    assert client.post(f"/months/{alex_month}/delete").status_code == 404
+    assert client.get(f"/months/{sam_month}").status_code == 200
+
+    export = client.get("/months/export.csv").get_data(as_text=True)
+    assert "sam rent" in export and "alex rent" not in export
+    due = client.get("/due").data
+    assert b"sam rent" in due and b"alex rent" not in due
+
+
+def test_api_is_scoped_to_the_household(client, two_households):
+    _, alex_month, alex_account = two_households("alex")
+    two_households("sam")
+
+    months = client.get("/api/v1/months").get_json()["data"]
+    assert [m["name"] for m in months] == ["sam budget"]
+    assert [b["name"] for b in client.get("/api/v1/bills").get_json()["data"]] == ["sam rent"]
+    assert client.get(f"/api/v1/months/{alex_month}").status_code == 404
+    resp = client.post("/api/v1/bills", json={"account_id": alex_account, "name": "Sneaky", "amount": "1"})
+    assert resp.status_code == 400
+
+    created = client.post("/api/v1/months", json={"name": "Shared later"}).get_json()["data"]
+    two_households("alex")
+    assert client.get(f"/api/v1/months/{created['id']}").status_code == 404
+
+
+def test_registration_creates_a_household_and_members_can_join(app, client, db):
+    from app.models import User  # type: ignore
+
+    for name in ("kim", "lee"):
+        client.post("/register", data={"username": name, "password": "secret123", "confirm_password": "secret123"})
+    kim, lee = User.query.filter_by(username="kim").one(), User.query.filter_by(username="lee").one()
+    assert kim.household_id and lee.household_id and kim.household_id != lee.household_id
+
+    result = app.test_cli_runner().invoke(args=["join-household", "lee", "kim"])
+    assert result.exit_code == 0, result.output
+    db.session.expire_all()
+    assert db.session.get(User, lee.id).household_id == kim.household_id
+
+
+def test_household_databases_keep_rows_in_separate_files(app, client, db, two_households, tmp_path, monkeypatch):
+    from sqlalchemy import create_engine, text
+
+    from app import households  # type: ignore
+    from app.models import User  # type: ignore
+
+    ids = {u.username: u.household_id for u in User.query}
+    template = f"sqlite:///{tmp_path}/household-{{household}}.db"
+    binds = households.HouseholdBinds(app, template)
+    monkeypatch.setitem(app.extensions, "bind_resolver", binds)
+
+    for name in ids:
+        two_households(name)
+        assert client.post("/months", data={"name": f"{name} own file"}).status_code == 302
+        page = client.get("/months").data
+        # The months created before the switch stay behind in the main database
+        assert f"{name} own file".encode() in page and f"{name} budget".encode() not in page
+
+    try:
+        for name, household_id in ids.items():
+            engine = create_engine(template.format(household=household_id))
+            with engine.connect() as conn:
+                assert conn.execute(text("SELECT name FROM month")).scalars().all() == [f"{name} own file"]
+            engine.dispose()
+    finally:
+        db.session.remove()
+        for engine in binds.engines.values():
+            engine.dispose()
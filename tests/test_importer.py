@@ -0,0 +1,151 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+CSV_EXPORT = """﻿Date,Description,Amount,Category
+01/07/2025,Rent,-1200.00,housing
+02/07/2025,Salary,"2,500.50",
+03/07/2025,Broken row,not money,
+04/07/2025,,-5.00,
+05/07/2025,Coffee,(3.20),food
+"""
+
+OFX_EXPORT = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20250710120000
+<TRNAMT>-45.99
+<NAME>Electricity
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250711<TRNAMT>100.00<MEMO>Refund</MEMO></STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+@pytest.fixture
+def account(db):
+    from app.models import Account, Month  # type: ignore
+
+    month = Month(name="July")
+    db.session.add(month)
+    db.session.flush()
+    acc = Account(month_id=month.id, name="Current")
+    db.session.add(acc)
+    db.session.commit()
+    return acc
+
+
+def _assert_totals_consistent():
+    from app import balances  # type: ignore
+
+    assert balances.find_discrepancies() == []
+
+
+def test_csv_import_sorts_bills_from_incomes_and_reports_bad_rows(db, account):
+    from app import importer  # type: ignore
+    from app.models import Bill, Income  # type: ignore
+
+    report = importer.import_file(account, io.StringIO(CSV_EXPORT.lstrip("﻿")), "csv")
+
+    assert (report.bills, report.incomes, report.skipped) == (2, 1, 2)
+    assert [(e.line, e.message) for e in report.errors] == [(4, "not a valid amount: 'not money'"), (5, "missing name")]
+    rent = Bill.query.filter_by(name="Rent").one()
+    assert (rent.amount, rent.due_date, rent.category) == (Decimal("1200.00"), date(2025, 7, 1), "housing")
+    assert Bill.query.filter_by(name="Coffee").one().amount == Decimal("3.20")
+    assert Income.query.filter_by(name="Salary").one().amount == Decimal("2500.50")
+    db.session.refresh(account)
+    assert (account.total_bills, account.total_incomes) == (Decimal("1203.20"), Decimal("2500.50"))
+    _assert_totals_consistent()
+
+
+def test_explicit_type_and_debit_credit_columns(db, account):
+    from app import importer  # type: ignore
+    from app.models import Bill, Income  # type: ignore
+
+    data = "name,paid out,paid in,type,owner\nGym,30,,,Sam\nGift,,20,,Alex\nRefund,15,,income,\n"
+    report = importer.import_file(account, io.StringIO(data), "csv")
+
+    assert (report.bills, report.incomes) == (1, 2)
+    assert Bill.query.filter_by(name="Gym").one().owner == "Sam"
+    assert Income.query.filter_by(name="Gift").one().contributor == "Alex"
+    assert Income.query.filter_by(name="Refund").one().amount == Decimal("15.00")
+
+
+def test_ofx_import(db, account):
+    from app import importer  # type: ignore
+    from app.models import Bill, Income  # type: ignore
+
+    report = importer.import_file(account, io.StringIO(OFX_EXPORT), importer.detect_format("statement.OFX"))
+
+    assert (report.bills, report.incomes, report.skipped) == (1, 1, 0)
+    bill = Bill.query.one()
+    assert (bill.name, bill.amount, bill.due_date) == ("Electricity", Decimal("45.99"), date(2025, 7, 10))
+    assert Income.query.one().name == "Refund"
+    _assert_totals_consistent()
+
+
+def test_large_import_commits_in_batches(db, account):
+    from app import importer  # type: ignore
+    from app.models import Bill  # type: ignore
+
+    def rows():
+        yield "date,name,amount\n"
+        for n in range(2500):
+            yield f"2025-07-01,Row {n},-1.01\n"
+
+    seen = []
+    report = importer.import_file(account, rows(), "csv", batch_size=1000, progress=lambda r: seen.append(r.imported))
+
+    assert seen == [1000, 2000, 2500]
+    assert report.bills == 2500
+    assert db.session.scalar(db.select(db.func.count(Bill.id))) == 2500
+    db.session.refresh(account)
+    assert account.total_bills == Decimal("2525.00")
+    _assert_totals_consistent()
+
+
+def test_upload_endpoint(auth_client, db, account):
+    from app.models import Bill  # type: ignore
+
+    resp = auth_client.post(
+        f"/account/{account.id}/import",
+        data={"file": (io.BytesIO(CSV_EXPORT.encode()), "export.csv")},
+        content_type="multipart/form-data",
+        follow_redirects=True,
+    )
+
+    assert resp.status_code == 200
+    assert b"2 bill(s) and 1 income(s) imported, 2 row(s) skipped" in resp.data
+    assert Bill.query.count() == 2
+
+
+def test_unreadable_file_reports_the_rows_already_saved(auth_client, db, account):
+    from app.models import Bill  # type: ignore
+
+    good = "".join(f"2025-07-01,Row {n},-1.01\n" for n in range(2500))
+    data = b"date,name,amount\n" + good.encode() + b"2025-07-02,Bad \xff byte,-1.00\n"
+    resp = auth_client.post(
+        f"/account/{account.id}/import",
+        data={"file": (io.BytesIO(data), "export.csv")},
+        content_type="multipart/form-data",
+        follow_redirects=True,
+    )
+
+    saved = Bill.query.count()
+    assert 0 < saved < 2500
+    page = resp.get_data(as_text=True)
+    assert "Import stopped part way" in page and f"{saved} bill(s) and 0 income(s) imported" in page
+    _assert_totals_consistent()
+
+
+def test_import_cli(app, db, account, tmp_path):
+    path = tmp_path / "statement.ofx"
+    path.write_text(OFX_EXPORT)
+
+    result = app.test_cli_runner().invoke(args=["import-transactions", str(account.id), str(path)])
+
+    assert result.exit_code == 0, result.output
+    assert "1 bill(s) and 1 income(s) imported" in result.output
@@ -0,0 +1,81 @@
+import logging
+import re
+from decimal import Decimal
+
+import pytest
+
+
+@pytest.fixture
+def month(db):
+    from app.models import Account, Bill, Month  # type: ignore
+
+    m = Month(name="June")
+    db.session.add(m)
+    db.session.flush()
+    acc = Account(month_id=m.id, name="Current")
+    db.session.add(acc)
+    db.session.flush()
+    db.session.add(Bill(account_id=acc.id, name="Rent", amount=Decimal("700.00")))
+    db.session.commit()
+    return m
+
+
+def _timings(response):
+    return dict(re.findall(r"(\w+);dur=([\d.]+)", response.headers["Server-Timing"]))
+
+
+def test_server_timing_reports_sql_and_template_time(auth_client, app, month, monkeypatch, query_counter):
+    monkeypatch.setitem(app.extensions, "render_cache", None)
+    url = f"/months/{month.id}"
+    query_counter.clear()
+
+    response = auth_client.get(url)
+
+    assert response.status_code == 200
+    assert set(_timings(response)) == {"app", "db", "tpl"}
+    assert f'desc="{len(query_counter)} queries"' in response.headers["Server-Timing"]
+    assert float(_timings(response)["tpl"]) > 0
+
+
+def test_metrics_endpoint_counts_requests(auth_client, app, db, month, monkeypatch):
+    from app.instrumentation import Metrics  # type: ignore
+
+    monkeypatch.setitem(app.extensions, "metrics", Metrics())
+    auth_client.get(f"/months/{month.id}")
+    auth_client.get(f"/months/{month.id}")
+
+    body = auth_client.get("/metrics").get_data(as_text=True)
+
+    assert 'finances_requests_total{endpoint="main.month_details",method="GET",status="200"} 2' in body
+    assert 'finances_request_duration_seconds_count{endpoint="main.month_details"} 2' in body
+    assert 'finances_request_duration_seconds_bucket{endpoint="main.month_details",le="+Inf"} 2' in body
+    assert re.search(r'finances_sql_queries_total\{endpoint="main.month_details"\} [1-9]', body)
+
+
+def test_metrics_token(client, app, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", "s3cret")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cre"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_metrics_are_off_in_production_without_a_token(client, app, monkeypatch):
+    monkeypatch.setattr(app, "testing", False)
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", None)
+
+    assert client.get("/metrics").status_code == 404
+    monkeypatch.setattr(app, "debug", True)
+    assert client.get("/metrics").status_code == 200
+
+
+def test_slow_requests_are_logged_with_their_statements(auth_client, app, month, monkeypatch, caplog):
+    monkeypatch.setitem(app.config, "SLOW_REQUEST_MS", 0.0001)
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        auth_client.get(f"/months/{month.id}")
+
+    [record] = [r for r in caplog.records if r.getMessage().startswith("Slow request")]
+    message = record.getMessage()
+    assert f"GET /months/{month.id}" in message
+    assert "SELECT" in message
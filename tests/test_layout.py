@@ -0,0 +1,47 @@
+def _board(db, cards=3):
+    from app.models import Account, Month  # type: ignore
+
+    month = Month(name="Board")
+    other = Month(name="Elsewhere")
+    db.session.add_all([month, other])
+    db.session.flush()
+    accounts = [Account(month_id=month.id, name=f"Account {n}") for n in range(cards)]
+    stranger = Account(month_id=other.id, name="Not on this board")
+    db.session.add_all([*accounts, stranger])
+    db.session.commit()
+    return month.id, [a.id for a in accounts], stranger.id
+
+
+def test_layout_saves_every_card_in_one_transaction(auth_client, db, query_counter):
+    from app.models import Account  # type: ignore
+
+    month_id, account_ids, _ = _board(db)
+    cards = [{"id": a, "x": 50 * n, "y": 100, "width": 350, "height": 300} for n, a in enumerate(account_ids)]
+    query_counter.clear()
+
+    resp = auth_client.post(f"/months/{month_id}/layout", json={"accounts": cards})
+
+    assert resp.status_code == 200
+    assert resp.get_json() == {"success": True, "updated": 3}
+    assert sum(s.lstrip().upper().startswith("UPDATE ACCOUNT") for s in query_counter) == 1
+    db.session.expire_all()
+    saved = [(a.pos_x, a.pos_y, a.width, a.height) for a in db.session.get(Account, account_ids[0]).month.accounts]
+    assert saved == [(0, 100, 350, 300), (50, 100, 350, 300), (100, 100, 350, 300)]
+
+
+def test_layout_rejects_bad_input_without_writing(auth_client, db):
+    from app.models import Account  # type: ignore
+
+    month_id, account_ids, stranger_id = _board(db, cards=1)
+    good = {"id": account_ids[0], "x": 10, "y": 10, "width": 300, "height": 250}
+
+    assert auth_client.post(f"/months/{month_id}/layout", json={}).status_code == 400
+    assert auth_client.post(f"/months/{month_id}/layout", json={"accounts": [{**good, "x": "left"}]}).status_code == 400
+    resp = auth_client.post(
+        f"/months/{month_id}/layout",
+        json={"accounts": [good, {**good, "id": stranger_id}]},
+    )
+    assert resp.status_code == 404
+
+    db.session.expire_all()
+    assert db.session.get(Account, account_ids[0]).pos_x == 0
@@ -0,0 +1,71 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+
+@pytest.fixture
+def months(db):
+    from app.models import Account, Bill, Month  # type: ignore
+
+    start = datetime(2024, 1, 1)
+    rows = [Month(name=f"Month {i:02d}", created_at=start + timedelta(days=i // 2)) for i in range(7)]
+    rows.append(Month(name="100%_real", created_at=start + timedelta(days=30)))
+    db.session.add_all(rows)
+    db.session.flush()
+    acc = Account(month_id=rows[0].id, name="Current")
+    db.session.add(acc)
+    db.session.flush()
+    db.session.add_all(Bill(account_id=acc.id, name=f"Bill {i}", amount=Decimal("1.00")) for i in range(3))
+    db.session.commit()
+    return rows
+
+
+def test_pages_follow_the_cursor_without_gaps(db, months):
+    from app import listing  # type: ignore
+
+    seen, after = [], None
+    while True:
+        page = listing.month_page(after=after, limit=3)
+        seen.extend(m.name for m in page.months)
+        if page.next_cursor is None:
+            break
+        after = page.next_cursor
+
+    # Newest first; months created at the same moment fall back to id order
+    assert seen == ["100%_real", *(f"Month {i:02d}" for i in reversed(range(7)))]
+
+
+def test_summary_rows_carry_counts_and_totals(db, months):
+    from app import listing  # type: ignore
+
+    oldest = listing.month_page(search="Month 00").months
+    assert [(m.accounts, m.bills, m.incomes, m.total_bills) for m in oldest] == [(1, 3, 0, Decimal("3.00"))]
+
+
+def test_search_and_date_filters(db, months):
+    from app import listing  # type: ignore
+
+    assert [m.name for m in listing.month_page(search="%_").months] == ["100%_real"]
+    assert [m.name for m in listing.month_page(search="month 0", since=date(2024, 1, 3)).months] == [
+        "Month 06",
+        "Month 05",
+        "Month 04",
+    ]
+    assert [m.name for m in listing.month_page(until=date(2024, 1, 1)).months] == ["Month 01", "Month 00"]
+
+
+def test_months_route_pages_in_constant_queries(auth_client, app, db, months, monkeypatch, query_counter):
+    monkeypatch.setitem(app.config, "MONTHS_PAGE_SIZE", 3)
+
+    query_counter.clear()
+    first = auth_client.get("/months")
+    assert len([s for s in query_counter if "FROM month" in s]) == 1
+    assert b"100%_real" in first.data and b"Month 04" not in first.data
+
+    older = first.data.split(b'href="/months?after=')[1].split(b'"')[0].decode().replace("&amp;", "&")
+    second = auth_client.get(f"/months?after={older}")
+    assert b"Month 04" in second.data and b"100%_real" not in second.data
+
+    # A mangled cursor falls back to the first page
+    assert b"100%_real" in auth_client.get("/months?after=nonsense").data
@@ -0,0 +1,129 @@
+import os
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A scratch database: TEST_DATABASE_URL when set (e.g. a local PostgreSQL container), else a SQLite file."""
+    from app.config import normalise_database_url  # type: ignore
+    from app.extensions import db as _db  # type: ignore
+
+    url = os.environ.get("TEST_DATABASE_URL")
+    eng = create_engine(normalise_database_url(url) if url else f"sqlite:///{tmp_path / 'migrate.db'}")
+    try:
+        yield eng
+    finally:
+        _db.metadata.drop_all(eng)
+        with eng.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS schema_version"))
+        eng.dispose()
+
+
+def _index_names(eng, table):
+    return {ix["name"] for ix in inspect(eng).get_indexes(table)}
+
+
+def test_upgrade_creates_schema_and_is_idempotent(app, engine):
+    from app import migrations  # type: ignore
+
+    applied = migrations.upgrade(engine)
+
+    assert applied == [m.version for m in migrations.MIGRATIONS]
+    with engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.head()
+    assert {"user", "month", "account", "bill", "income"} <= set(inspect(engine).get_table_names())
+    assert {"ix_bill_account_id_due_date", "ix_bill_linked_income"} <= _index_names(engine, "bill")
+    assert "ix_month_created_at" in _index_names(engine, "month")
+    assert migrations.upgrade(engine) == []
+
+
+def test_upgrade_replaces_superseded_bill_indexes(app, engine):
+    from app import migrations  # type: ignore
+
+    migrations.upgrade(engine)
+    # A database that stopped at version 3 still has the single-column indexes
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX ix_bill_account_id ON bill (account_id)"))
+        conn.execute(text("CREATE INDEX ix_bill_linked_income_id ON bill (linked_income_id)"))
+        conn.execute(text("UPDATE schema_version SET version = 3"))
+
+    assert migrations.upgrade(engine) == [m.version for m in migrations.MIGRATIONS if m.version > 3]
+    names = _index_names(engine, "bill")
+    assert "ix_bill_account_id" not in names
+    assert "ix_bill_linked_income_id" not in names
+    assert "ix_bill_account_id_due_date" in names
+
+
+def test_upgrade_brings_legacy_database_up_to_date(app, tmp_path):
+    from app import migrations  # type: ignore
+
+    eng = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    # The schema as create_all() built it before migrations existed
+    with eng.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE month (id INTEGER PRIMARY KEY, name VARCHAR(50) NOT NULL, archived BOOLEAN, created_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE account (id INTEGER PRIMARY KEY, month_id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, pos_x INTEGER, pos_y INTEGER, width INTEGER, height INTEGER, created_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE income (id INTEGER PRIMARY KEY, account_id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, amount NUMERIC(12, 2) NOT NULL, contributor VARCHAR(50), created_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE bill (id INTEGER PRIMARY KEY, account_id INTEGER NOT NULL, linked_income_id INTEGER, name VARCHAR(100) NOT NULL, amount NUMERIC(12, 2) NOT NULL, due_date DATE, category VARCHAR(50), is_paid BOOLEAN, owner VARCHAR(50), created_at DATETIME)"
+            )
+        )
+        conn.execute(text("INSERT INTO month (id, name) VALUES (1, 'Old')"))
+        conn.execute(text("INSERT INTO account (id, month_id, name) VALUES (1, 1, 'Current'), (2, 1, 'Savings')"))
+        conn.execute(text("INSERT INTO bill (account_id, name, amount) VALUES (1, 'Rent', 0.1), (1, 'Water', 0.2)"))
+        conn.execute(text("INSERT INTO income (account_id, name, amount) VALUES (2, 'Interest', 5)"))
+
+    assert migrations.upgrade(eng) == [m.version for m in migrations.MIGRATIONS]
+
+    with eng.connect() as conn:
+        rows = conn.execute(text("SELECT id, total_bills, total_incomes FROM account ORDER BY id")).all()
+        month = conn.execute(text("SELECT total_bills, total_incomes FROM month")).one()
+        created_at = conn.scalar(text("SELECT created_at FROM month"))
+        household_id = conn.scalar(text("SELECT household_id FROM month"))
+        indexed = conn.scalars(text("SELECT rowid FROM bill_fts WHERE bill_fts MATCH 'water'")).all()
+        journaled = conn.execute(text("SELECT resource, COUNT(*) FROM change_log GROUP BY resource")).all()
+    assert [(r[0], Decimal(str(r[1])), Decimal(str(r[2]))) for r in rows] == [
+        (1, Decimal("0.3"), Decimal("0")),
+        (2, Decimal("0"), Decimal("5")),
+    ]
+    assert (Decimal(str(month[0])), Decimal(str(month[1]))) == (Decimal("0.3"), Decimal("5"))
+    assert "ix_account_month_id" in _index_names(eng, "account")
+    assert created_at is not None
+    # Months from before households existed all land in one shared household
+    assert household_id is not None
+    # Existing bills are indexed for search
+    assert indexed == [2]
+    # and journaled, so a client syncing from version 0 receives them
+    assert sorted(journaled) == [("accounts", 2), ("bills", 2), ("incomes", 1), ("months", 1)]
+    eng.dispose()
+
+
+def test_normalise_database_url():
+    from app.config import normalise_database_url  # type: ignore
+
+    assert normalise_database_url("postgres://u:p@db/finances") == "postgresql+psycopg://u:p@db/finances"
+    assert normalise_database_url("postgresql://db/finances") == "postgresql+psycopg://db/finances"
+    assert normalise_database_url("sqlite:///x.db") == "sqlite:///x.db"
+
+
+def test_upgrade_db_cli(app, db):
+    from app import migrations  # type: ignore
+
+    result = app.test_cli_runner().invoke(args=["upgrade-db"])
+    assert result.exit_code == 0
+    assert f"version {migrations.head()}" in result.output
@@ -0,0 +1,98 @@
+import re
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+# A plan line that reads a whole table without an index; SQLite before 3.36 writes it as
+# "SCAN TABLE name". Sorting a handful of rows that were found through an index is fine;
+# an unindexed ORDER BY shows up as a full scan.
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+
+
+@pytest.fixture
+def seeded(db):
+    from app.models import Account, Bill, Income, Month  # type: ignore
+
+    ids = {}
+    for n in range(3):
+        m = Month(name=f"Month {n}")
+        db.session.add(m)
+        db.session.flush()
+        current = Account(month_id=m.id, name="Current")
+        savings = Account(month_id=m.id, name="Savings")
+        db.session.add_all([current, savings])
+        db.session.flush()
+        moved = Income(account_id=savings.id, name="Transfer from Current", amount=Decimal("50.00"))
+        pay = Income(account_id=current.id, name="Pay", amount=Decimal("1000.00"))
+        db.session.add_all([moved, pay])
+        db.session.flush()
+        bills = [
+            Bill(account_id=current.id, name="Rent", amount=Decimal("700.00"), due_date=date(2025, 1, 1)),
+            Bill(account_id=current.id, name="To savings", amount=Decimal("50.00"), linked_income_id=moved.id),
+        ]
+        db.session.add_all(bills)
+        db.session.commit()
+        ids = {"month": m.id, "account": current.id, "bill": bills[0].id, "transfer": moved.id}
+    return ids
+
+
+def _capture(db):
+    captured = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    return captured, lambda: event.remove(db.engine, "before_cursor_execute", _record)
+
+
+def _plan_problems(db, statements):
+    problems = []
+    conn = db.session.connection()
+    for statement, parameters in statements:
+        for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+            detail = row[-1]
+            if FULL_SCAN.match(detail):
+                problems.append(f"{detail}\n    in: {' '.join(statement.split())}")
+    return problems
+
+
+def _run(client, method, url, seeded, kwargs):
+    if callable(kwargs):
+        kwargs = kwargs(seeded)
+    return getattr(client, method)(url.format(**seeded), **kwargs)
+
+
+HOT_REQUESTS = [
+    ("get", "/months", {}),
+    ("get", "/months/{month}", {}),
+    ("post", "/bill/{bill}/edit", {"data": {"name": "Rent", "amount": "710.00", "destination_account": "0"}}),
+    ("post", "/account/{account}/update_position", {"json": {"x": 10, "y": 20, "width": 300, "height": 250}}),
+    (
+        "post",
+        "/months/{month}/layout",
+        lambda ids: {"json": {"accounts": [{"id": ids["account"], "x": 0, "y": 0, "width": 300, "height": 250}]}},
+    ),
+    ("post", "/months/{month}/duplicate", {}),
+    ("post", "/income/{transfer}/delete", {}),
+    ("post", "/bill/{bill}/delete", {}),
+    ("post", "/months/{month}/delete", {}),
+]
+
+
+@pytest.mark.parametrize(("method", "url", "kwargs"), HOT_REQUESTS, ids=[f"{m} {u}" for m, u, _ in HOT_REQUESTS])
+def test_hot_queries_use_indexes(auth_client, db, seeded, method, url, kwargs):
+    captured, stop = _capture(db)
+    try:
+        resp = _run(auth_client, method, url, seeded, kwargs)
+    finally:
+        stop()
+
+    assert resp.status_code in (200, 302)
+    assert captured
+    db.session.remove()
+    problems = _plan_problems(db, captured)
+    assert not problems, "query plan regressed to a full table scan:\n" + "\n".join(problems)
@@ -0,0 +1,196 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+
+def _template(**kw):
+    from app.models import RecurringBill  # type: ignore
+
+    values = {
+        "name": "Rent",
+        "amount": Decimal("950.00"),
+        "account_name": "Current",
+        "frequency": "monthly",
+        "interval": 1,
+        "start_date": date(2025, 1, 31),
+    }
+    values.update(kw)
+    return RecurringBill(**values)
+
+
+def test_occurrences_by_frequency():
+    from app.recurrence import occurrences  # type: ignore
+
+    window = (date(2025, 1, 1), date(2025, 4, 30))
+    assert occurrences(_template(), *window) == [
+        date(2025, 1, 31),
+        date(2025, 2, 28),
+        date(2025, 3, 31),
+        date(2025, 4, 30),
+    ]
+    weekly = _template(frequency="weekly", interval=2, start_date=date(2025, 1, 6), end_date=date(2025, 2, 10))
+    assert occurrences(weekly, *window) == [date(2025, 1, 6), date(2025, 1, 20), date(2025, 2, 3)]
+    annual = _template(frequency="annual", start_date=date(2024, 3, 15))
+    assert occurrences(annual, *window) == [date(2025, 3, 15)]
+    # Fifth Friday: only January and May 2025 have one, and the last Friday always exists
+    fifth = _template(frequency="nth_weekday", weekday=4, week_of_month=5, start_date=date(2025, 1, 1))
+    assert occurrences(fifth, date(2025, 1, 1), date(2025, 5, 31)) == [date(2025, 1, 31), date(2025, 5, 30)]
+    last = _template(frequency="nth_weekday", weekday=4, week_of_month=-1, start_date=date(2025, 1, 1))
+    assert occurrences(last, *window)[1] == date(2025, 2, 28)
+
+
+def test_validate_rejects_impossible_schedules():
+    from app.recurrence import validate  # type: ignore
+
+    validate(_template())
+    for bad in (
+        _template(frequency="daily"),
+        _template(interval=0),
+        _template(end_date=date(2024, 1, 1)),
+        _template(frequency="nth_weekday", weekday=2, week_of_month=6),
+    ):
+        with pytest.raises(ValueError):
+            validate(bad)
+
+
+def test_materialize_is_idempotent_and_keeps_totals(db, query_counter):
+    from app import recurrence  # type: ignore
+    from app.balances import find_discrepancies  # type: ignore
+    from app.models import Account, Bill, Month  # type: ignore
+
+    january = Month(name="January 2025")
+    db.session.add(january)
+    db.session.add(Account(month=january, name="Current"))
+    db.session.add(_template())
+    db.session.add(_template(name="Gym", amount=Decimal("30.00"), frequency="weekly", start_date=date(2025, 1, 6)))
+    db.session.commit()
+
+    query_counter.clear()
+    report = recurrence.materialize(date(2025, 12, 31), since=date(2025, 1, 1))
+    db.session.commit()
+
+    assert (report.bills, report.months, report.accounts) == (12 + 52, 11, 11)
+    assert report.amount == Decimal("950.00") * 12 + Decimal("30.00") * 52
+    # A year of bills goes in one insert rather than a statement per bill
+    assert sum("INSERT INTO bill" in s for s in query_counter) == 1
+    assert Account.query.filter_by(month_id=january.id).count() == 1
+    assert db.session.get(Month, january.id).total_bills == Decimal("1070.00")
+    assert find_discrepancies() == []
+
+    again = recurrence.materialize(date(2025, 12, 31), since=date(2025, 1, 1))
+    db.session.commit()
+    assert again.bills == 0
+    assert Bill.query.count() == 64
+
+
+def test_materialize_skips_archived_months(db):
+    from app import archive, recurrence  # type: ignore
+    from app.models import Account, Month  # type: ignore
+
+    february = Month(name="February 2025")
+    db.session.add(february)
+    db.session.add(Account(month=february, name="Current"))
+    db.session.add(_template())
+    db.session.commit()
+    archive.archive_month(february)
+    db.session.commit()
+
+    report = recurrence.materialize(date(2025, 3, 31), since=date(2025, 2, 1))
+    db.session.commit()
+
+    assert (report.bills, report.skipped) == (1, 1)
+    assert Account.query.filter_by(month_id=february.id).count() == 0
+
+
+def test_materialize_loads_only_the_months_and_schedules_it_fills(db):
+    from app import recurrence  # type: ignore
+    from app.models import Account, Month, RecurringBill  # type: ignore
+
+    old = Month(name="March 2024")
+    later = Month(name="June 2025")
+    db.session.add_all([old, later, Account(month=old, name="Current"), Account(month=later, name="Current")])
+    db.session.add(_template(name="Old lease", start_date=date(2023, 1, 1), end_date=date(2024, 12, 31)))
+    db.session.add(_template(start_date=date(2025, 1, 1)))
+    db.session.commit()
+    ids = (old.id, later.id)
+    db.session.expunge_all()
+
+    loaded = []
+
+    def on_load(session, obj):
+        loaded.append(obj)
+
+    event.listen(db.session, "loaded_as_persistent", on_load)
+    try:
+        report = recurrence.materialize(date(2025, 3, 31), since=date(2025, 2, 1))
+    finally:
+        event.remove(db.session, "loaded_as_persistent", on_load)
+
+    assert report.bills == 2
+    assert not [obj for obj in loaded if getattr(obj, "id", None) in ids and isinstance(obj, Month)]
+    assert not [obj for obj in loaded if isinstance(obj, Account) and obj.month_id in ids]
+    assert [obj.name for obj in loaded if isinstance(obj, RecurringBill)] == ["Rent"]
+    db.session.rollback()
+
+
+def test_materialize_bills_cli(app, db):
+    from app.models import Bill  # type: ignore
+
+    db.session.add(_template(start_date=date(2025, 1, 1)))
+    db.session.commit()
+    runner = app.test_cli_runner()
+
+    args = ["materialize-bills", "--since", "2025-01-01", "--until", "2025-06-30"]
+    result = runner.invoke(args=args)
+    assert result.exit_code == 0, result.output
+    assert "Added 6 bills" in result.output
+    assert "Added 0 bills" in runner.invoke(args=args).output
+    assert Bill.query.count() == 6
+
+
+def test_recurring_bills_api_validates_schedules(auth_client, db):
+    created = auth_client.post(
+        "/api/v1/recurring_bills",
+        json={"name": "Council tax", "amount": "180", "account_name": "Current", "start_date": "2025-04-01"},
+    )
+    assert created.status_code == 201
+    assert created.get_json()["data"]["frequency"] == "monthly"
+
+    bad = auth_client.post(
+        "/api/v1/recurring_bills",
+        json={
+            "name": "Market",
+            "amount": "20",
+            "account_name": "Current",
+            "start_date": "2025-04-01",
+            "frequency": "nth_weekday",
+            "weekday": 9,
+            "week_of_month": 1,
+        },
+    )
+    assert bad.status_code == 400
+    assert "weekday" in bad.get_json()["error"]
+
+
+def test_deleted_and_restored_occurrences_are_not_materialized_again(db):
+    from app import archive, recurrence  # type: ignore
+    from app.models import Bill, Month  # type: ignore
+
+    db.session.add(_template(start_date=date(2025, 1, 1)))
+    db.session.commit()
+    assert recurrence.materialize(date(2025, 3, 31), since=date(2025, 1, 1)).bills == 3
+    db.session.commit()
+
+    db.session.delete(Bill.query.filter_by(due_date=date(2025, 1, 1)).one())
+    february = Month.query.filter_by(name="February 2025").one()
+    archive.archive_month(february)
+    db.session.commit()
+    archive.restore_month(february)
+    db.session.commit()
+    assert Bill.query.filter_by(due_date=date(2025, 2, 1)).one().recurring_bill_id is not None
+
+    assert recurrence.materialize(date(2025, 3, 31), since=date(2025, 1, 1)).bills == 0
+    db.session.commit()
+    assert sorted(b.due_date.month for b in Bill.query) == [2, 3]
@@ -0,0 +1,166 @@
+import re
+from decimal import Decimal
+
+import pytest
+
+
+@pytest.fixture
+def month(db):
+    from app.models import Account, Bill, Month  # type: ignore
+
+    m = Month(name="June")
+    db.session.add(m)
+    db.session.flush()
+    acc = Account(month_id=m.id, name="Current")
+    db.session.add(acc)
+    db.session.flush()
+    db.session.add(Bill(account_id=acc.id, name="Rent", amount=Decimal("700.00")))
+    db.session.commit()
+    return m
+
+
+def _version(db, month_id):
+    from app.models import Month  # type: ignore
+
+    return db.session.scalar(db.select(Month.version).where(Month.id == month_id))
+
+
+def test_unchanged_month_is_served_from_cache(auth_client, db, month):
+    from app.models import Bill  # type: ignore
+
+    first = auth_client.get(f"/months/{month.id}")
+    second = auth_client.get(f"/months/{month.id}")
+    assert (first.headers["X-Render-Cache"], second.headers["X-Render-Cache"]) == ("miss", "hit")
+    assert first.data == second.data
+
+    bill = Bill.query.one()
+    bill.name = "Mortgage"
+    db.session.commit()
+
+    third = auth_client.get(f"/months/{month.id}")
+    assert third.headers["X-Render-Cache"] == "miss"
+    assert b"Mortgage" in third.data
+
+
+def test_etag_answers_304_until_the_month_changes(auth_client, db, month):
+    etag = auth_client.get(f"/months/{month.id}").headers["ETag"]
+
+    assert auth_client.get(f"/months/{month.id}", headers={"If-None-Match": etag}).status_code == 304
+
+    auth_client.post(
+        f"/months/{month.id}/layout",
+        json={"accounts": [{"id": month.accounts[0].id, "x": 50, "y": 0, "width": 300, "height": 250}]},
+    )
+    assert auth_client.get(f"/months/{month.id}", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_pages_with_flash_messages_are_not_cached(auth_client, db, month):
+    auth_client.post(f"/months/{month.id}/edit", data={"name": "July"})
+
+    flashed = auth_client.get(f"/months/{month.id}")
+    assert b"Month updated" in flashed.data
+    assert "ETag" not in flashed.headers
+
+    after = auth_client.get(f"/months/{month.id}")
+    assert b"Month updated" not in after.data
+
+
+def test_every_kind_of_change_bumps_the_version(db, month):
+    from app import balances  # type: ignore
+    from app.models import Account, Bill, Income, Month  # type: ignore
+
+    other = Month(name="July")
+    db.session.add(other)
+    db.session.commit()
+    elsewhere = Account(month_id=other.id, name="Savings")
+    db.session.add(elsewhere)
+    db.session.commit()
+
+    seen = [_version(db, month.id)]
+
+    def changed():
+        version = _version(db, month.id)
+        assert version > seen[-1]
+        seen.append(version)
+
+    account = month.accounts[0]
+    db.session.add(Income(account_id=account.id, name="Pay", amount=Decimal("1")))
+    db.session.commit()
+    changed()
+
+    account.name = "Main"
+    db.session.commit()
+    changed()
+
+    # Moving a bill out of the month invalidates both months
+    other_version = _version(db, other.id)
+    bill = Bill.query.filter_by(account_id=account.id).one()
+    bill.account_id = elsewhere.id
+    db.session.commit()
+    changed()
+    assert _version(db, other.id) > other_version
+
+    db.session.execute(db.update(Month).where(Month.id == month.id).values(total_bills=5))
+    db.session.commit()
+    balances.rebuild()
+    db.session.commit()
+    changed()
+
+
+def test_csrf_tokens_are_per_session_on_cached_pages(tmp_path):
+    from app import create_app  # type: ignore
+    from app.extensions import db as _db  # type: ignore
+    from app.models import Month, User  # type: ignore
+
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'csrf.db'}",
+            "DB_AUTO_UPGRADE": True,
+            "WTF_CSRF_ENABLED": True,
+        }
+    )
+    with app.app_context():
+        user = User(username="csrf")
+        user.set_password("secret123")
+        month = Month(name="June")
+        _db.session.add_all([user, month])
+        _db.session.commit()
+        user_id, month_id = user.id, month.id
+
+    def page(client):
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(user_id)
+            sess["_fresh"] = True
+        resp = client.get(f"/months/{month_id}")
+        return resp.headers["X-Render-Cache"], set(
+            re.findall(rb'name="csrf_token" type="hidden" value="([^"]+)"', resp.data)
+        )
+
+    first, second = app.test_client(), app.test_client()
+    state_a, tokens_a = page(first)
+    state_b, tokens_b = page(second)
+
+    assert (state_a, state_b) == ("miss", "hit")
+    assert len(tokens_a) == len(tokens_b) == 1
+    assert tokens_a != tokens_b
+    with app.app_context():
+        _db.engine.dispose()
+
+
+def test_backends(tmp_path):
+    from app.render_cache import FileSystemCache, LRUCache  # type: ignore
+
+    lru = LRUCache(maxsize=2)
+    lru.set("a", "1")
+    lru.set("b", "2")
+    lru.get("a")
+    lru.set("c", "3")
+    assert (lru.get("a"), lru.get("b"), lru.get("c")) == ("1", None, "3")
+
+    fs = FileSystemCache(str(tmp_path), maxsize=2)
+    fs.PRUNE_EVERY = 3
+    for key in "abc":
+        fs.set(key, key.upper())
+    assert fs.get("c") == "C"
+    assert len(list(tmp_path.glob("*.html"))) == 2
+    assert fs.get("missing") is None
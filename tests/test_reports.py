@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+import pytest
+
+
+@pytest.fixture
+def history(db):
+    from app.models import Account, Bill, Income, Month  # type: ignore
+
+    def month(name, bills, incomes=()):
+        m = Month(name=name)
+        db.session.add(m)
+        db.session.flush()
+        acc = Account(month_id=m.id, name="Current")
+        db.session.add(acc)
+        db.session.flush()
+        for category, owner, amount in bills:
+            db.session.add(Bill(account_id=acc.id, name="x", category=category, owner=owner, amount=Decimal(amount)))
+        for contributor, amount in incomes:
+            db.session.add(Income(account_id=acc.id, name="pay", contributor=contributor, amount=Decimal(amount)))
+        return m
+
+    # Created out of calendar order on purpose
+    april = month("April 2025", [("food", "Sam", "10.10"), ("", "Alex", "5.00")])
+    march = month("March 2025", [("food", "Sam", "0.10"), ("food", "Sam", "0.20"), ("rent", "Alex", "700")])
+    last_march = month("March 2024", [("rent", "Alex", "650")], [("Sam", "1500")])
+    db.session.commit()
+    return {"april": april.id, "march": march.id, "last_march": last_march.id}
+
+
+def test_trend_by_category(history):
+    from app import reports  # type: ignore
+
+    trend = reports.trend("category")
+
+    assert [m.name for m in trend.months] == ["March 2024", "March 2025", "April 2025"]
+    assert trend.series == {
+        "rent": [Decimal("650.00"), Decimal("700.00"), Decimal("0.00")],
+        "food": [Decimal("0.00"), Decimal("0.30"), Decimal("10.10")],
+        "(none)": [Decimal("0.00"), Decimal("0.00"), Decimal("5.00")],
+    }
+    assert trend.totals == [Decimal("650.00"), Decimal("700.30"), Decimal("15.10")]
+
+
+def test_year_over_year(history):
+    from app import reports  # type: ignore
+
+    (comparison,) = reports.year_over_year("owner")
+
+    assert (comparison.month.id, comparison.previous.id) == (history["march"], history["last_march"])
+    assert comparison.by_key == {
+        "Alex": (Decimal("700.00"), Decimal("650.00")),
+        "Sam": (Decimal("0.30"), Decimal("0.00")),
+    }
+    assert comparison.change == Decimal("50.30")
+
+
+def test_archived_months_are_left_out(history, db):
+    from app import archive, reports  # type: ignore
+    from app.models import Month  # type: ignore
+
+    archive.archive_month(db.session.get(Month, history["last_march"]))
+    db.session.commit()
+
+    assert [m.name for m in reports.trend("category").months] == ["March 2025", "April 2025"]
+    assert reports.year_over_year("owner") == []
+
+
+def test_report_queries_do_not_grow_with_rows(history, db, query_counter):
+    from app import reports  # type: ignore
+    from app.models import Account, Bill  # type: ignore
+
+    reports.trend("contributor")
+    before = len(query_counter)
+    account_id = db.session.scalar(db.select(Account.id).limit(1))
+    db.session.add_all(Bill(account_id=account_id, name="more", amount=Decimal("1")) for _ in range(50))
+    db.session.commit()
+    query_counter.clear()
+
+    reports.trend("contributor")
+
+    assert len(query_counter) == before
+
+
+def test_reports_page_and_api(auth_client, history):
+    page = auth_client.get("/reports?dimension=owner")
+    assert page.status_code == 200
+    assert b"March 2024" in page.data
+    assert auth_client.get("/reports?dimension=colour").status_code == 404
+
+    data = auth_client.get(f"/api/v1/reports/contributor?months={history['last_march']}").get_json()
+    assert data["months"] == [{"id": history["last_march"], "name": "March 2024", "period": "2024-03"}]
+    assert data["series"] == {"Sam": ["1500.00"]}
+    assert auth_client.get("/api/v1/reports/colour").status_code == 404
@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+
+def _seed(db):
+    from app.models import Account, Bill, Income, Month  # type: ignore
+
+    accounts = []
+    for name in ("January", "February"):
+        month = Month(name=name)
+        account = Account(month=month, name=f"{name} current")
+        db.session.add_all([month, account])
+        accounts.append(account)
+    jan, feb = accounts
+    db.session.add_all(
+        [
+            Bill(account=jan, name="Car insurance", amount=Decimal("30.00"), category="insurance"),
+            Bill(account=feb, name="Home insurance", amount=Decimal("18.50"), category="insurance", owner="Alex"),
+            Bill(account=feb, name="Rent", amount=Decimal("950.00"), category="housing"),
+            Income(account=jan, name="Salary", amount=Decimal("2000.00"), contributor="Alex"),
+        ]
+    )
+    db.session.commit()
+
+
+def test_search_ranks_matches_across_months_and_kinds(db):
+    from app import search  # type: ignore
+
+    _seed(db)
+    hits = search.search("insur").hits
+    assert {(h.name, h.month) for h in hits} == {("Car insurance", "January"), ("Home insurance", "February")}
+    # Matching the name and the category beats matching the category alone
+    assert search.search("home insurance").hits[0].name == "Home insurance"
+    assert [(h.kind, h.name) for h in search.search("alex").hits] == [("bill", "Home insurance"), ("income", "Salary")]
+    # Every word has to match, and FTS5 syntax is taken as plain text
+    assert search.search("car rent").hits == []
+    assert search.search('rent OR "car" name:*').hits == []
+    assert search.search("  ").hits == []
+
+
+def test_index_follows_inserts_updates_and_deletes(db):
+    from sqlalchemy import delete, insert
+
+    from app import search  # type: ignore
+    from app.models import Account, Bill  # type: ignore
+
+    _seed(db)
+    rent = Bill.query.filter_by(name="Rent").one()
+    rent.name = "Mortgage"
+    db.session.commit()
+    assert search.search("rent").hits == [] and [h.id for h in search.search("mortg").hits] == [rent.id]
+
+    # Bulk statements skip the ORM, the triggers still see them
+    account_id = db.session.scalar(db.select(Account.id).limit(1))
+    db.session.execute(insert(Bill), [{"account_id": account_id, "name": "Water rates", "amount": Decimal("25.00")}])
+    db.session.execute(delete(Bill).where(Bill.name == "Car insurance"))
+    db.session.commit()
+    assert [h.name for h in search.search("water").hits] == ["Water rates"]
+    assert [h.name for h in search.search("insurance").hits] == ["Home insurance"]
+
+
+def test_like_fallback_without_the_index(db, monkeypatch):
+    from app import search  # type: ignore
+
+    _seed(db)
+    monkeypatch.setattr(search, "_fts_ready", lambda: False)
+    hits = search.search("INSUR 100%").hits
+    assert hits == []
+    hits = search.search("insur").hits
+    # Newest month first
+    assert [(h.name, h.month) for h in hits] == [("Home insurance", "February"), ("Car insurance", "January")]
+
+
+def test_search_reads_only_matching_rows(db):
+    from sqlalchemy import text
+
+    from app import search  # type: ignore
+    from app.models import Month  # type: ignore
+
+    stmt = search._statement(["rent"], fts=True, owner=Month.household_id.is_(None))
+    compiled = stmt.compile(db.engine, compile_kwargs={"literal_binds": True})
+    plan = " ".join(row[-1] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+    assert "SCAN bill_fts VIRTUAL TABLE" in plan and "SCAN income_fts VIRTUAL TABLE" in plan
+    # Each hit is joined back by primary key rather than by scanning the tables
+    for table in ("bill", "income", "account", "month"):
+        assert f"SCAN {table} " not in plan + " "
+
+
+def test_search_page_and_api_paging(auth_client, db, app):
+    _seed(db)
+
+    page = auth_client.get("/search?q=insurance")
+    assert page.status_code == 200
+    assert b"Car insurance" in page.data and b"Rent" not in page.data
+
+    first = auth_client.get("/api/v1/search?q=insurance&limit=1").get_json()
+    assert len(first["data"]) == 1 and first["next"] == 1
+    assert first["data"][0]["amount"] in ("30.00", "18.50") and first["data"][0]["month_id"]
+    second = auth_client.get(first["links"]["next"]).get_json()
+    assert second["next"] is None
+    assert {first["data"][0]["name"], second["data"][0]["name"]} == {"Car insurance", "Home insurance"}
+    assert auth_client.get("/api/v1/search?q=rent&offset=5000").status_code == 400
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Generous enough for a slow CI runner; a cold build takes a fraction of this
+STARTUP_BUDGET_SECONDS = 2.0
+
+
+def test_importing_the_package_has_no_side_effects(tmp_path):
+    database = tmp_path / "data" / "finances.db"
+    env = {**os.environ, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{database}"}
+    code = "import sys, app; sys.exit(app._app is not None)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1], env=env, capture_output=True
+    )
+    assert result.returncode == 0, result.stderr.decode()
+    assert not database.parent.exists()
+
+
+def test_create_app_opens_no_connection_and_starts_quickly(tmp_path):
+    from app import create_app  # type: ignore
+
+    database = tmp_path / "finances.db"
+    create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{database}"})  # warm imports
+
+    started = time.perf_counter()
+    create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{database}"})
+    elapsed = time.perf_counter() - started
+
+    # SQLite creates the file on first connect, so schema checks were left to `flask upgrade-db`
+    assert not database.exists()
+    assert elapsed < STARTUP_BUDGET_SECONDS
+
+
+def test_upgrade_command_prepares_the_schema(tmp_path):
+    from sqlalchemy import inspect
+
+    from app import create_app  # type: ignore
+    from app.extensions import db as _db  # type: ignore
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'finances.db'}"})
+    result = app.test_cli_runner().invoke(args=["upgrade-db"])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        assert "month" in inspect(_db.engine).get_table_names()
+        _db.engine.dispose()
@@ -0,0 +1,63 @@
+from decimal import Decimal
+
+
+def _seed_month(db, accounts=3, bills=4, incomes=2):
+    from app.models import Account, Bill, Income, Month  # type: ignore
+
+    m = Month(name="March")
+    db.session.add(m)
+    db.session.flush()
+    for a in range(accounts):
+        acc = Account(month_id=m.id, name=f"Account {a}")
+        db.session.add(acc)
+        db.session.flush()
+        for b in range(bills):
+            db.session.add(Bill(account_id=acc.id, name=f"Bill {b}", amount=Decimal("0.10")))
+        for i in range(incomes):
+            db.session.add(Income(account_id=acc.id, name=f"Income {i}", amount=Decimal("0.20")))
+    db.session.commit()
+    return m
+
+
+def test_account_totals_are_exact_decimals(db):
+    from app.models import Account  # type: ignore
+    from app.totals import account_totals  # type: ignore
+
+    m = _seed_month(db, accounts=2, bills=3, incomes=1)
+    empty = Account(month_id=m.id, name="Empty")
+    db.session.add(empty)
+    db.session.commit()
+
+    totals = account_totals(m.id)
+
+    assert len(totals) == 3
+    assert totals[empty.id].total_bills == Decimal("0.00")
+    assert totals[empty.id].remainder == Decimal("0.00")
+    for acc in m.accounts:
+        if acc.id == empty.id:
+            continue
+        assert totals[acc.id].total_bills == Decimal("0.30")
+        assert totals[acc.id].total_incomes == Decimal("0.20")
+        assert totals[acc.id].remainder == Decimal("-0.10")
+
+
+def test_month_details_query_count_is_constant(app, auth_client, db, query_counter, monkeypatch):
+    # Measure rendering itself, not the page cache
+    monkeypatch.setitem(app.extensions, "render_cache", None)
+    small_id = _seed_month(db, accounts=1).id
+    large_id = _seed_month(db, accounts=8).id
+    # Warm up so the logged in user is cached for both measured requests
+    auth_client.get(f"/months/{small_id}")
+
+    db.session.remove()
+    query_counter.clear()
+    r = auth_client.get(f"/months/{small_id}")
+    assert r.status_code == 200
+    small_count = len(query_counter)
+
+    db.session.remove()
+    query_counter.clear()
+    r = auth_client.get(f"/months/{large_id}")
+    assert r.status_code == 200
+    assert "£0.40".encode() in r.data
+    assert len(query_counter) == small_count
@@ -0,0 +1,156 @@
+from decimal import Decimal
+
+import pytest
+
+
+@pytest.fixture
+def accounts(db):
+    from app.models import Account, Month  # type: ignore
+
+    m = Month(name="May")
+    db.session.add(m)
+    db.session.flush()
+    current = Account(month_id=m.id, name="Current")
+    savings = Account(month_id=m.id, name="Savings")
+    holiday = Account(month_id=m.id, name="Holiday")
+    db.session.add_all([current, savings, holiday])
+    db.session.commit()
+    return current, savings, holiday
+
+
+@pytest.fixture
+def commits(db, monkeypatch):
+    calls = []
+    commit = db.session.commit
+
+    def counting_commit():
+        calls.append(1)
+        commit()
+
+    monkeypatch.setattr(db.session, "commit", counting_commit)
+    return calls
+
+
+def test_sync_transfer_creates_moves_and_removes_the_income(db, accounts):
+    from app import transfers  # type: ignore
+    from app.balances import find_discrepancies  # type: ignore
+    from app.models import Bill, Income  # type: ignore
+
+    current, savings, holiday = accounts
+    bill = Bill(account_id=current.id, name="Save", amount=Decimal("50.00"), owner="Sam", is_paid=True)
+    db.session.add(bill)
+    income = transfers.sync_transfer(bill, savings.id)
+    db.session.commit()
+
+    assert bill.linked_income_id == income.id
+    assert (income.account_id, income.name, income.amount, income.contributor) == (
+        savings.id,
+        "Transfer from Current",
+        Decimal("50.00"),
+        "Sam",
+    )
+
+    bill.amount = Decimal("75.00")
+    assert transfers.sync_transfer(bill, holiday.id) is income
+    db.session.commit()
+    assert (income.account_id, income.amount) == (holiday.id, Decimal("75.00"))
+    assert savings.total_incomes == Decimal("0.00")
+    assert holiday.total_incomes == Decimal("75.00")
+
+    bill.is_paid = False
+    assert transfers.sync_transfer(bill, holiday.id) is None
+    db.session.commit()
+    assert bill.linked_income_id is None
+    assert Income.query.count() == 0
+    assert find_discrepancies() == []
+
+
+def test_invalid_destinations_do_not_transfer(db, accounts):
+    from app import transfers  # type: ignore
+    from app.models import Account, Bill, Month  # type: ignore
+
+    current, _, _ = accounts
+    other = Month(name="June")
+    db.session.add(other)
+    db.session.flush()
+    elsewhere = Account(month_id=other.id, name="Elsewhere")
+    db.session.add(elsewhere)
+    bill = Bill(account_id=current.id, name="Save", amount=Decimal("5.00"), is_paid=True)
+    db.session.add(bill)
+    db.session.flush()
+
+    for destination in (None, 0, current.id, elsewhere.id, 9999):
+        assert transfers.sync_transfer(bill, destination) is None
+
+
+def test_routes_write_a_transfer_in_one_commit(auth_client, db, accounts, commits):
+    from app.models import Bill, Income  # type: ignore
+
+    current, savings, holiday = accounts
+    month_id, current_id, savings_id, holiday_id = current.month_id, current.id, savings.id, holiday.id
+
+    auth_client.post(
+        f"/months/{month_id}",
+        data={
+            "account_id": current_id,
+            "bill-name": "To savings",
+            "bill-amount": "250.00",
+            "bill-is_paid": "y",
+            "bill-transfer": "y",
+            "bill-destination_account": str(savings_id),
+            "bill-submit": "Save Bill",
+        },
+    )
+    assert len(commits) == 1
+    bill = Bill.query.filter_by(name="To savings").one()
+    assert bill.linked_income.account_id == savings_id
+
+    commits.clear()
+    auth_client.post(
+        f"/bill/{bill.id}/edit",
+        data={
+            "name": "To holiday",
+            "amount": "80.00",
+            "is_paid": "y",
+            "transfer": "y",
+            "destination_account": holiday_id,
+        },
+    )
+    assert len(commits) == 1
+    db.session.expire_all()
+    income = Income.query.one()
+    assert (income.account_id, income.amount) == (holiday_id, Decimal("80.00"))
+
+    commits.clear()
+    auth_client.post(f"/bill/{bill.id}/delete")
+    assert len(commits) == 1
+    assert Income.query.count() == 0
+
+
+@pytest.mark.parametrize("delete", ["route", "api"])
+def test_deleting_an_account_removes_its_transfers_elsewhere(auth_client, db, accounts, delete):
+    from app import transfers  # type: ignore
+    from app.balances import find_discrepancies  # type: ignore
+    from app.models import Account, Bill, Income  # type: ignore
+
+    current, savings, holiday = accounts
+    out = Bill(account_id=current.id, name="Save", amount=Decimal("50.00"), is_paid=True)
+    into = Bill(account_id=holiday.id, name="Top up", amount=Decimal("20.00"), is_paid=True)
+    db.session.add_all([out, into])
+    transfers.sync_transfer(out, savings.id)
+    transfers.sync_transfer(into, current.id)
+    db.session.commit()
+    current_id, savings_id, into_id = current.id, savings.id, into.id
+
+    if delete == "route":
+        auth_client.post(f"/account/{current_id}/delete")
+    else:
+        assert auth_client.delete(f"/api/v1/accounts/{current_id}").status_code == 204
+    db.session.expire_all()
+
+    assert db.session.get(Account, current_id) is None
+    assert Income.query.filter_by(account_id=savings_id).count() == 0
+    assert db.session.get(Account, savings_id).total_incomes == Decimal("0.00")
+    # A transfer into the deleted account stays a paid bill, without its income
+    assert db.session.get(Bill, into_id).linked_income_id is None
+    assert find_discrepancies() == []
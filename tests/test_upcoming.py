@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+def _seed(db, today):
+    from app.models import Account, Bill, Month  # type: ignore
+
+    rows = []
+    for name in ("Last month", "This month"):
+        month = Month(name=name)
+        account = Account(month=month, name=f"{name} current")
+        db.session.add_all([month, account])
+        rows.append(account)
+    old, current = rows
+    db.session.add_all(
+        [
+            Bill(account=old, name="Late, again", amount=Decimal("40.00"), due_date=today - timedelta(days=3)),
+            Bill(account=old, name="Settled", amount=Decimal("10.00"), due_date=today, is_paid=True),
+            Bill(account=current, name="Rent", amount=Decimal("950.00"), due_date=today + timedelta(days=2)),
+            Bill(account=current, name="Someday", amount=Decimal("5.00")),
+            Bill(account=current, name="Far off", amount=Decimal("70.00"), due_date=today + timedelta(days=60)),
+        ]
+    )
+    db.session.commit()
+
+
+def test_due_bills_span_months_and_skip_paid(db):
+    from app import upcoming  # type: ignore
+
+    today = date.today()
+    _seed(db, today)
+
+    bills = upcoming.due_bills(today + timedelta(days=29))
+    assert [b.name for b in bills] == ["Late, again", "Rent"]
+    overdue, due = upcoming.split_overdue(bills, today)
+    assert ([b.name for b in overdue], [b.month for b in due]) == (["Late, again"], ["This month"])
+    assert [b.name for b in upcoming.due_bills(today + timedelta(days=90), since=today)] == ["Rent", "Far off"]
+
+
+def test_due_query_range_scans_the_partial_index(db):
+    from sqlalchemy import text
+
+    from app import upcoming  # type: ignore
+
+    stmt = upcoming._statement(date(2025, 1, 1), date(2025, 1, 31))
+    compiled = stmt.compile(db.engine, compile_kwargs={"literal_binds": True})
+    plan = " ".join(row[-1] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+    assert "ix_bill_unpaid_due (is_paid=? AND due_date>? AND due_date<?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_due_page_and_api(auth_client, db):
+    today = date.today()
+    _seed(db, today)
+
+    page = auth_client.get("/due")
+    assert page.status_code == 200
+    assert b"Overdue" in page.data and b"Rent" in page.data and b"Far off" not in page.data
+
+    data = auth_client.get("/api/v1/due?days=90&overdue=false").get_json()
+    assert [(b["name"], b["overdue"]) for b in data["data"]] == [("Rent", False), ("Far off", False)]
+    assert data["data"][0]["amount"] == "950.00"
+
+
+def test_due_calendar_feed(auth_client, db):
+    today = date.today()
+    _seed(db, today)
+
+    resp = auth_client.get("/api/v1/due.ics")
+    assert resp.mimetype == "text/calendar"
+    body = resp.get_data(as_text=True)
+    assert body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n")
+    assert body.count("BEGIN:VEVENT") == 2
+    assert f"DTSTART;VALUE=DATE:{today + timedelta(days=2):%Y%m%d}" in body
+    assert "SUMMARY:Late\\, again £40.00" in body
+    assert all(len(line.encode()) <= 75 for line in body.split("\r\n"))
+
+
+def test_long_ics_lines_are_folded():
+    from app.upcoming import _fold  # type: ignore
+
+    line = "DESCRIPTION:" + "£" * 60
+    folded = _fold(line)
+    assert all(len(part.encode()) <= 75 for part in folded.split("\r\n"))
+    assert folded.replace("\r\n ", "").rstrip("\r\n") == line